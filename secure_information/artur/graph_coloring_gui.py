@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import math
-import random
 from typing import Dict, List, Tuple, Optional
 import threading
 import time
@@ -1,10 +1,15 @@
-import random
+import sys
+import os
 import hashlib
 import json
 from typing import Dict, List, Tuple, Set, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from crypto_lib import get_rng
+
+
 class Color(Enum):
     RED = 1
     BLUE = 2
@@ -134,13 +139,13 @@ class GraphColoringZKProver:
     def start_round(self) -> Dict[int, str]:
         colors_used = list(set(self.original_coloring.values()))
         permuted_colors = colors_used.copy()
-        random.shuffle(permuted_colors)
+        get_rng().shuffle(permuted_colors)
         
         color_permutation = dict(zip(colors_used, permuted_colors))
         permuted_coloring = {vertex: color_permutation[color] 
                            for vertex, color in self.original_coloring.items()}
         
-        nonces = {vertex: str(random.randint(10**10, 10**15)) 
+        nonces = {vertex: str(get_rng().randint(10**10, 10**15)) 
                  for vertex in range(self.graph.num_vertices)}
         
         commitments = {}
@@ -170,7 +175,7 @@ class GraphColoringZKVerifier:
         self.current_commitments = commitments
     
     def generate_challenge(self) -> Edge:
-        return random.choice(list(self.graph.edges))
+        return get_rng().choice(list(self.graph.edges))
     
     def verify_response(self, challenge_edge: Edge, 
                        color_u: Color, color_v: Color, 
@@ -0,0 +1,305 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+from typing import Callable, Dict, List, Optional, Tuple
+
+from crypto_lib import (CryptoUtils, PrimeGenerator, FixedBaseExp, RSACrypto, RSAPrivateKey, ElGamalCrypto,
+                        ShamirCrypto, VernamCrypto, deterministic_rng, get_rng)
+from lab8_RSA import RSASignature
+from lab9_gamal import ElGamalSignature
+from lab10_gost import GOSTSignature
+from lab11_fips import FIPS186Signature
+
+KEY_BITS = [64, 128, 256, 512, 1024, 2048, 4096]
+FILE_SIZES = [1 << 10, 1 << 16, 1 << 20, 10 << 20, 100 << 20]
+DSA_GROUPS = [(512, 160), (1024, 160), (2048, 224), (3072, 256)]
+
+QUICK_KEY_BITS = [64, 256, 1024]
+QUICK_FILE_SIZES = [1 << 10, 1 << 16, 1 << 20]
+QUICK_DSA_GROUPS = [(512, 160), (1024, 160)]
+
+# Поблочные шифры на больших файлах работают минутами - ограничиваем их отдельно
+MAX_BLOCK_CIPHER_FILE = 1 << 16
+VERIFY_BATCH_SIZE = 100
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+
+class Benchmark:
+    """Набор замеров: каждый случай - имя, параметры и функция без аргументов"""
+
+    def __init__(self, repeat: int = 3, min_time: float = 0.2):
+        self.repeat = repeat
+        self.min_time = min_time
+        self.results: List[Dict] = []
+
+    @staticmethod
+    def key(name: str, params: Dict) -> str:
+        """Ключ случая для сравнения с эталоном"""
+        return name + "[" + ",".join(f"{k}={params[k]}" for k in sorted(params)) + "]"
+
+    def measure(self, name: str, func: Callable[[], object], **params):
+        """Минимальное время одного вызова func по repeat сериям (вывод func подавляется)"""
+        timer = timeit.Timer(func)
+        with contextlib.redirect_stdout(io.StringIO()):
+            number = 1
+            while True:
+                elapsed = timer.timeit(number)
+                if elapsed >= self.min_time or number >= 1 << 20:
+                    break
+                number *= 10 if elapsed < self.min_time / 10 else 2
+            times = [elapsed] + timer.repeat(self.repeat - 1, number)
+
+        seconds = min(times) / number
+        self.results.append({"name": name, "params": params, "seconds": seconds, "number": number,
+                             "key": self.key(name, params)})
+        print(f"{self.key(name, params):<60} {seconds * 1e6:14.2f} мкс")
+
+    def to_json(self) -> Dict:
+        return {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "mod_exp_backend": CryptoUtils.MOD_EXP_BACKEND,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": self.results,
+        }
+
+
+def quiet(func, *args, **kwargs):
+    """Вызов функции с подавлением вывода"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def rsa_key(bits: int) -> Tuple[Tuple[int, int], RSAPrivateKey]:
+    """Ключи RSA с модулем bits бит и e = 65537"""
+    while True:
+        p = PrimeGenerator.generate(bits // 2)
+        q = PrimeGenerator.generate(bits - bits // 2)
+        phi = (p - 1) * (q - 1)
+        if p != q and phi % 65537 != 0:
+            break
+    d = pow(65537, -1, phi)
+    return (p * q, 65537), RSAPrivateKey.from_components(p * q, d, p, q)
+
+
+def seeded_prime(bits: int) -> int:
+    """Простое из фиксированной точки старта поиска (время не зависит от активного ГСЧ)"""
+    with deterministic_rng(bits):
+        return PrimeGenerator.generate(bits)
+
+
+def bench_primitives(bench: Benchmark, key_bits: List[int]):
+    utils = CryptoUtils()
+    rng = get_rng()
+    for bits in key_bits:
+        modulus = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        base = rng.randrange(2, modulus)
+        exponent = rng.getrandbits(bits)
+        b = rng.getrandbits(bits)
+
+        bench.measure("mod_exp", lambda: utils.mod_exp(base, exponent, modulus), bits=bits)
+        bench.measure("builtin_pow", lambda: pow(base, exponent, modulus), bits=bits)
+        table = FixedBaseExp(base, modulus, max_bits=bits)
+        bench.measure("fixed_base_pow", lambda: table.pow(exponent), bits=bits)
+        bench.measure("extended_euclid", lambda: utils.extended_euclid(modulus, b), bits=bits)
+
+        prime = PrimeGenerator.generate(bits)
+        bench.measure("test_ferma", lambda: utils.test_ferma(prime), bits=bits)
+        bench.measure("miller_rabin", lambda: utils.is_probable_prime(prime), bits=bits)
+        bench.measure("mod_inverse", lambda: utils.mod_inverse(base % prime or 2, prime), bits=bits)
+
+        if bits <= 1024:
+            # Время поиска простого зависит от случайной точки старта - фиксируем ее в каждом вызове
+            bench.measure("generate_prime", lambda: seeded_prime(bits), bits=bits)
+
+        public_key, private_key = rsa_key(bits)
+        c = pow(base % public_key[0], 65537, public_key[0])
+        bench.measure("rsa_decrypt_crt", lambda: RSACrypto.decrypt_block(c, private_key), bits=bits)
+        bench.measure("rsa_decrypt_plain", lambda: pow(c, private_key.d, private_key.n), bits=bits)
+
+
+def make_file(directory: str, size: int) -> str:
+    """Файл случайных данных заданного размера"""
+    path = os.path.join(directory, f"plain_{size}.bin")
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            for offset in range(0, size, 1 << 20):
+                f.write(get_rng().randbytes(min(1 << 20, size - offset)))
+    return path
+
+
+def bench_file_ciphers(bench: Benchmark, file_sizes: List[int], directory: str, workers: int):
+    rsa, elgamal, shamir, vernam = RSACrypto(), ElGamalCrypto(), ShamirCrypto(), VernamCrypto()
+    rsa_public, rsa_private = rsa.generate_keys()
+    rsa2048_public, rsa2048_private = rsa_key(2048)
+    elgamal_public, elgamal_private = elgamal.generate_keys()
+    keys_a, keys_b = shamir.generate_keys()
+    enc, dec = os.path.join(directory, "cipher.bin"), os.path.join(directory, "plain.out")
+
+    for size in file_sizes:
+        plain = make_file(directory, size)
+
+        if size <= MAX_BLOCK_CIPHER_FILE:
+            for file_format, kwargs in (("legacy", {}), ("container", {"container": True})):
+                bench.measure("rsa_encrypt_file", lambda: rsa.encrypt_file(rsa_public, plain, enc, workers, **kwargs),
+                              size=size, format=file_format)
+                bench.measure("rsa_decrypt_file", lambda: rsa.decrypt_file(rsa_private, enc, dec, workers),
+                              size=size, format=file_format)
+                bench.measure("elgamal_encrypt_file",
+                              lambda: elgamal.encrypt_file(elgamal_public, plain, enc, workers, **kwargs),
+                              size=size, format=file_format)
+                bench.measure("elgamal_decrypt_file", lambda: elgamal.decrypt_file(elgamal_private, enc, dec, workers),
+                              size=size, format=file_format)
+                bench.measure("shamir_encrypt_file",
+                              lambda: shamir.encrypt_file(keys_a, keys_b, plain, enc, workers, **kwargs),
+                              size=size, format=file_format)
+                bench.measure("shamir_decrypt_file", lambda: shamir.decrypt_file(keys_a, keys_b, enc, dec, workers),
+                              size=size, format=file_format)
+
+        bench.measure("rsa_encrypt_file", lambda: rsa.encrypt_file(rsa2048_public, plain, enc, hybrid=True),
+                      size=size, format="hybrid")
+        bench.measure("rsa_decrypt_file", lambda: rsa.decrypt_file(rsa2048_private, enc, dec),
+                      size=size, format="hybrid")
+
+        key = vernam.generate_random_key(size)
+        bench.measure("vernam_encrypt_file", lambda: vernam.encrypt_file(plain, enc, key), size=size)
+
+
+def bench_signatures(bench: Benchmark, key_bits: List[int], dsa_groups: List[Tuple[int, int]], directory: str):
+    document = make_file(directory, 1 << 16)
+    with open(document, "rb") as f:
+        data = f.read()
+
+    rsa_sig = RSASignature()
+    for bits in key_bits:
+        if bits < 512:
+            continue
+        public_key, private_key = rsa_key(bits)
+        signature_file = os.path.join(directory, "doc.sig")
+        bench.measure("rsa_sign_file", lambda: rsa_sig.sign_file(document, (private_key.n, private_key.d),
+                                                                 signature_file, mode='bytes'), bits=bits)
+        bench.measure("rsa_verify_file", lambda: rsa_sig.verify_file(document, signature_file, public_key), bits=bits)
+        bench.measure("rsa_sign_digest_file", lambda: rsa_sig.sign_file(document, private_key, signature_file),
+                      bits=bits)
+        bench.measure("rsa_verify_digest_file", lambda: rsa_sig.verify_file(document, signature_file, public_key),
+                      bits=bits)
+
+    elgamal_sig = ElGamalSignature()
+    public_key, private_key = quiet(elgamal_sig.generate_keys)
+    signing_key = elgamal_sig.prepare_key(private_key, public_key[1])
+    digest = elgamal_sig.compute_hash(data)
+    signature = elgamal_sig.sign_digest(digest, signing_key)
+    bench.measure("elgamal_sign", lambda: elgamal_sig.sign_digest(digest, signing_key), bits=public_key[0].bit_length())
+    bench.measure("elgamal_verify", lambda: all(elgamal_sig.verify_byte(m, sig, public_key)
+                                                for m, sig in zip(digest, signature)),
+                  bits=public_key[0].bit_length())
+
+    gost, dsa = GOSTSignature(), FIPS186Signature()
+    for L, N in dsa_groups:
+        p, q, g = CryptoUtils.generate_dsa_group(L, N)
+        x, y = quiet(dsa.generate_keys, p, q, g)
+
+        signature = quiet(gost.sign, data, p, q, g, x)
+        bench.measure("gost_sign", lambda: gost.sign(data, p, q, g, x), L=L, N=N)
+        bench.measure("gost_verify", lambda: gost.verify(data, signature, p, q, g, y), L=L, N=N)
+        batch = [(data, signature)] * VERIFY_BATCH_SIZE
+        bench.measure("gost_verify_batch", lambda: gost.verify_batch(batch, p, q, g, y), L=L, N=N, batch=len(batch))
+
+        signature = quiet(dsa.sign, data, p, q, g, x)
+        bench.measure("dsa_sign", lambda: dsa.sign(data, p, q, g, x), L=L, N=N)
+        bench.measure("dsa_verify", lambda: dsa.verify(data, signature, p, q, g, y), L=L, N=N)
+        batch = [(data, signature)] * VERIFY_BATCH_SIZE
+        bench.measure("dsa_verify_batch", lambda: dsa.verify_batch(batch, p, q, g, y), L=L, N=N, batch=len(batch))
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[Tuple[str, float, float]]:
+    """Случаи, ставшие медленнее эталона более чем в (1 + tolerance) раз"""
+    reference = {entry["key"]: entry["seconds"] for entry in baseline.get("results", [])}
+    regressions = []
+
+    print(f"\n{'Случай':<60} {'эталон, мкс':>14} {'сейчас, мкс':>14} {'отношение':>10}")
+    for entry in results:
+        old = reference.get(entry["key"])
+        if old is None:
+            continue
+        ratio = entry["seconds"] / old if old > 0 else float("inf")
+        mark = "  РЕГРЕССИЯ" if ratio > 1 + tolerance else ""
+        print(f"{entry['key']:<60} {old * 1e6:14.2f} {entry['seconds'] * 1e6:14.2f} {ratio:10.2f}{mark}")
+        if mark:
+            regressions.append((entry["key"], old, entry["seconds"]))
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры производительности примитивов и схем secure_information")
+    parser.add_argument("--full", action="store_true",
+                        help="полная сетка: ключи 64-4096 бит, файлы 1 КБ - 100 МБ")
+    parser.add_argument("--only", choices=["primitives", "files", "signatures"], action="append",
+                        help="запускать только указанные группы (можно несколько раз)")
+    parser.add_argument("--repeat", type=int, default=3, help="количество серий замера")
+    parser.add_argument("--min-time", type=float, default=0.2, help="минимальная длительность серии, с")
+    parser.add_argument("--workers", type=int, default=1, help="процессов для поблочных шифров")
+    parser.add_argument("--backend", choices=["python", "builtin", "gmpy2"], default=None,
+                        help="реализация CryptoUtils.mod_exp")
+    parser.add_argument("--seed", type=int, default=1, help="зерно для входных данных")
+    parser.add_argument("--output", default="benchmark_results.json", help="файл с результатами (JSON)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="эталон для сравнения (JSON)")
+    parser.add_argument("--save-baseline", action="store_true", help="сохранить результаты как эталон")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допустимое замедление (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    if args.backend is not None:
+        CryptoUtils.set_mod_exp_backend(args.backend)
+
+    key_bits = KEY_BITS if args.full else QUICK_KEY_BITS
+    file_sizes = FILE_SIZES if args.full else QUICK_FILE_SIZES
+    dsa_groups = DSA_GROUPS if args.full else QUICK_DSA_GROUPS
+    groups = args.only or ["primitives", "files", "signatures"]
+
+    bench = Benchmark(args.repeat, args.min_time)
+    # Детерминированный ГСЧ библиотеки: одинаковые ключи и данные от запуска к запуску
+    with deterministic_rng(args.seed), tempfile.TemporaryDirectory() as directory:
+        if "primitives" in groups:
+            bench_primitives(bench, key_bits)
+        if "files" in groups:
+            bench_file_ciphers(bench, file_sizes, directory, args.workers)
+        if "signatures" in groups:
+            bench_signatures(bench, key_bits, dsa_groups, directory)
+
+    report = bench.to_json()
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nРезультаты сохранены в {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Эталон сохранен в {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Эталон {args.baseline} не найден - сравнение пропущено")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(bench.results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nРегрессий: {len(regressions)}")
+        return 1
+    print("\nРегрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,1147 @@
 import random
 import math
 import os
-from typing import Tuple, List, Optional, Set
+import mmap
+import struct
+import zlib
+import hashlib
+import time
+import logging
+import itertools
+import multiprocessing
+import threading
+import queue
+from array import array
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+from typing import Tuple, List, Optional, Set, Dict, NamedTuple, Union, Callable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+RNG_BUFFER_SIZE = 1 << 16
+
+
+class BufferedSystemRandom(random.Random):
+    """Криптостойкий ГСЧ: байты os.urandom, запрашиваемые крупными порциями
+
+    Один системный вызов обслуживает тысячи ключей и одноразовых чисел.
+    После fork буфер родителя отбрасывается, чтобы процессы не делили байты.
+    """
+
+    def __init__(self, buffer_size: int = RNG_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._buffer = b''
+        self._offset = 0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        super().__init__()
+
+    def seed(self, *args, **kwargs):
+        """Зерно не используется: источник - энтропия ОС"""
+        return None
+
+    def randbytes(self, n: int) -> bytes:
+        """n случайных байт из буфера (пополняется из os.urandom)"""
+        if n > self.buffer_size:
+            return os.urandom(n)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._buffer, self._offset, self._pid = b'', 0, os.getpid()
+            if self._offset + n > len(self._buffer):
+                self._buffer, self._offset = os.urandom(self.buffer_size), 0
+            chunk = self._buffer[self._offset:self._offset + n]
+            self._offset += n
+            return chunk
+
+    def getrandbits(self, k: int) -> int:
+        """Случайное целое из k бит"""
+        if k < 0:
+            raise ValueError("Количество бит должно быть неотрицательным")
+        if k == 0:
+            return 0
+        size = (k + 7) // 8
+        return int.from_bytes(self.randbytes(size), 'big') >> (size * 8 - k)
+
+    def random(self) -> float:
+        """Случайное число из [0, 1) с 53 битами точности"""
+        return (int.from_bytes(self.randbytes(7), 'big') >> 3) * 2.0 ** -53
+
+    def getstate(self):
+        raise NotImplementedError("Состояние системного ГСЧ не сохраняется")
+
+    def setstate(self, state):
+        raise NotImplementedError("Состояние системного ГСЧ не восстанавливается")
+
+    def spawn(self, label) -> 'BufferedSystemRandom':
+        """ГСЧ для дочернего процесса (метка не используется: энтропия ОС независима)"""
+        return BufferedSystemRandom(self.buffer_size)
+
+    def __reduce__(self):
+        return self.__class__, (self.buffer_size,)
+
+
+def _seed_bytes(seed) -> bytes:
+    """Зерно DRBG (int, str или bytes) в виде байт"""
+    if isinstance(seed, (bytes, bytearray)):
+        return bytes(seed)
+    if isinstance(seed, str):
+        return seed.encode()
+    if isinstance(seed, int):
+        return seed.to_bytes((seed.bit_length() + 8) // 8, 'big', signed=True)
+    raise TypeError(f"Неподдерживаемый тип зерна: {type(seed).__name__}")
+
+
+class DeterministicRandom(random.Random):
+    """Детерминированный ГСЧ (DRBG): поток SHAKE-256 в режиме счетчика от зерна
+
+    Одно и то же зерно дает одну и ту же последовательность ключей и
+    одноразовых чисел - для воспроизводимых тестов и замеров. Не для ключей
+    реальных данных.
+    """
+
+    def __init__(self, seed=0):
+        super().__init__(seed)
+
+    def seed(self, a=0, version=2):
+        """Переинициализация потока от зерна a"""
+        self._seed = _seed_bytes(a)
+        self._stream = HashKeystream(self._seed, b'drbg', RNG_BUFFER_SIZE)
+        self._offset = 0
+        self.gauss_next = None
+
+    def randbytes(self, n: int) -> bytes:
+        """Следующие n байт потока"""
+        chunk = self._stream.read(self._offset, n)
+        self._offset += n
+        return chunk
+
+    def getrandbits(self, k: int) -> int:
+        """Случайное целое из k бит"""
+        if k < 0:
+            raise ValueError("Количество бит должно быть неотрицательным")
+        if k == 0:
+            return 0
+        size = (k + 7) // 8
+        return int.from_bytes(self.randbytes(size), 'big') >> (size * 8 - k)
+
+    def random(self) -> float:
+        """Случайное число из [0, 1) с 53 битами точности"""
+        return (int.from_bytes(self.randbytes(7), 'big') >> 3) * 2.0 ** -53
+
+    def getstate(self):
+        return self._seed, self._offset, self.gauss_next
+
+    def setstate(self, state):
+        seed, offset, gauss_next = state
+        self.seed(seed)
+        self._offset = offset
+        self.gauss_next = gauss_next
+
+    def spawn(self, label) -> 'DeterministicRandom':
+        """Независимый поток для дочернего процесса: зерно родителя с меткой"""
+        return DeterministicRandom(self._seed + b'/' + _seed_bytes(label))
+
+    def __reduce__(self):
+        return self.__class__, (self._seed,), self.getstate()
+
+
+_rng: random.Random = BufferedSystemRandom()
+
+
+def get_rng() -> random.Random:
+    """ГСЧ библиотеки: ключи, одноразовые числа, эфемерные ключи, кандидаты в простые"""
+    return _rng
+
+
+def set_rng(rng: Optional[random.Random] = None) -> random.Random:
+    """Замена ГСЧ библиотеки (None - криптостойкий по умолчанию); возвращает прежний"""
+    global _rng
+    previous = _rng
+    _rng = rng if rng is not None else BufferedSystemRandom()
+    return previous
+
+
+@contextmanager
+def deterministic_rng(seed=0):
+    """Детерминированный ГСЧ на время блока with (воспроизводимые тесты и замеры)"""
+    previous = set_rng(DeterministicRandom(seed))
+    try:
+        yield get_rng()
+    finally:
+        set_rng(previous)
+
+
+class PrimeGenerator:
+    """Генератор простых чисел: просеивание малыми простыми + тест Миллера-Рабина"""
+
+    SIEVE_LIMIT = 8192
+    WINDOW = 2048
+    SMALL_PRIMES: List[int] = []
+
+    @staticmethod
+    def sieve(limit: int) -> List[int]:
+        """Решето Эратосфена: все простые числа меньше limit"""
+        if limit < 3:
+            return []
+        flags = bytearray([1]) * limit
+        flags[0] = flags[1] = 0
+        for i in range(2, math.isqrt(limit - 1) + 1):
+            if flags[i]:
+                flags[i * i::i] = bytes(len(range(i * i, limit, i)))
+        return [i for i, is_prime in enumerate(flags) if is_prime]
+
+    @staticmethod
+    def miller_rabin(n: int, k: int = 10) -> bool:
+        """Тест Миллера-Рабина (без предварительного пробного деления)"""
+        d = n - 1
+        s = 0
+        while d % 2 == 0:
+            d //= 2
+            s += 1
+
+        rng = get_rng()
+        for _ in range(k):
+            a = rng.randint(2, n - 2)
+            x = pow(a, d, n)
+            if x == 1 or x == n - 1:
+                continue
+            for _ in range(s - 1):
+                x = pow(x, 2, n)
+                if x == n - 1:
+                    break
+            else:
+                return False
+        return True
+
+    @staticmethod
+    def is_probable_prime(n: int, k: int = 10) -> bool:
+        """Проверка на простоту: пробное деление на малые простые, затем Миллер-Рабин"""
+        if n < 2:
+            return False
+        for p in PrimeGenerator.SMALL_PRIMES:
+            if n % p == 0:
+                return n == p
+        if n < PrimeGenerator.SIEVE_LIMIT ** 2:
+            return True
+        return PrimeGenerator.miller_rabin(n, k)
+
+    @staticmethod
+    def sieve_window(start: int, count: int) -> bytearray:
+        """Просеивание окна нечетных кандидатов start, start+2, ..., start+2*(count-1)"""
+        flags = bytearray([1]) * count
+        for p in PrimeGenerator.SMALL_PRIMES[1:]:
+            # start + 2j ≡ 0 (mod p)  =>  j ≡ -start * 2^(-1) (mod p)
+            j = (-start * ((p + 1) // 2)) % p
+            if start + 2 * j == p:
+                j += p
+            if j < count:
+                flags[j::p] = bytes(len(range(j, count, p)))
+        return flags
+
+    @staticmethod
+    def search(start: int, end: int, k: int = 10) -> Optional[int]:
+        """Поиск первого простого числа в [start, end] по окнам решета"""
+        start |= 1
+        while start <= end:
+            count = min(PrimeGenerator.WINDOW, (end - start) // 2 + 1)
+            flags = PrimeGenerator.sieve_window(start, count)
+            j = flags.find(1)
+            while j != -1:
+                candidate = start + 2 * j
+                if candidate < PrimeGenerator.SIEVE_LIMIT ** 2 or PrimeGenerator.miller_rabin(candidate, k):
+                    return candidate
+                j = flags.find(1, j + 1)
+            start += 2 * count
+        return None
+
+    @staticmethod
+    def generate_in_range(lower: int, upper: int, k: int = 10) -> int:
+        """Генерация случайного простого числа в диапазоне [lower, upper]"""
+        lower = max(lower, 2)
+        if lower > upper:
+            raise ValueError(f"Пустой диапазон [{lower}, {upper}]")
+
+        if upper < PrimeGenerator.SIEVE_LIMIT:
+            candidates = [p for p in PrimeGenerator.SMALL_PRIMES if lower <= p <= upper]
+            if not candidates:
+                raise ValueError(f"В диапазоне [{lower}, {upper}] нет простых чисел")
+            return get_rng().choice(candidates)
+
+        start = get_rng().randint(lower, upper)
+        prime = PrimeGenerator.search(start, upper, k)
+        if prime is None:
+            prime = PrimeGenerator.search(lower, start, k)
+        if prime is None:
+            raise ValueError(f"В диапазоне [{lower}, {upper}] нет простых чисел")
+        return prime
+
+    @staticmethod
+    def generate(bits: int, k: int = 10) -> int:
+        """Генерация простого числа длиной ровно bits бит"""
+        if bits < 2:
+            raise ValueError("Длина простого числа должна быть не меньше 2 бит")
+        return PrimeGenerator.generate_in_range(1 << (bits - 1), (1 << bits) - 1, k)
+
+    @staticmethod
+    def generate_safe(lower: int, upper: int, k: int = 10, attempts: int = 100000) -> int:
+        """Безопасное простое p = 2q + 1 (q простое) в диапазоне [lower, upper]
+
+        Разложение p - 1 = 2q известно, поэтому примитивный корень по модулю p
+        находится без факторизации.
+        """
+        q_lower, q_upper = max(lower // 2, 2), (upper - 1) // 2
+        for _ in range(attempts):
+            p = 2 * PrimeGenerator.generate_in_range(q_lower, q_upper, k) + 1
+            if lower <= p <= upper and PrimeGenerator.is_probable_prime(p, k):
+                return p
+        raise ValueError(f"В диапазоне [{lower}, {upper}] не найдено безопасное простое")
+
+    @staticmethod
+    def min_gap(bits: int) -> int:
+        """Минимальная разность |p - q| пары простых длиной bits бит (FIPS 186-4: 2^(bits/2 - 100))
+
+        Близкие p и q раскладываются методом Ферма за несколько шагов.
+        """
+        return 1 << max(bits // 2 - 100, 0)
+
+    @staticmethod
+    def generate_parallel(bits: int, count: int = 2, workers: Optional[int] = None,
+                          k: int = 10) -> List[int]:
+        """Параллельный поиск count различных простых чисел длиной bits бит в пуле процессов
+
+        Каждый процесс ищет от своего случайного старта, поэтому найденные
+        простые независимы; любые два отличаются не меньше чем на min_gap(bits).
+        """
+        if bits < 2:
+            raise ValueError("Длина простого числа должна быть не меньше 2 бит")
+        workers = workers or os.cpu_count() or 1
+        lower, upper = 1 << (bits - 1), (1 << bits) - 1
+        gap = PrimeGenerator.min_gap(bits)
+
+        found: List[int] = []
+        stop_event = multiprocessing.Event()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_prime_worker,
+                                 initargs=(stop_event, get_rng())) as pool:
+            def submit_search():
+                return pool.submit(_prime_search_worker, get_rng().randint(lower, upper), upper, k)
+
+            pending = {submit_search() for _ in range(workers)}
+            while len(found) < count:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    prime = future.result()
+                    if (prime is not None and len(found) < count and
+                            all(abs(prime - other) >= gap for other in found)):
+                        found.append(prime)
+                    if len(found) < count:
+                        # Каждое новое простое - от нового случайного старта
+                        pending.add(submit_search())
+
+            stop_event.set()
+            for future in pending:
+                future.cancel()
+
+        return found
+
+
+PrimeGenerator.SMALL_PRIMES = PrimeGenerator.sieve(PrimeGenerator.SIEVE_LIMIT)
+
+_prime_stop_event = None
+
+
+def _init_prime_worker(stop_event, rng: Optional[random.Random] = None):
+    """Инициализация процесса поиска простых: общий флаг остановки и свой поток ГСЧ"""
+    global _prime_stop_event
+    _prime_stop_event = stop_event
+    set_rng((rng or get_rng()).spawn(os.getpid()))
+
+
+def _prime_search_worker(start: int, end: int, k: int) -> Optional[int]:
+    """Просмотр окон подряд начиная со start до первого простого"""
+    window = PrimeGenerator.WINDOW
+    start |= 1
+    while start <= end:
+        if _prime_stop_event is not None and _prime_stop_event.is_set():
+            return None
+        count = min(window, (end - start) // 2 + 1)
+        prime = PrimeGenerator.search(start, start + 2 * (count - 1), k)
+        if prime is not None:
+            return prime
+        start += 2 * window
+    return None
+
+
+class Factorizer:
+    """Разложение на множители: пробное деление, ро-метод Полларда (Брент), Миллер-Рабин"""
+
+    CACHE_SIZE = 4096
+    _cache: Dict[int, Dict[int, int]] = {}
+
+    # Предел шагов ро-метода на одно число: делители до ~2^40 находятся за доли секунды,
+    # разложение с двумя большими простыми множителями прерывается ошибкой за ~2 с
+    MAX_ITERATIONS = 1 << 20
+
+    @staticmethod
+    def pollard_brent(n: int, max_iterations: Optional[int] = None) -> int:
+        """Нетривиальный делитель составного n ро-методом Полларда в варианте Брента
+
+        После max_iterations шагов (по умолчанию MAX_ITERATIONS) поиск
+        прекращается с ValueError.
+        """
+        if n % 2 == 0:
+            return 2
+        max_iterations = max_iterations or Factorizer.MAX_ITERATIONS
+        steps = 0
+
+        while True:
+            y = get_rng().randint(1, n - 1)
+            c = get_rng().randint(1, n - 1)
+            m = 128
+            g = r = q = 1
+
+            while g == 1:
+                if steps >= max_iterations:
+                    raise ValueError(f"Ро-метод Полларда не нашел делитель {n.bit_length()}-битного числа "
+                                     f"за {max_iterations} шагов")
+                x = y
+                for _ in range(r):
+                    y = (y * y + c) % n
+                k = 0
+                while k < r and g == 1:
+                    ys = y
+                    for _ in range(min(m, r - k)):
+                        y = (y * y + c) % n
+                        q = q * abs(x - y) % n
+                    g = math.gcd(q, n)
+                    k += m
+                steps += 2 * r
+                r *= 2
+
+            if g == n:
+                # Произведение накрыло делитель целиком - повторяем шаги по одному
+                while True:
+                    ys = (ys * ys + c) % n
+                    g = math.gcd(abs(x - ys), n)
+                    if g > 1:
+                        break
+
+            if g != n:
+                return g
+
+    @staticmethod
+    def factorize(n: int, max_iterations: Optional[int] = None) -> Dict[int, int]:
+        """Каноническое разложение n: {простой множитель: степень}
+
+        Если ро-метод не находит делитель за max_iterations шагов, ValueError.
+        """
+        if n < 1:
+            raise ValueError(f"Разложение определено только для натуральных чисел, n={n}")
+
+        cached = Factorizer._cache.get(n)
+        if cached is not None:
+            return dict(cached)
+
+        factors: Dict[int, int] = {}
+        rest = n
+        for p in PrimeGenerator.SMALL_PRIMES:
+            if p * p > rest:
+                break
+            while rest % p == 0:
+                factors[p] = factors.get(p, 0) + 1
+                rest //= p
+
+        stack = [rest] if rest > 1 else []
+        while stack:
+            m = stack.pop()
+            if PrimeGenerator.is_probable_prime(m, 20):
+                factors[m] = factors.get(m, 0) + 1
+                continue
+            root = math.isqrt(m)
+            if root * root == m:
+                stack.extend((root, root))
+                continue
+            d = Factorizer.pollard_brent(m, max_iterations)
+            stack.extend((d, m // d))
+
+        if len(Factorizer._cache) >= Factorizer.CACHE_SIZE:
+            Factorizer._cache.clear()
+        Factorizer._cache[n] = dict(factors)
+        return factors
+
+
+class FixedBaseExp:
+    """Возведение фиксированного основания в степень по модулю с предвычисленной оконной таблицей"""
+
+    def __init__(self, base: int, modulus: int, order: Optional[int] = None,
+                 max_bits: Optional[int] = None, window: int = 6):
+        self.base = base % modulus
+        self.modulus = modulus
+        self.order = order
+        self.window = window
+        self.max_bits = max_bits or (order or modulus).bit_length()
+
+        # table[i][d] = base^(d * 2^(window*i)) mod modulus
+        self._mask = (1 << window) - 1
+        self._table: List[List[int]] = []
+        row_base = self.base
+        for _ in range((self.max_bits + window - 1) // window):
+            row = [1] * (1 << window)
+            acc = 1
+            for d in range(1, 1 << window):
+                acc = acc * row_base % modulus
+                row[d] = acc
+            self._table.append(row)
+            row_base = acc * row_base % modulus
+
+    def pow(self, exponent: int) -> int:
+        """base^exponent mod modulus: одно умножение на каждое окно показателя"""
+        if self.order is not None:
+            exponent %= self.order
+        if exponent < 0 or exponent.bit_length() > self.max_bits:
+            return pow(self.base, exponent, self.modulus)
+
+        result = 1
+        mask = self._mask
+        modulus = self.modulus
+        for row in self._table:
+            if not exponent:
+                break
+            digit = exponent & mask
+            if digit:
+                result = result * row[digit] % modulus
+            exponent >>= self.window
+        return result
+
+
+class JointFixedBaseExp:
+    """Одновременное возведение двух фиксированных оснований: g^e1 * h^e2 mod modulus (прием Шамира)
+
+    Строка i таблицы хранит g^(a * 2^(window*i)) * h^(b * 2^(window*i)) для всех
+    пар цифр (a, b), поэтому на окно обоих показателей приходится одно умножение.
+    Таблица строится один раз и окупается на пакете проверок подписей.
+    """
+
+    def __init__(self, g: int, h: int, modulus: int, max_bits: int, window: int = 4):
+        self.g = g % modulus
+        self.h = h % modulus
+        self.modulus = modulus
+        self.max_bits = max_bits
+        self.window = window
+        self._mask = (1 << window) - 1
+
+        size = 1 << window
+        self._table: List[List[int]] = []
+        g_base, h_base = self.g, self.h
+        for _ in range((max_bits + window - 1) // window):
+            g_row, h_row = [1] * size, [1] * size
+            for d in range(1, size):
+                g_row[d] = g_row[d - 1] * g_base % modulus
+                h_row[d] = h_row[d - 1] * h_base % modulus
+            self._table.append([gi * hj % modulus for gi in g_row for hj in h_row])
+            g_base = g_row[-1] * g_base % modulus
+            h_base = h_row[-1] * h_base % modulus
+
+    @staticmethod
+    def best_window(bits: int, count: int) -> int:
+        """Окно, минимизирующее построение таблицы плюс count возведений"""
+        return min(range(1, 9), key=lambda w: -(-bits // w) * ((1 << 2 * w) + count))
+
+    def pow(self, e1: int, e2: int) -> int:
+        """g^e1 * h^e2 mod modulus"""
+        if min(e1, e2) < 0 or max(e1, e2).bit_length() > self.max_bits:
+            return pow(self.g, e1, self.modulus) * pow(self.h, e2, self.modulus) % self.modulus
+
+        result = 1
+        mask, window, modulus = self._mask, self.window, self.modulus
+        for row in self._table:
+            if not (e1 or e2):
+                break
+            digit = ((e1 & mask) << window) | (e2 & mask)
+            if digit:
+                result = result * row[digit] % modulus
+            e1 >>= window
+            e2 >>= window
+        return result
+
+
+class VerificationResult(NamedTuple):
+    """Результат пакетной проверки подписей: номера неверных подписей и метрики"""
+    valid: bool
+    failed: List[int]
+    total: int
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        """Количество проверенных подписей в секунду"""
+        return self.total / self.elapsed if self.elapsed > 0 else float('inf')
+
+
+# Таблица пар (основание, открытый ключ) кешируется между пакетами: окно рассчитано минимум на столько проверок
+VERIFY_TABLE_COUNT = 1000
+
+
+def verify_signature_batch(items: Iterable[Tuple[int, Tuple[int, int]]], p: int, q: int, base: int, y: int,
+                           inverted: Callable[[int, int, int], int],
+                           exponents: Callable[[int, int, int, int], Tuple[int, int]]) -> VerificationResult:
+    """Пакетная проверка подписей (h, (r, s)) вида (base^u1 * y^u2 mod p) mod q == r
+
+    inverted(h, r, s) - число, обратное к которому по модулю q нужно схеме;
+    обратные находятся одним обращением на весь пакет. exponents(h, r, s, inv)
+    дает (u1, u2), и base^u1 * y^u2 вычисляется одновременно по кешируемой
+    таблице пар (base, y). Подпись содержит только r = (base^k mod p) mod q,
+    поэтому произведения проверок не объединяются: каждая подпись сверяется
+    отдельно, и неверные перечисляются по номерам.
+    """
+    start = time.perf_counter()
+    items = list(items)
+    failed = []
+    pending = []
+    for i, (h, (r, s)) in enumerate(items):
+        if 0 < r < q and 0 < s < q:
+            pending.append((i, h, r, s))
+        else:
+            failed.append(i)
+
+    if pending:
+        inverses = CryptoUtils.batch_inverse([inverted(h, r, s) for _, h, r, s in pending], q)
+        table = CryptoUtils.joint_fixed_base(base, y, p, q.bit_length(), max(len(pending), VERIFY_TABLE_COUNT))
+        for (i, h, r, s), inv in zip(pending, inverses):
+            if table.pow(*exponents(h, r, s, inv)) % q != r:
+                failed.append(i)
+
+    failed.sort()
+    return VerificationResult(not failed, failed, len(items), time.perf_counter() - start)
+
+
+class Nonce(NamedTuple):
+    """Одноразовое число подписи k с готовыми r (из g^k mod p) и k^(-1) (None, если схеме не нужно)"""
+    k: int
+    r: int
+    k_inv: Optional[int]
+
+
+class NoncePool:
+    """Пул предвычисленных одноразовых чисел подписи для одного ключа
+
+    Фоновый поток заранее вызывает make() - возведение g^k и обращение k - и
+    держит до size готовых Nonce в очереди; онлайн-подпись забирает готовое
+    число и выполняет несколько умножений. Каждое число выдается один раз.
+    Если очередь пуста, число вычисляется на месте.
+    """
+
+    DEFAULT_SIZE = 64
+
+    def __init__(self, make: Callable[[], Nonce], size: int = DEFAULT_SIZE, background: bool = True):
+        self.make = make
+        self.size = size
+        self._queue: queue.Queue = queue.Queue(maxsize=size)
+        self._stop = threading.Event()
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._refill, daemon=True)
+            self._thread.start()
+
+    def _refill(self):
+        while not self._stop.is_set():
+            nonce = self.make()
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(nonce, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+    def fill(self):
+        """Синхронное заполнение очереди до size (без фонового потока)"""
+        while True:
+            try:
+                self._queue.put_nowait(self.make())
+            except queue.Full:
+                return
+
+    def get(self) -> Nonce:
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return self.make()
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def close(self):
+        """Остановка фонового потока; оставшиеся числа отбрасываются"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def __enter__(self) -> 'NoncePool':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NoncePoolRegistry:
+    """Пулы одноразовых чисел подписывающего объекта, по одному на ключ
+
+    make(*key) вычисляет Nonce для ключа key (параметры домена или
+    подготовленный закрытый ключ). next(*key) берет число из запущенного
+    для key пула, а без пула вычисляет его на месте.
+    """
+
+    def __init__(self, make: Callable[..., Nonce]):
+        self.make = make
+        self._pools: Dict[tuple, NoncePool] = {}
+
+    def start(self, *key, size: int = NoncePool.DEFAULT_SIZE, background: bool = True) -> NoncePool:
+        """Фоновое предвычисление чисел для key (заменяет ранее запущенный для key пул)"""
+        self.stop(*key)
+        pool = NoncePool(lambda: self.make(*key), size, background)
+        self._pools[key] = pool
+        return pool
+
+    def stop(self, *key):
+        pool = self._pools.pop(key, None)
+        if pool is not None:
+            pool.close()
+
+    def get(self, *key) -> Optional[NoncePool]:
+        return self._pools.get(key)
+
+    def next(self, *key) -> Nonce:
+        pool = self._pools.get(key)
+        return pool.get() if pool is not None else self.make(*key)
+
+    def close(self):
+        """Остановка всех пулов"""
+        for key in list(self._pools):
+            self.stop(*key)
+
+
+def _solve_each(solve: Callable[[int], Optional[int]], values: List[int], p: int) -> List[Optional[int]]:
+    """solve(y mod p) для каждого y; повторяющиеся y решаются один раз"""
+    solved: Dict[int, Optional[int]] = {}
+    results = []
+    for y in values:
+        y %= p
+        if y not in solved:
+            solved[y] = solve(y)
+        results.append(solved[y])
+    return results
+
+
+class BabyStepGiantStep:
+    """Дискретный логарифм a^x = y (mod p) шагом младенца - шагом великана
+
+    Шаги младенца a^j лежат в таблице с открытой адресацией array('Q'):
+    8 байт на ячейку вместо ~100 байт на элемент dict. В ячейке упакованы
+    младшие биты значения (метка) и j + 1; если значение целиком помещается
+    в метку, совпадение точное и проверка возведением в степень не нужна.
+    Число шагов младенца ограничено бюджетом памяти max_memory, недостающее
+    покрывается шагами великана. Одна таблица обслуживает любое число y;
+    при ожидаемых queries запросах таблица растет до sqrt(order * queries),
+    что минимизирует суммарное число шагов.
+    """
+
+    DEFAULT_MEMORY = 64 << 20
+    _HASH_MULT = 0x9E3779B97F4A7C15
+    _MASK64 = (1 << 64) - 1
+
+    def __init__(self, a: int, p: int, order: Optional[int] = None, max_memory: int = DEFAULT_MEMORY,
+                 queries: int = 1):
+        self.a = a % p
+        self.p = p
+        self.order = order or p - 1
+        if math.gcd(self.a, p) != 1:
+            raise ValueError("Основание не обратимо по модулю")
+
+        max_slots = max_memory // 8
+        if max_slots < 2:
+            raise ValueError("Бюджет памяти меньше двух ячеек таблицы")
+
+        # Таблица заполнена не более чем наполовину - короткие цепочки проб
+        baby = min(math.isqrt(max(self.order * queries - 1, 0)) + 1, self.order)
+        bits = (2 * baby - 1).bit_length()
+        while (1 << bits) > max_slots:
+            bits -= 1
+        baby = min(baby, (1 << bits) // 2)
+
+        self._bits = bits
+        self._jbits = baby.bit_length()
+        tag_bits = 64 - self._jbits
+        self._tag_mask = (1 << tag_bits) - 1
+        self.exact = (p - 1).bit_length() <= tag_bits
+        self._table = array('Q', bytes(8 << bits))
+        self.m = self._fill(baby)
+        self.giant_steps = -(-self.order // self.m)
+        self._giant = pow(self.a, -self.m, p)
+
+    @property
+    def memory(self) -> int:
+        """Размер таблицы в байтах"""
+        return len(self._table) * self._table.itemsize
+
+    def _fill(self, baby: int) -> int:
+        """Запись a^j, j < baby; возвращает число шагов младенца (меньше baby, если порядок a мал)"""
+        table, a, p = self._table, self.a, self.p
+        tag_mask, jbits = self._tag_mask, self._jbits
+        shift, mask = 64 - self._bits, (1 << self._bits) - 1
+        hash_mult, mask64 = self._HASH_MULT, self._MASK64
+
+        current = 1
+        for j in range(baby):
+            tag = current & tag_mask
+            index = ((tag * hash_mult) & mask64) >> shift
+            while table[index]:
+                index = (index + 1) & mask
+            table[index] = (tag << jbits) | (j + 1)
+
+            current = current * a % p
+            if current == 1:
+                # Порядок a равен j + 1: в таблице вся подгруппа, шаги великана не нужны
+                self.order = j + 1
+                return j + 1
+        return baby
+
+    def solve(self, y: int) -> Optional[int]:
+        """Наименьший x >= 0 с a^x = y (mod p) или None"""
+        a, p = self.a, self.p
+        y %= p
+        if y == 0:
+            return None
+
+        table, tag_mask, jbits = self._table, self._tag_mask, self._jbits
+        jmask = (1 << jbits) - 1
+        shift, mask = 64 - self._bits, (1 << self._bits) - 1
+        hash_mult, mask64 = self._HASH_MULT, self._MASK64
+        m, giant, exact = self.m, self._giant, self.exact
+
+        current = y
+        for i in range(self.giant_steps):
+            tag = current & tag_mask
+            index = ((tag * hash_mult) & mask64) >> shift
+            slot = table[index]
+            while slot:
+                if slot >> jbits == tag:
+                    x = i * m + (slot & jmask) - 1
+                    if exact or pow(a, x, p) == y:
+                        return x
+                index = (index + 1) & mask
+                slot = table[index]
+            current = current * giant % p
+        return None
+
+    def solve_many(self, values: List[int]) -> List[Optional[int]]:
+        """Логарифмы для многих y по одной таблице (повторяющиеся y решаются один раз)"""
+        return _solve_each(self.solve, values, self.p)
+
+
+class DiscreteLog:
+    """Дискретный логарифм по основанию a в Z_p^* с автоматическим выбором метода
+
+    p - 1 раскладывается Factorizer, задача сводится методом Полига-Хеллмана
+    к подгруппам простого порядка q. Подзадачи с q до RHO_THRESHOLD решаются
+    шагом младенца - шагом великана (таблица на q строится один раз и
+    переиспользуется всеми y), большие - ро-методом Полларда за O(1) памяти.
+    Если p составное, остается BabyStepGiantStep по порядку p - 1.
+    """
+
+    RHO_THRESHOLD = 1 << 40
+    RHO_PARTITIONS = 20
+
+    def __init__(self, a: int, p: int, max_memory: int = BabyStepGiantStep.DEFAULT_MEMORY):
+        self.a = a % p
+        self.p = p
+        self.max_memory = max_memory
+        if math.gcd(self.a, p) != 1:
+            raise ValueError("Основание не обратимо по модулю")
+
+        self._tables: Dict[int, BabyStepGiantStep] = {}
+        if not PrimeGenerator.is_probable_prime(p):
+            self.factors = None
+            self.order = p - 1
+            self.method = 'bsgs'
+            return
+
+        # Порядок a: из p - 1 убираются простые множители, пока a^(n/q) = 1
+        self.order = p - 1
+        self.factors = Factorizer.factorize(p - 1)
+        for q, e in list(self.factors.items()):
+            while e and pow(self.a, self.order // q, p) == 1:
+                self.order //= q
+                e -= 1
+            if e:
+                self.factors[q] = e
+            else:
+                del self.factors[q]
+
+        if max(self.factors, default=1) > self.RHO_THRESHOLD:
+            self.method = 'rho'
+        elif len(self.factors) > 1:
+            self.method = 'pohlig-hellman'
+        else:
+            self.method = 'bsgs'
+
+    def solve(self, y: int) -> Optional[int]:
+        """Наименьший x >= 0 с a^x = y (mod p) или None, если y не лежит в подгруппе a"""
+        y %= self.p
+        if y == 0:
+            return None
+        if self.factors is None:
+            return self._table(self.a, self.order).solve(y)
+        if pow(y, self.order, self.p) != 1:
+            return None
+
+        residues, moduli = [], []
+        for q, e in self.factors.items():
+            x = self._solve_prime_power(y, q, e)
+            if x is None:
+                return None
+            residues.append(x)
+            moduli.append(q ** e)
+        return CryptoUtils.crt(residues, moduli) if residues else 0
+
+    def solve_many(self, values: List[int]) -> List[Optional[int]]:
+        """Логарифмы для многих y: разложение и таблицы подгрупп общие"""
+        return _solve_each(self.solve, values, self.p)
+
+    def _table(self, g: int, order: int, queries: int = 1) -> BabyStepGiantStep:
+        """Таблица шагов младенца для основания g (кешируется по основанию)"""
+        table = self._tables.get(g)
+        if table is None:
+            table = BabyStepGiantStep(g, self.p, order, self.max_memory, queries)
+            self._tables[g] = table
+        return table
+
+    def _solve_prime_power(self, y: int, q: int, e: int) -> Optional[int]:
+        """x mod q^e: e подзадач в подгруппе порядка q (цифры x в системе по основанию q)"""
+        p = self.p
+        cofactor = self.order // q ** e
+        g = pow(self.a, cofactor, p)
+        h = pow(y, cofactor, p)
+        gamma = pow(g, q ** (e - 1), p)
+        g_inv = pow(g, -1, p)
+
+        x = 0
+        for k in range(e):
+            h_k = pow(pow(g_inv, x, p) * h % p, q ** (e - 1 - k), p)
+            if q > self.RHO_THRESHOLD:
+                digit = self.pollard_rho(gamma, h_k, p, q)
+            else:
+                digit = self._table(gamma, q, e).solve(h_k)
+            if digit is None:
+                return None
+            x += digit * q ** k
+        return x
+
+    @staticmethod
+    def pollard_rho(g: int, h: int, p: int, q: int, attempts: int = 16) -> Optional[int]:
+        """Логарифм h по основанию g порядка q (q простое) ро-методом Полларда
+
+        Случайное блуждание с RHO_PARTITIONS множителями g^u * h^v (Теске),
+        цикл ищется методом Брента - память не зависит от q.
+        """
+        h %= p
+        if h == 1:
+            return 0
+
+        rng = get_rng()
+        r = DiscreteLog.RHO_PARTITIONS
+        for _ in range(attempts):
+            steps = [(rng.randrange(q), rng.randrange(q)) for _ in range(r)]
+            multipliers = [pow(g, u, p) * pow(h, v, p) % p for u, v in steps]
+
+            u, v = rng.randrange(q), rng.randrange(q)
+            x = pow(g, u, p) * pow(h, v, p) % p
+            saved_x, saved_u, saved_v = x, u, v
+            power = length = 1
+
+            while True:
+                i = x % r
+                x = x * multipliers[i] % p
+                du, dv = steps[i]
+                u = (u + du) % q
+                v = (v + dv) % q
+                if x == saved_x:
+                    break
+                if length == power:
+                    saved_x, saved_u, saved_v = x, u, v
+                    power *= 2
+                    length = 0
+                length += 1
+
+            # g^u h^v = g^saved_u h^saved_v  =>  (v - saved_v) * log h = saved_u - u (mod q)
+            denominator = (v - saved_v) % q
+            if denominator == 0:
+                continue
+            result = (saved_u - u) * pow(denominator, -1, q) % q
+            if pow(g, result, p) == h:
+                return result
+        return None
+
+
+STREAM_CHUNK_SIZE = 1 << 16
+SHARD_BLOCKS = 256
+VERNAM_CHUNK_SIZE = 1 << 20
+HASH_CHUNK_SIZE = 1 << 20
+
+# Данные для хеширования: bytes, путь к файлу, файловый объект или итератор порций
+HashSource = Union[bytes, bytearray, memoryview, str, os.PathLike, Iterable[bytes]]
+
+
+class StreamHasher:
+    """Инкрементальное хеширование: hashlib получает данные порциями постоянного размера
+
+    Источник - bytes, путь к файлу, файловый объект или итератор порций.
+    Файлы и итераторы читаются в фоновом потоке с очередью из prefetch
+    порций: hashlib отпускает GIL, поэтому чтение следующей порции идет
+    параллельно хешированию текущей, а память не зависит от размера файла.
+    """
+
+    def __init__(self, algorithm: str = 'sha256', chunk_size: int = HASH_CHUNK_SIZE, prefetch: int = 2):
+        self.algorithm = algorithm
+        self.chunk_size = chunk_size
+        self.prefetch = prefetch
+
+    def hash(self, source: HashSource):
+        """Объект hashlib, заполненный всеми данными источника"""
+        hash_obj = hashlib.new(self.algorithm)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            hash_obj.update(source)
+            return hash_obj
+        for chunk in self._prefetched(self.iter_chunks(source, self.chunk_size)):
+            hash_obj.update(chunk)
+        return hash_obj
+
+    def digest(self, source: HashSource) -> bytes:
+        return self.hash(source).digest()
+
+    @staticmethod
+    def iter_chunks(source: HashSource, chunk_size: int = HASH_CHUNK_SIZE) -> Iterator[bytes]:
+        """Порции источника: bytes, путь к файлу, файловый объект или итератор порций"""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            yield source
+        elif isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                yield from StreamHasher.iter_chunks(f, chunk_size)
+        elif hasattr(source, 'read'):
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        else:
+            yield from source
+
+    def _prefetched(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Порции, читаемые фоновым потоком не более чем на prefetch вперед"""
+        if self.prefetch <= 0:
+            yield from chunks
+            return
+
+        buffer = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        end = object()
+
+        def reader():
+            try:
+                for chunk in chunks:
+                    if stop.is_set():
+                        return
+                    buffer.put(chunk)
+                buffer.put(end)
+            except BaseException as e:
+                buffer.put(e)
+
+        thread = threading.Thread(target=reader, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is end:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Потребитель мог остановиться раньше: освобождаем очередь, чтобы поток завершился
+            stop.set()
+            while thread.is_alive():
+                try:
+                    buffer.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+
+
+class ProgressTracker:
+    """Счетчик прогресса длительной операции: вызывает progress(done, total) после каждой порции"""
+
+    def __init__(self, progress: Optional[Callable[[int, int], None]], total: int):
+        self.progress = progress
+        self.total = total
+        self.done = 0
+
+    def advance(self, amount: int):
+        self.done += amount
+        if self.progress is not None:
+            self.progress(min(self.done, self.total), self.total)
+
+
+class FileResult(NamedTuple):
+    """Результат шифрования или дешифрования файла"""
+    input_file: str
+    output_file: str
+    input_size: int
+    output_size: int
+    block_size: int
+    num_blocks: int
+    file_format: str
+    elapsed: float
 
 
 class CryptoUtils:
     """Утилиты для криптографических операций"""
 
+    # Таблицы степеней кешируются по LRU: при переполнении вытесняется давно не использованная
+    FIXED_BASE_CACHE_SIZE = 64
+    _fixed_base_cache: 'OrderedDict[Tuple[int, int, Optional[int]], FixedBaseExp]' = OrderedDict()
+    _joint_base_cache: 'OrderedDict[Tuple[int, int, int, int], JointFixedBaseExp]' = OrderedDict()
+    _table_cache_lock = threading.Lock()
+
+    # 'python' - учебный алгоритм ниже, 'builtin' - встроенный pow, 'gmpy2' - gmpy2.powmod
+    MOD_EXP_BACKEND = 'python'
+
+    @staticmethod
+    def set_mod_exp_backend(backend: str):
+        """Выбор реализации mod_exp: 'python', 'builtin' или 'gmpy2'"""
+        if backend not in ('python', 'builtin', 'gmpy2'):
+            raise ValueError(f"Неизвестная реализация mod_exp: {backend}")
+        if backend == 'gmpy2' and gmpy2 is None:
+            raise ValueError("Модуль gmpy2 не установлен")
+        CryptoUtils.MOD_EXP_BACKEND = backend
+
     @staticmethod
     def mod_exp(a: int, x: int, p: int) -> int:
         """Быстрое возведение в степень по модулю"""
+        if CryptoUtils.MOD_EXP_BACKEND == 'builtin':
+            return pow(a, x, p)
+        if CryptoUtils.MOD_EXP_BACKEND == 'gmpy2':
+            return int(gmpy2.powmod(a, x, p))
+
         y = 1
         s = a % p
         while x > 0:
@@ -19,6 +1151,46 @@ class CryptoUtils:
             x >>= 1
         return y
 
+    @staticmethod
+    def _cached_table(cache: OrderedDict, key: tuple, build: Callable[[], object]):
+        """Таблица из LRU-кеша cache по ключу key; при промахе строится вызовом build()"""
+        with CryptoUtils._table_cache_lock:
+            table = cache.get(key)
+            if table is not None:
+                cache.move_to_end(key)
+                return table
+
+        table = build()
+        with CryptoUtils._table_cache_lock:
+            cache[key] = table
+            cache.move_to_end(key)
+            while len(cache) > CryptoUtils.FIXED_BASE_CACHE_SIZE:
+                cache.popitem(last=False)
+        return table
+
+    @staticmethod
+    def fixed_base(base: int, modulus: int, order: Optional[int] = None) -> FixedBaseExp:
+        """Таблица степеней для основания base (кешируется по (base, modulus, order))
+
+        Построение таблицы окупается только для основания, возводимого во многие
+        степени; для одного-двух возведений достаточно mod_exp.
+        """
+        key = (base % modulus, modulus, order)
+        return CryptoUtils._cached_table(CryptoUtils._fixed_base_cache, key,
+                                         lambda: FixedBaseExp(base, modulus, order))
+
+    @staticmethod
+    def joint_fixed_base(g: int, h: int, modulus: int, max_bits: int, count: int = 1) -> JointFixedBaseExp:
+        """Таблица пар степеней (g, h) для count возведений (кешируется по (g, h, modulus, max_bits))
+
+        Окно выбирается по count при первом построении; повторные пакеты
+        того же ключа используют готовую таблицу.
+        """
+        key = (g % modulus, h % modulus, modulus, max_bits)
+        return CryptoUtils._cached_table(
+            CryptoUtils._joint_base_cache, key,
+            lambda: JointFixedBaseExp(g, h, modulus, max_bits, JointFixedBaseExp.best_window(max_bits, count)))
+
     @staticmethod
     def test_ferma(p: int, k: int = 5) -> bool:
         """Тест Ферма на простоту"""
@@ -27,8 +1199,9 @@ class CryptoUtils:
         if p % 2 == 0 or p < 2:
             return False
 
+        rng = get_rng()
         for _ in range(k):
-            a = random.randint(1, p - 1)
+            a = rng.randint(1, p - 1)
             if CryptoUtils.mod_exp(a, p - 1, p) != 1:
                 return False
         return True
@@ -54,55 +1227,134 @@ class CryptoUtils:
             raise ValueError(f"Обратный элемент не существует для a={a}, m={m}")
         return x % m
 
+    @staticmethod
+    def batch_inverse(values: List[int], m: int) -> List[int]:
+        """Обратные элементы списка по модулю m: одно обращение и 3(n-1) умножений (прием Монтгомери)"""
+        prefix = []
+        acc = 1
+        for v in values:
+            prefix.append(acc)
+            acc = acc * v % m
+
+        inv = CryptoUtils.mod_inverse(acc, m)
+        result = [0] * len(values)
+        for i in range(len(values) - 1, -1, -1):
+            result[i] = inv * prefix[i] % m
+            inv = inv * values[i] % m
+        return result
+
+    @staticmethod
+    def crt(residues: List[int], moduli: List[int]) -> int:
+        """Китайская теорема об остатках для попарно взаимно простых модулей"""
+        x, modulus = 0, 1
+        for r, m in zip(residues, moduli):
+            x += modulus * ((r - x) * CryptoUtils.mod_inverse(modulus, m) % m)
+            modulus *= m
+        return x % modulus
+
+    @staticmethod
+    def is_probable_prime(n: int, k: int = 10) -> bool:
+        """Вероятностная проверка на простоту (Миллер-Рабин)"""
+        return PrimeGenerator.is_probable_prime(n, k)
+
     @staticmethod
     def generate_prime(lower: int = 100, upper: int = 1000, k: int = 5) -> int:
         """Генерация простого числа в заданном диапазоне"""
-        while True:
-            candidate = random.randint(lower, upper)
-            if CryptoUtils.test_ferma(candidate, k):
-                return candidate
+        return PrimeGenerator.generate_in_range(lower, upper, k)
+
+    @staticmethod
+    def generate_safe_prime(lower: int, upper: int, k: int = 10) -> int:
+        """Генерация безопасного простого p = 2q + 1 в заданном диапазоне"""
+        return PrimeGenerator.generate_safe(lower, upper, k)
 
     @staticmethod
     def generate_large_prime(lower: int = 10 ** 8, upper: int = 10 ** 9, k: int = 10) -> int:
         """Генерация большого простого числа"""
+        return PrimeGenerator.generate_in_range(lower, upper, k)
+
+    @staticmethod
+    def generate_prime_bits(bits: int, k: int = 10) -> int:
+        """Генерация простого числа заданной битовой длины"""
+        return PrimeGenerator.generate(bits, k)
+
+    @staticmethod
+    def generate_group(lower: int = 10 ** 8, upper: int = 10 ** 9) -> Tuple[int, int]:
+        """Безопасное простое p = 2q + 1 из [lower, upper] и примитивный корень g по модулю p"""
+        p = CryptoUtils.generate_safe_prime(lower, upper)
+        return p, CryptoUtils.find_primitive_root(p, (2, (p - 1) // 2))
+
+    @staticmethod
+    def generate_primes_parallel(bits: int, count: int = 2, workers: Optional[int] = None,
+                                 k: int = 10) -> List[int]:
+        """Параллельная генерация нескольких различных простых чисел заданной длины"""
+        return PrimeGenerator.generate_parallel(bits, count, workers, k)
+
+    @staticmethod
+    def generate_dsa_group(L: int, N: int, k: int = 10) -> Tuple[int, int, int]:
+        """Генерация группы (p, q, g): p - L бит, q - N бит, q | p-1, g порядка q"""
+        if N >= L:
+            raise ValueError(f"Длина q ({N} бит) должна быть меньше длины p ({L} бит)")
+
+        q = PrimeGenerator.generate(N, k)
+        p_lower = 1 << (L - 1)
+        p_upper = (1 << L) - 1
+
         while True:
-            candidate = random.randint(lower, upper)
-            if CryptoUtils.test_ferma(candidate, k):
-                return candidate
+            m = get_rng().randint(p_lower // q, p_upper // q)
+            p = m * q + 1
+            if p_lower <= p <= p_upper and PrimeGenerator.is_probable_prime(p, k):
+                break
+
+        while True:
+            h = get_rng().randint(2, p - 2)
+            g = pow(h, (p - 1) // q, p)
+            if g > 1:
+                return p, q, g
+
+    @staticmethod
+    def factorize(n: int) -> Dict[int, int]:
+        """Каноническое разложение числа на простые множители"""
+        return Factorizer.factorize(n)
 
     @staticmethod
     def prime_factors(n: int) -> Set[int]:
         """Разложение числа на простые множители"""
-        factors: Set[int] = set()
-        d = 2
-        while d * d <= n:
-            while n % d == 0:
-                factors.add(d)
-                n //= d
-            d += 1
-        if n > 1:
-            factors.add(n)
-        return factors
+        return set(Factorizer.factorize(n))
+
+    @staticmethod
+    def is_primitive_root(g: int, p: int) -> bool:
+        """Проверка, что g - примитивный корень по простому модулю p"""
+        if not 0 < g < p:
+            return False
+        phi = p - 1
+        return all(pow(g, phi // factor, p) != 1 for factor in CryptoUtils.prime_factors(phi))
 
     @staticmethod
-    def find_primitive_root(p: int) -> int:
-        """Поиск примитивного корня по модулю p"""
+    def find_primitive_root(p: int, factors: Optional[Iterable[int]] = None) -> int:
+        """Поиск примитивного корня по модулю p
+
+        factors - простые делители p - 1, если известны (для безопасного
+        простого это 2 и (p - 1) / 2); иначе p - 1 раскладывается, и для
+        p - 1 с двумя большими простыми множителями возможна ValueError.
+        """
         if p == 2:
             return 1
+        if not CryptoUtils.is_probable_prime(p, 20):
+            raise ValueError(f"Модуль p={p} не является простым, примитивный корень не определен")
 
         phi = p - 1
-        factors = CryptoUtils.prime_factors(phi)
+        factors = set(factors) if factors is not None else CryptoUtils.prime_factors(phi)
 
-        for g in range(2, min(p, 10000)):
-            if all(CryptoUtils.mod_exp(g, phi // factor, p) != 1 for factor in factors):
-                return g
-        return 2
+        g = 2
+        while not all(pow(g, phi // factor, p) != 1 for factor in factors):
+            g += 1
+        return g
 
     @staticmethod
     def generate_coprime(phi: int) -> int:
         """Генерация числа, взаимно простого с phi"""
         while True:
-            candidate = random.randint(2, phi - 1)
+            candidate = get_rng().randint(2, phi - 1)
             if math.gcd(candidate, phi) == 1:
                 return candidate
 
@@ -113,124 +1365,628 @@ class CryptoUtils:
         block_size_bytes = max(1, block_size_bits // 8)
         return block_size_bytes
 
+    @staticmethod
+    def count_blocks(input_file: str, block_size: int) -> int:
+        """Количество блоков размера block_size в файле (последний дополняется нулями)"""
+        return (os.path.getsize(input_file) + block_size - 1) // block_size
 
-class RSACrypto:
-    """Класс для работы с RSA шифрованием"""
+    @staticmethod
+    def iter_blocks(f, block_size: int, chunk_size: int = STREAM_CHUNK_SIZE):
+        """Потоковое чтение файла блоками block_size, порциями около chunk_size байт"""
+        chunk_size = max(block_size, chunk_size - chunk_size % block_size)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            for i in range(0, len(chunk), block_size):
+                block = chunk[i:i + block_size]
+                if len(block) < block_size:
+                    block = block.ljust(block_size, b'\x00')
+                yield block
 
-    def __init__(self):
-        self.utils = CryptoUtils()
+    @staticmethod
+    def read_record(f) -> int:
+        """Чтение числа, записанного с 2-байтовым префиксом длины"""
+        length = int.from_bytes(f.read(2), 'big')
+        return int.from_bytes(f.read(length), 'big')
 
-    def generate_keys(self, mode: int = 1) -> Tuple[Tuple[int, int], Tuple[int, int, int, int]]:
-        """Генерация ключей для RSA"""
-        print("\n=== Генерация ключей RSA ===")
+    @staticmethod
+    def iter_records(f, num_blocks: int, fields: int = 1):
+        """Потоковое чтение num_blocks записей (по fields чисел в каждой)"""
+        for _ in range(num_blocks):
+            if fields == 1:
+                yield CryptoUtils.read_record(f)
+            else:
+                yield tuple(CryptoUtils.read_record(f) for _ in range(fields))
 
-        if mode == 1:
-            p = int(input("Введите простое число p: "))
-            q = int(input("Введите простое число q: "))
-            d = int(input("Введите секретный ключ d: "))
+    @staticmethod
+    def pack_record(value: int, byte_size: int, prefix: bool = True) -> bytes:
+        """Число фиксированной длины (по умолчанию с 2-байтовым префиксом длины)"""
+        if not prefix:
+            return value.to_bytes(byte_size, 'big')
+        return byte_size.to_bytes(2, 'big') + value.to_bytes(byte_size, 'big')
 
-            if not self.utils.test_ferma(p):
-                raise ValueError(f"Число p={p} не является простым!")
-            if not self.utils.test_ferma(q):
-                raise ValueError(f"Число q={q} не является простым!")
+    @staticmethod
+    def iter_shards(items, shard_size: int = SHARD_BLOCKS):
+        """Разбиение потока блоков на порции по shard_size"""
+        iterator = iter(items)
+        while True:
+            shard = list(itertools.islice(iterator, shard_size))
+            if not shard:
+                return
+            yield shard
 
-        elif mode == 2:
-            print("Генерация простых чисел p и q...")
-            p = self.utils.generate_large_prime()
-            q = self.utils.generate_large_prime()
-            while q == p:
-                q = self.utils.generate_large_prime()
+    @staticmethod
+    def map_shards(func, shards, args: tuple, workers: int = 1, tracker: Optional[ProgressTracker] = None):
+        """func(shard, *args) для каждой порции: последовательно или в пуле процессов, с сохранением порядка
+
+        tracker (если задан) продвигается на число элементов каждой обработанной порции.
+        """
+        if workers <= 1:
+            for shard in shards:
+                result = func(shard, *args)
+                if tracker is not None:
+                    tracker.advance(len(shard))
+                yield result
+            return
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(CryptoUtils.MOD_EXP_BACKEND, get_rng())) as pool:
+            # Не больше 2*workers порций в работе - память не растет с размером файла
+            pending = deque()
+
+            def finish():
+                future, size = pending.popleft()
+                result = future.result()
+                if tracker is not None:
+                    tracker.advance(size)
+                return result
+
+            for shard in shards:
+                pending.append((pool.submit(func, shard, *args), len(shard)))
+                if len(pending) >= 2 * workers:
+                    yield finish()
+            while pending:
+                yield finish()
 
-            print(f"Сгенерированные простые числа:")
-            print(f"p = {p}")
-            print(f"q = {q}")
+    @staticmethod
+    def map_batch(func, values: list, args: tuple, workers: int = 1) -> 'BatchResult':
+        """Пакетная операция func(values, *args) -> list: повторяющиеся значения вычисляются один раз"""
+        start = time.perf_counter()
+        unique = list(dict.fromkeys(values))
+        results = []
+        for shard_results in CryptoUtils.map_shards(func, CryptoUtils.iter_shards(unique), args, workers):
+            results.extend(shard_results)
+        table = dict(zip(unique, results))
+        return BatchResult([table[value] for value in values], len(unique), time.perf_counter() - start)
+
+
+def init_worker(mod_exp_backend: str, rng: Optional[random.Random] = None):
+    """Инициализация процесса пула: реализация mod_exp родителя и свой поток ГСЧ
+
+    Передается как initializer в ProcessPoolExecutor с
+    initargs=(CryptoUtils.MOD_EXP_BACKEND, get_rng()).
+
+    Поток процесса выводится из ГСЧ родителя и номера процесса, поэтому
+    процессы пула не повторяют одноразовые числа друг друга.
+    """
+    CryptoUtils.MOD_EXP_BACKEND = mod_exp_backend
+    set_rng((rng or get_rng()).spawn(os.getpid()))
+
+
+class ZeroTrimmingWriter:
+    """Потоковая запись с отбрасыванием нулевых байт в конце всего потока (аналог rstrip)"""
+
+    def __init__(self, f):
+        self.f = f
+        self.pending_zeros = 0
+        self.written = 0
+
+    def write(self, data: bytes):
+        stripped = data.rstrip(b'\x00')
+        if stripped:
+            if self.pending_zeros:
+                self.f.write(bytes(self.pending_zeros))
+                self.written += self.pending_zeros
+                self.pending_zeros = 0
+            self.f.write(stripped)
+            self.written += len(stripped)
+        self.pending_zeros += len(data) - len(stripped)
+
+
+class ContainerHeader(NamedTuple):
+    """Заголовок контейнера шифртекста"""
+    version: int
+    cipher_id: int
+    flags: int
+    block_size: int
+    plain_size: int
+    record_size: int
+    chunk_blocks: int
+    num_blocks: int
+
+
+class CipherContainer:
+    """Контейнер шифртекста: заголовок, записи фиксированной длины порциями с CRC32
+
+    Формат (big-endian): заголовок HEADER, затем порции по chunk_blocks записей
+    record_size байт, после каждой порции - CRC32 ее записей (4 байта).
+    Длина всех порций, кроме последней, одинакова, поэтому смещение блока
+    вычисляется по номеру и отдельный индекс смещений не нужен.
+    """
+
+    MAGIC = b'CLIB'
+    VERSION = 1
+    HEADER = struct.Struct('>4sBBBxQQIIQ')
+    CRC_SIZE = 4
+
+    CIPHER_RSA = 1
+    CIPHER_ELGAMAL = 2
+    CIPHER_SHAMIR = 3
 
-            phi = (p - 1) * (q - 1)
-            d = self.utils.generate_coprime(phi)
-            print(f"d = {d}")
+    @staticmethod
+    def is_container(input_file: str) -> bool:
+        """Проверка, записан ли файл в формате контейнера"""
+        with open(input_file, 'rb') as f:
+            return f.read(len(CipherContainer.MAGIC)) == CipherContainer.MAGIC
 
-        else:
-            raise ValueError("Неверный режим")
+    @staticmethod
+    def read_header(f) -> ContainerHeader:
+        raw = f.read(CipherContainer.HEADER.size)
+        if len(raw) != CipherContainer.HEADER.size:
+            raise ValueError("Файл слишком короткий для заголовка контейнера")
+        magic, *fields = CipherContainer.HEADER.unpack(raw)
+        if magic != CipherContainer.MAGIC:
+            raise ValueError("Файл не является контейнером шифртекста")
+        header = ContainerHeader(*fields)
+        if header.version != CipherContainer.VERSION:
+            raise ValueError(f"Неподдерживаемая версия контейнера: {header.version}")
+        return header
 
-        n = p * q
-        phi = (p - 1) * (q - 1)
-        c = self.utils.mod_inverse(d, phi)
+    @staticmethod
+    def chunk_offset(header: ContainerHeader, chunk_index: int) -> int:
+        """Смещение порции в файле"""
+        chunk_bytes = header.chunk_blocks * header.record_size + CipherContainer.CRC_SIZE
+        return CipherContainer.HEADER.size + chunk_index * chunk_bytes
 
-        print(f"\nВычисленные параметры:")
-        print(f"n = p * q = {p} * {q} = {n}")
-        print(f"φ(n) = (p-1)*(q-1) = {phi}")
-        print(f"c = d^(-1) mod φ(n) = {c}")
+    @staticmethod
+    def write(f_out, cipher_id: int, block_size: int, plain_size: int, record_size: int,
+              chunks, chunk_blocks: int = SHARD_BLOCKS):
+        """Запись заголовка и порций записей (chunks - последовательность bytes по chunk_blocks записей)"""
+        num_blocks = (plain_size + block_size - 1) // block_size
+        f_out.write(CipherContainer.HEADER.pack(CipherContainer.MAGIC, CipherContainer.VERSION, cipher_id, 0,
+                                                block_size, plain_size, record_size, chunk_blocks, num_blocks))
+        for chunk in chunks:
+            f_out.write(chunk)
+            f_out.write(zlib.crc32(chunk).to_bytes(CipherContainer.CRC_SIZE, 'big'))
 
-        public_key = (n, c)
-        private_key = (n, d, p, q)
+    @staticmethod
+    def iter_chunks(f, header: ContainerHeader, first_chunk: int = 0, last_chunk: Optional[int] = None):
+        """Чтение порций [first_chunk, last_chunk] с проверкой CRC; выдает списки записей"""
+        total_chunks = (header.num_blocks + header.chunk_blocks - 1) // header.chunk_blocks
+        if last_chunk is None or last_chunk >= total_chunks:
+            last_chunk = total_chunks - 1
+
+        f.seek(CipherContainer.chunk_offset(header, first_chunk))
+        for chunk_index in range(first_chunk, last_chunk + 1):
+            count = min(header.chunk_blocks, header.num_blocks - chunk_index * header.chunk_blocks)
+            chunk = f.read(count * header.record_size)
+            crc = int.from_bytes(f.read(CipherContainer.CRC_SIZE), 'big')
+            if len(chunk) != count * header.record_size or zlib.crc32(chunk) != crc:
+                raise ValueError(f"Порция {chunk_index} контейнера повреждена (ошибка CRC)")
+            yield [chunk[i:i + header.record_size] for i in range(0, len(chunk), header.record_size)]
 
-        return public_key, private_key
+    @staticmethod
+    def parse_records(records: List[bytes], fields: int) -> list:
+        """Разбор записей фиксированной длины на числа (fields чисел в записи)"""
+        if fields == 1:
+            return [int.from_bytes(record, 'big') for record in records]
+        size = len(records[0]) // fields if records else 0
+        return [tuple(int.from_bytes(record[i * size:(i + 1) * size], 'big') for i in range(fields))
+                for record in records]
 
-    def encrypt_file(self, public_key: Tuple[int, int], input_file: str, output_file: str):
-        """Шифрование файла с помощью RSA"""
-        n, c = public_key
-        block_size = self.utils.calculate_block_size(n)
+    @staticmethod
+    def encrypt(input_file: str, output_file: str, cipher_id: int, block_size: int, byte_size: int,
+                fields: int, encrypt_shard, key_args: tuple, workers: int = 1,
+                tracker: Optional[ProgressTracker] = None):
+        """Шифрование файла в контейнер: encrypt_shard(blocks, *key_args, byte_size, prefix)"""
+        plain_size = os.path.getsize(input_file)
+        with open(input_file, 'rb') as f_in, open(output_file, 'wb') as f_out:
+            shards = CryptoUtils.iter_shards(CryptoUtils.iter_blocks(f_in, block_size))
+            chunks = CryptoUtils.map_shards(encrypt_shard, shards, key_args + (byte_size, False), workers, tracker)
+            CipherContainer.write(f_out, cipher_id, block_size, plain_size, fields * byte_size, chunks)
+        return plain_size
 
-        print(f"Размер блока: {block_size} байт")
+    @staticmethod
+    def decrypt(input_file: str, output_file: str, fields: int, decrypt_shard, key, workers: int = 1,
+                progress: Optional[Callable[[int, int], None]] = None) -> ContainerHeader:
+        """Дешифрование контейнера целиком; возвращает его заголовок"""
+        with open(input_file, 'rb') as f_in, open(output_file, 'wb') as f_out:
+            header = CipherContainer.read_header(f_in)
+            shards = (CipherContainer.parse_records(records, fields)
+                      for records in CipherContainer.iter_chunks(f_in, header))
+            tracker = ProgressTracker(progress, header.num_blocks)
+            remaining = header.plain_size
+            for data in CryptoUtils.map_shards(decrypt_shard, shards, (key, header.block_size), workers, tracker):
+                f_out.write(data[:remaining])
+                remaining -= min(len(data), remaining)
+        return header
 
+    @staticmethod
+    def decrypt_range(input_file: str, offset: int, length: int, fields: int, decrypt_shard, key) -> bytes:
+        """Дешифрование только тех порций, которые покрывают байты [offset, offset + length)"""
+        with open(input_file, 'rb') as f_in:
+            if offset < 0 or length < 0:
+                raise ValueError("Смещение и длина должны быть неотрицательными")
+            header = CipherContainer.read_header(f_in)
+            end = min(offset + length, header.plain_size)
+            if offset >= end:
+                return b''
+
+            chunk_bytes = header.chunk_blocks * header.block_size
+            first_chunk = offset // chunk_bytes
+            last_chunk = (end - 1) // chunk_bytes
+
+            data = bytearray()
+            for records in CipherContainer.iter_chunks(f_in, header, first_chunk, last_chunk):
+                data += decrypt_shard(CipherContainer.parse_records(records, fields), key, header.block_size)
+
+        start = offset - first_chunk * chunk_bytes
+        return bytes(data[start:start + end - offset])
+
+
+class HashKeystream:
+    """Ключевой поток SHAKE-256 в режиме счетчика: порция i = SHAKE256(key || nonce || i)
+
+    Поток не хранится целиком: любой фрагмент вычисляется по смещению,
+    поддерживается срез stream[i:j], как у bytes.
+    """
+
+    def __init__(self, key: bytes, nonce: bytes = b'', chunk_size: int = VERNAM_CHUNK_SIZE):
+        self.key = bytes(key)
+        self.nonce = bytes(nonce)
+        self.chunk_size = chunk_size
+        self._cached_index = -1
+        self._cached_chunk = b''
+
+    def chunk(self, index: int) -> bytes:
+        """Порция ключевого потока с номером index"""
+        if index != self._cached_index:
+            counter = index.to_bytes(8, 'big')
+            self._cached_chunk = hashlib.shake_256(self.key + self.nonce + counter).digest(self.chunk_size)
+            self._cached_index = index
+        return self._cached_chunk
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Фрагмент ключевого потока [offset, offset + length)"""
+        if offset < 0 or length < 0:
+            raise ValueError("Смещение и длина должны быть неотрицательными")
+
+        parts = []
+        end = offset + length
+        while offset < end:
+            index, start = divmod(offset, self.chunk_size)
+            stop = min(self.chunk_size, start + end - offset)
+            parts.append(self.chunk(index)[start:stop])
+            offset += stop - start
+        return b''.join(parts)
+
+    def __getitem__(self, item: slice) -> bytes:
+        if not isinstance(item, slice) or item.step not in (None, 1):
+            raise TypeError("Ключевой поток поддерживает только срезы с шагом 1")
+        start = item.start or 0
+        if item.stop is None:
+            raise TypeError("Ключевой поток бесконечен: конец среза обязателен")
+        return self.read(start, max(0, item.stop - start))
+
+
+class HybridContainer:
+    """Гибридное шифрование: сеансовый ключ шифруется асимметрично, данные - потоком HashKeystream
+
+    Формат (big-endian): заголовок HEADER, затем сеансовый ключ, зашифрованный
+    выбранным шифром (записи record_size байт без префикса), затем данные,
+    сложенные по XOR с ключевым потоком. Асимметричная операция выполняется
+    только над SESSION_KEY_SIZE байтами, независимо от размера файла.
+    """
+
+    MAGIC = b'CLHY'
+    VERSION = 1
+    HEADER = struct.Struct('>4sBBxxIIQ')
+    SESSION_KEY_SIZE = 32
+
+    @staticmethod
+    def is_hybrid(input_file: str) -> bool:
+        """Проверка, записан ли файл в гибридном формате"""
         with open(input_file, 'rb') as f:
-            data = f.read()
+            return f.read(len(HybridContainer.MAGIC)) == HybridContainer.MAGIC
 
-        encrypted_blocks = []
+    @staticmethod
+    def encrypt(input_file: str, output_file: str, cipher_id: int, block_size: int, byte_size: int,
+                fields: int, encrypt_shard, key_args: tuple, tracker: Optional[ProgressTracker] = None) -> int:
+        """Шифрование файла: encrypt_shard(blocks, *key_args, byte_size, prefix) для сеансового ключа"""
+        plain_size = os.path.getsize(input_file)
+        session_key = get_rng().randbytes(HybridContainer.SESSION_KEY_SIZE)
+        blocks = [session_key[i:i + block_size].ljust(block_size, b'\x00')
+                  for i in range(0, len(session_key), block_size)]
+        wrapped_key = encrypt_shard(blocks, *key_args, byte_size, False)
 
-        for i in range(0, len(data), block_size):
-            block = data[i:i + block_size]
+        with open(input_file, 'rb') as f_in, open(output_file, 'wb') as f_out:
+            f_out.write(HybridContainer.HEADER.pack(HybridContainer.MAGIC, HybridContainer.VERSION, cipher_id,
+                                                    block_size, fields * byte_size, plain_size))
+            f_out.write(wrapped_key)
+            VernamCrypto.xor_stream(f_in, f_out, HashKeystream(session_key), plain_size, tracker)
+        return plain_size
 
-            if len(block) < block_size:
-                block = block.ljust(block_size, b'\x00')
+    @staticmethod
+    def decrypt(input_file: str, output_file: str, fields: int, decrypt_shard, key,
+                progress: Optional[Callable[[int, int], None]] = None) -> Tuple[int, int]:
+        """Дешифрование файла: сеансовый ключ через decrypt_shard(records, key, block_size), затем XOR
 
-            m = int.from_bytes(block, 'big')
+        Возвращает (размер открытого текста, размер блока асимметричного шифра).
+        """
+        with open(input_file, 'rb') as f_in, open(output_file, 'wb') as f_out:
+            raw = f_in.read(HybridContainer.HEADER.size)
+            if len(raw) != HybridContainer.HEADER.size:
+                raise ValueError("Файл слишком короткий для заголовка гибридного формата")
+            magic, version, cipher_id, block_size, record_size, plain_size = HybridContainer.HEADER.unpack(raw)
+            if magic != HybridContainer.MAGIC:
+                raise ValueError("Файл не записан в гибридном формате")
+            if version != HybridContainer.VERSION:
+                raise ValueError(f"Неподдерживаемая версия гибридного формата: {version}")
+
+            num_records = (HybridContainer.SESSION_KEY_SIZE + block_size - 1) // block_size
+            wrapped_key = f_in.read(num_records * record_size)
+            records = [wrapped_key[i:i + record_size] for i in range(0, len(wrapped_key), record_size)]
+            if len(records) != num_records or len(records[-1]) != record_size:
+                raise ValueError("Зашифрованный сеансовый ключ поврежден")
+            session_key = decrypt_shard(CipherContainer.parse_records(records, fields), key, block_size)
+
+            keystream = HashKeystream(session_key[:HybridContainer.SESSION_KEY_SIZE])
+            VernamCrypto.xor_stream(f_in, f_out, keystream, plain_size, ProgressTracker(progress, plain_size))
+        return plain_size, block_size
+
+
+class BatchResult(NamedTuple):
+    """Результат пакетной операции с метриками производительности"""
+    values: list
+    unique: int
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        """Количество обработанных значений в секунду"""
+        return len(self.values) / self.elapsed if self.elapsed > 0 else float('inf')
+
+
+class BlockFileCipher:
+    """Общая обработка файлов блочными асимметричными шифрами (RSA, Эль-Гамаль, Шамир)
+
+    Форматы: исходный (заголовок и записи с префиксом длины), CipherContainer
+    и HybridContainer. Функции не печатают и не читают stdin: сообщения идут
+    в logger, прогресс - в progress(done, total).
+    """
 
-            if m >= n:
-                raise ValueError(f"Блок данных слишком большой для модуля n={n}")
+    @staticmethod
+    def encrypt(input_file: str, output_file: str, cipher_id: int, modulus: int, fields: int,
+                encrypt_shard, key_args: tuple, workers: int = 1, container: bool = False,
+                hybrid: bool = False, progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Шифрование файла: encrypt_shard(blocks, *key_args, byte_size, prefix) для каждой порции"""
+        start = time.perf_counter()
+        block_size = CryptoUtils.calculate_block_size(modulus)
+        byte_size = (modulus.bit_length() + 7) // 8
+        file_size = os.path.getsize(input_file)
+        num_blocks = CryptoUtils.count_blocks(input_file, block_size)
+        logger.info("Размер блока: %d байт", block_size)
+
+        if hybrid:
+            file_format = 'hybrid'
+            HybridContainer.encrypt(input_file, output_file, cipher_id, block_size, byte_size, fields,
+                                    encrypt_shard, key_args, ProgressTracker(progress, file_size))
+        elif container:
+            file_format = 'container'
+            CipherContainer.encrypt(input_file, output_file, cipher_id, block_size, byte_size, fields,
+                                    encrypt_shard, key_args, workers, ProgressTracker(progress, num_blocks))
+        else:
+            file_format = 'legacy'
+            with open(input_file, 'rb') as f_in, open(output_file, 'wb') as f_out:
+                f_out.write(block_size.to_bytes(4, 'big'))
+                f_out.write(num_blocks.to_bytes(8, 'big'))
+
+                shards = CryptoUtils.iter_shards(CryptoUtils.iter_blocks(f_in, block_size))
+                tracker = ProgressTracker(progress, num_blocks)
+                for records in CryptoUtils.map_shards(encrypt_shard, shards, key_args + (byte_size,),
+                                                      workers, tracker):
+                    f_out.write(records)
+
+        logger.info("Файл зашифрован (%s). Размер исходного файла: %d байт, блоков: %d",
+                    file_format, file_size, num_blocks)
+        return FileResult(input_file, output_file, file_size, os.path.getsize(output_file),
+                          block_size, num_blocks, file_format, time.perf_counter() - start)
 
-            e = self.utils.mod_exp(m, c, n)
-            encrypted_blocks.append(e)
+    @staticmethod
+    def decrypt(input_file: str, output_file: str, fields: int, decrypt_shard, key, workers: int = 1,
+                progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Дешифрование файла любого из форматов (определяется по заголовку)"""
+        start = time.perf_counter()
+        input_size = os.path.getsize(input_file)
+
+        if HybridContainer.is_hybrid(input_file):
+            file_format = 'hybrid'
+            output_size, block_size = HybridContainer.decrypt(input_file, output_file, fields, decrypt_shard, key,
+                                                              progress)
+            num_blocks = 0
+        elif CipherContainer.is_container(input_file):
+            file_format = 'container'
+            header = CipherContainer.decrypt(input_file, output_file, fields, decrypt_shard, key, workers, progress)
+            output_size, block_size, num_blocks = header.plain_size, header.block_size, header.num_blocks
+        else:
+            file_format = 'legacy'
+            with open(input_file, 'rb') as f_in, open(output_file, 'wb') as f_out:
+                block_size = int.from_bytes(f_in.read(4), 'big')
+                num_blocks = int.from_bytes(f_in.read(8), 'big')
+                writer = ZeroTrimmingWriter(f_out)
+
+                shards = CryptoUtils.iter_shards(CryptoUtils.iter_records(f_in, num_blocks, fields))
+                tracker = ProgressTracker(progress, num_blocks)
+                for data in CryptoUtils.map_shards(decrypt_shard, shards, (key, block_size), workers, tracker):
+                    writer.write(data)
+            output_size = writer.written
+
+        logger.info("Файл расшифрован (%s). Размер: %d байт", file_format, output_size)
+        return FileResult(input_file, output_file, input_size, output_size,
+                          block_size, num_blocks, file_format, time.perf_counter() - start)
+
+
+class RSAPrivateKey(NamedTuple):
+    """Закрытый ключ RSA с параметрами для дешифрования по китайской теореме об остатках"""
+    n: int
+    d: int
+    p: int
+    q: int
+    dP: int
+    dQ: int
+    qInv: int
+
+    @classmethod
+    def from_components(cls, n: int, d: int, p: int, q: int) -> 'RSAPrivateKey':
+        """Построение ключа из (n, d, p, q) с предвычислением dP, dQ, qInv"""
+        if p * q != n:
+            raise ValueError(f"p * q != n для ключа n={n}")
+        return cls(n, d, p, q, d % (p - 1), d % (q - 1), CryptoUtils.mod_inverse(q, p))
 
-        with open(output_file, 'wb') as f:
-            f.write(block_size.to_bytes(4, 'big'))
-            f.write(len(encrypted_blocks).to_bytes(8, 'big'))
 
-            for block in encrypted_blocks:
-                block_bytes = block.to_bytes((n.bit_length() + 7) // 8, 'big')
-                f.write(len(block_bytes).to_bytes(2, 'big'))
-                f.write(block_bytes)
+class RSACrypto:
+    """Класс для работы с RSA шифрованием"""
 
-        print(f"Файл зашифрован. Размер исходного файла: {len(data)} байт")
-        print(f"Количество блоков: {len(encrypted_blocks)}")
+    # Пакет уходит в пул процессов, только если его работа (число значений * бит модуля^2)
+    # не меньше порога: запуск пула ~25 мс, 5000 значений с 64-битным модулем ~0.1 с,
+    # одно дешифрование по КТО с 2048-битным модулем ~9 мс
+    PARALLEL_BATCH_WORK = 5000 * 64 ** 2
 
-    def decrypt_file(self, private_key: Tuple[int, int, int, int], input_file: str, output_file: str):
-        """Дешифрование файла с помощью RSA"""
-        n, d, p, q = private_key
+    def __init__(self):
+        self.utils = CryptoUtils()
 
-        with open(input_file, 'rb') as f:
-            block_size = int.from_bytes(f.read(4), 'big')
-            num_blocks = int.from_bytes(f.read(8), 'big')
+    def build_keys(self, p: int, q: int, d: int) -> Tuple[Tuple[int, int], RSAPrivateKey]:
+        """Ключи RSA из заданных p, q и секретного показателя d"""
+        if not self.utils.is_probable_prime(p):
+            raise ValueError(f"Число p={p} не является простым!")
+        if not self.utils.is_probable_prime(q):
+            raise ValueError(f"Число q={q} не является простым!")
 
-            encrypted_blocks = []
-            for _ in range(num_blocks):
-                block_len = int.from_bytes(f.read(2), 'big')
-                block = int.from_bytes(f.read(block_len), 'big')
-                encrypted_blocks.append(block)
+        n = p * q
+        phi = (p - 1) * (q - 1)
+        if math.gcd(d, phi) != 1:
+            raise ValueError(f"d={d} должен быть взаимно прост с φ(n)={phi}")
+        c = self.utils.mod_inverse(d, phi)
 
-        decrypted_data = bytearray()
+        public_key = (n, c)
+        private_key = RSAPrivateKey.from_components(n, d, p, q)
+        return public_key, private_key
 
-        for encrypted_block in encrypted_blocks:
-            m = self.utils.mod_exp(encrypted_block, d, n)
-            decrypted_block = m.to_bytes(block_size, 'big')
-            decrypted_data.extend(decrypted_block)
+    def generate_keys(self) -> Tuple[Tuple[int, int], RSAPrivateKey]:
+        """Генерация случайных ключей RSA"""
+        p = self.utils.generate_large_prime()
+        q = self.utils.generate_large_prime()
+        while q == p:
+            q = self.utils.generate_large_prime()
+
+        d = self.utils.generate_coprime((p - 1) * (q - 1))
+        return self.build_keys(p, q, d)
+
+    @staticmethod
+    def decrypt_block(encrypted_block: int, private_key: RSAPrivateKey) -> int:
+        """Дешифрование блока по КТО: два возведения в степень по модулям p и q"""
+        m1 = pow(encrypted_block, private_key.dP, private_key.p)
+        m2 = pow(encrypted_block, private_key.dQ, private_key.q)
+        h = (private_key.qInv * (m1 - m2)) % private_key.p
+        return m2 + h * private_key.q
+
+    @staticmethod
+    def encrypt_values(values: List[int], public_key: Tuple[int, int]) -> List[int]:
+        """Шифрование списка чисел одним ключом"""
+        n, c = public_key
+        return [pow(m % n, c, n) for m in values]
+
+    @staticmethod
+    def decrypt_values(values: List[int], private_key: RSAPrivateKey) -> List[int]:
+        """Дешифрование списка чисел одним ключом по КТО"""
+        return [RSACrypto.decrypt_block(value, private_key) for value in values]
+
+    def _run_batch(self, func, values: List[int], key, workers: int) -> BatchResult:
+        """func(values, key) в текущем процессе или, для больших пакетов, через map_batch в пуле"""
+        if workers > 1 and len(values) * key[0].bit_length() ** 2 >= self.PARALLEL_BATCH_WORK:
+            return self.utils.map_batch(func, values, (key,), workers)
+        start = time.perf_counter()
+        results = func(values, key)
+        return BatchResult(results, len(set(values)), time.perf_counter() - start)
+
+    def encrypt_batch(self, messages: List[int], public_key: Tuple[int, int], workers: int = 1) -> BatchResult:
+        """Пакетное шифрование множества коротких сообщений под одним ключом"""
+        return self._run_batch(self.encrypt_values, messages, public_key, workers)
+
+    def decrypt_batch(self, ciphertexts: List[int], private_key: Union[RSAPrivateKey, Tuple[int, int, int, int]],
+                      workers: int = 1) -> BatchResult:
+        """Пакетное дешифрование по КТО с ключом, подготовленным один раз на весь пакет"""
+        if not isinstance(private_key, RSAPrivateKey):
+            private_key = RSAPrivateKey.from_components(*private_key)
+        return self._run_batch(self.decrypt_values, ciphertexts, private_key, workers)
 
-        decrypted_data = decrypted_data.rstrip(b'\x00')
+    @staticmethod
+    def encrypt_shard(blocks: List[bytes], public_key: Tuple[int, int], byte_size: int,
+                      prefix: bool = True) -> bytes:
+        """Шифрование порции блоков в записи выходного файла"""
+        n, c = public_key
+        records = bytearray()
 
-        with open(output_file, 'wb') as f:
-            f.write(decrypted_data)
+        for block in blocks:
+            m = int.from_bytes(block, 'big')
 
-        print(f"Файл расшифрован. Размер: {len(decrypted_data)} байт")
+            if m >= n:
+                raise ValueError(f"Блок данных слишком большой для модуля n={n}")
+
+            e = CryptoUtils.mod_exp(m, c, n)
+            records += CryptoUtils.pack_record(e, byte_size, prefix)
+
+        return bytes(records)
+
+    @staticmethod
+    def decrypt_shard(encrypted_blocks: List[int], private_key: RSAPrivateKey, block_size: int) -> bytes:
+        """Дешифрование порции блоков"""
+        return b''.join(RSACrypto.decrypt_block(block, private_key).to_bytes(block_size, 'big')
+                        for block in encrypted_blocks)
+
+    def encrypt_file(self, public_key: Tuple[int, int], input_file: str, output_file: str,
+                     workers: int = 1, container: bool = False, hybrid: bool = False,
+                     progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Шифрование файла с помощью RSA (container=True - CipherContainer, hybrid=True - HybridContainer)"""
+        return BlockFileCipher.encrypt(input_file, output_file, CipherContainer.CIPHER_RSA, public_key[0], 1,
+                                       self.encrypt_shard, (public_key,), workers, container, hybrid, progress)
+
+    def decrypt_file(self, private_key: Union[RSAPrivateKey, Tuple[int, int, int, int]],
+                     input_file: str, output_file: str, workers: int = 1,
+                     progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Дешифрование файла с помощью RSA (формат определяется автоматически)"""
+        if not isinstance(private_key, RSAPrivateKey):
+            private_key = RSAPrivateKey.from_components(*private_key)
+        return BlockFileCipher.decrypt(input_file, output_file, 1, self.decrypt_shard, private_key, workers, progress)
+
+    def decrypt_range(self, private_key: Union[RSAPrivateKey, Tuple[int, int, int, int]],
+                      input_file: str, offset: int, length: int) -> bytes:
+        """Дешифрование фрагмента [offset, offset + length) контейнера без чтения остального файла"""
+        if not isinstance(private_key, RSAPrivateKey):
+            private_key = RSAPrivateKey.from_components(*private_key)
+        return CipherContainer.decrypt_range(input_file, offset, length, 1, self.decrypt_shard, private_key)
+
+
+class DHExchange(NamedTuple):
+    """Результат обмена ключами Диффи-Хеллмана"""
+    p: int
+    g: int
+    Xa: int
+    Xb: int
+    Ya: int
+    Yb: int
+    key: int
 
 
 class DiffieHellman:
@@ -239,71 +1995,26 @@ class DiffieHellman:
     def __init__(self):
         self.utils = CryptoUtils()
 
-    def key_exchange(self) -> Optional[int]:
-        """Схема Диффи-Хеллмана для обмена ключами"""
-        print("\n=== Схема Диффи-Хеллмана ===")
-
-        print("\nВыберите способ задания параметров:")
-        print("1 - Ввести все параметры вручную")
-        print("2 - Сгенерировать все параметры автоматически")
-        print("3 - Ввести p и g, сгенерировать секретные ключи")
-
-        mode = int(input("Ваш выбор: "))
-
-        if mode == 1:
-            p = int(input("Введите простое число p: "))
-            g = int(input("Введите генератор g: "))
-            Xa = int(input("Введите секретный ключ абонента A (Xa): "))
-            Xb = int(input("Введите секретный ключ абонента B (Xb): "))
-
-        elif mode == 2:
-            print("Генерация простого числа p...")
-            p = self.utils.generate_large_prime()
-            print("Поиск генератора g...")
-            g = self.utils.find_primitive_root(p)
-            Xa = random.randint(2, p - 2)
-            Xb = random.randint(2, p - 2)
-
-            print(f"Сгенерированные параметры:")
-            print(f"p = {p}")
-            print(f"g = {g}")
-            print(f"Xa = {Xa}")
-            print(f"Xb = {Xb}")
-
-        elif mode == 3:
-            p = int(input("Введите простое число p: "))
-            g = int(input("Введите генератор g: "))
-            Xa = random.randint(2, p - 2)
-            Xb = random.randint(2, p - 2)
-
-            print(f"Сгенерированные секретные ключи:")
-            print(f"Xa = {Xa}")
-            print(f"Xb = {Xb}")
+    def generate_params(self) -> Tuple[int, int]:
+        """Генерация безопасного простого p и генератора g"""
+        return self.utils.generate_group()
 
-        else:
-            print("Неверный режим")
-            return None
+    def exchange(self, p: int, g: int, Xa: Optional[int] = None, Xb: Optional[int] = None) -> DHExchange:
+        """Обмен ключами: недостающие секретные ключи Xa, Xb генерируются случайно"""
+        if Xa is None:
+            Xa = get_rng().randint(2, p - 2)
+        if Xb is None:
+            Xb = get_rng().randint(2, p - 2)
 
         Ya = self.utils.mod_exp(g, Xa, p)
         Yb = self.utils.mod_exp(g, Xb, p)
 
-        print(f"\nОткрытые ключи:")
-        print(f"Ya = g^Xa mod p = {g}^{Xa} mod {p} = {Ya}")
-        print(f"Yb = g^Xb mod p = {g}^{Xb} mod {p} = {Yb}")
-
         Kab_A = self.utils.mod_exp(Yb, Xa, p)
         Kab_B = self.utils.mod_exp(Ya, Xb, p)
+        if Kab_A != Kab_B:
+            raise ValueError("Ошибка: ключи Диффи-Хеллмана не совпадают!")
 
-        print(f"\nОбщий секретный ключ:")
-        print(f"Kab (вычисленный A) = Yb^Xa mod p = {Yb}^{Xa} mod {p} = {Kab_A}")
-        print(f"Kab (вычисленный B) = Ya^Xb mod p = {Ya}^{Xb} mod {p} = {Kab_B}")
-
-        if Kab_A == Kab_B:
-            print("✓ Ключи совпадают! Обмен успешен.")
-            return Kab_A
-        else:
-            print("✗ Ошибка: ключи не совпадают!")
-            return None
+        return DHExchange(p, g, Xa, Xb, Ya, Yb, Kab_A)
 
 
 class ElGamalCrypto:
@@ -312,113 +2023,76 @@ class ElGamalCrypto:
     def __init__(self):
         self.utils = CryptoUtils()
 
-    def generate_keys(self, mode: int = 1) -> Tuple[Tuple[int, int, int], Tuple[int, int]]:
-        """Генерация ключей для шифра Эль-Гамаля"""
-        print("\n=== Генерация ключей Эль-Гамаля ===")
-
-        if mode == 1:
-            p = int(input("Введите простое число p: "))
-            g = int(input("Введите генератор g: "))
-            C1 = int(input("Введите открытый ключ C1: "))
-            D1 = random.randint(2, p - 2)
-
-        elif mode == 2:
-            print("Генерация простого числа p...")
-            p = self.utils.generate_large_prime()
-            print("Поиск генератора g...")
-            g = self.utils.find_primitive_root(p)
-            D1 = random.randint(2, p - 2)
-            C1 = self.utils.mod_exp(g, D1, p)
-
-            print(f"Сгенерированные параметры:")
-            print(f"p = {p}")
-            print(f"g = {g}")
-            print(f"C1 = {C1}")
-            print(f"D1 = {D1}")
-
-        else:
-            raise ValueError("Неверный режим")
+    def build_keys(self, p: int, g: int, D1: int) -> Tuple[Tuple[int, int, int], Tuple[int, int]]:
+        """Ключи Эль-Гамаля из параметров (p, g) и секретного ключа D1"""
+        if not 1 < D1 < p - 1:
+            raise ValueError(f"Секретный ключ D1 должен быть в диапазоне (1, {p - 1})")
+        C1 = self.utils.mod_exp(g, D1, p)
 
         public_key = (p, g, C1)
         private_key = (p, D1)
         return public_key, private_key
 
-    def encrypt_file(self, public_key: Tuple[int, int, int], input_file: str, output_file: str):
-        """Шифрование файла с помощью Эль-Гамаля"""
-        p, g, C1 = public_key
-        block_size = self.utils.calculate_block_size(p)
-
-        print(f"Размер блока: {block_size} байт")
-
-        with open(input_file, 'rb') as f:
-            data = f.read()
-
-        encrypted_blocks = []
+    def generate_keys(self) -> Tuple[Tuple[int, int, int], Tuple[int, int]]:
+        """Генерация случайных ключей для шифра Эль-Гамаля"""
+        p, g = self.utils.generate_group()
+        return self.build_keys(p, g, get_rng().randint(2, p - 2))
 
-        for i in range(0, len(data), block_size):
-            block = data[i:i + block_size]
-
-            if len(block) < block_size:
-                block = block.ljust(block_size, b'\x00')
+    @staticmethod
+    def encrypt_shard(blocks: List[bytes], public_key: Tuple[int, int, int], byte_size: int,
+                      prefix: bool = True) -> bytes:
+        """Шифрование порции блоков в записи (a, b) выходного файла"""
+        p, g, C1 = public_key
+        g_exp = CryptoUtils.fixed_base(g, p)
+        C1_exp = CryptoUtils.fixed_base(C1, p)
+        records = bytearray()
+        rng = get_rng()
 
+        for block in blocks:
             m = int.from_bytes(block, 'big')
             if m >= p:
                 m = m % p
 
-            k = random.randint(2, p - 2)
-            a = self.utils.mod_exp(g, k, p)
-            b = (m * self.utils.mod_exp(C1, k, p)) % p
-
-            encrypted_blocks.append((a, b))
-
-        with open(output_file, 'wb') as f:
-            f.write(block_size.to_bytes(4, 'big'))
-            f.write(len(encrypted_blocks).to_bytes(8, 'big'))
+            k = rng.randint(2, p - 2)
+            a = g_exp.pow(k)
+            b = (m * C1_exp.pow(k)) % p
 
-            for a, b in encrypted_blocks:
-                a_bytes = a.to_bytes((p.bit_length() + 7) // 8, 'big')
-                b_bytes = b.to_bytes((p.bit_length() + 7) // 8, 'big')
+            records += CryptoUtils.pack_record(a, byte_size, prefix)
+            records += CryptoUtils.pack_record(b, byte_size, prefix)
 
-                f.write(len(a_bytes).to_bytes(2, 'big'))
-                f.write(a_bytes)
-                f.write(len(b_bytes).to_bytes(2, 'big'))
-                f.write(b_bytes)
+        return bytes(records)
 
-        print(f"Файл зашифрован. Размер исходного файла: {len(data)} байт")
-        print(f"Количество блоков: {len(encrypted_blocks)}")
-
-    def decrypt_file(self, private_key: Tuple[int, int], input_file: str, output_file: str):
-        """Дешифрование файла с помощью Эль-Гамаля"""
+    @staticmethod
+    def decrypt_shard(encrypted_blocks: List[Tuple[int, int]], private_key: Tuple[int, int],
+                      block_size: int) -> bytes:
+        """Дешифрование порции блоков"""
         p, D1 = private_key
-
-        with open(input_file, 'rb') as f:
-            block_size = int.from_bytes(f.read(4), 'big')
-            num_blocks = int.from_bytes(f.read(8), 'big')
-
-            encrypted_blocks = []
-            for _ in range(num_blocks):
-                a_len = int.from_bytes(f.read(2), 'big')
-                a = int.from_bytes(f.read(a_len), 'big')
-                b_len = int.from_bytes(f.read(2), 'big')
-                b = int.from_bytes(f.read(b_len), 'big')
-                encrypted_blocks.append((a, b))
-
-        decrypted_data = bytearray()
+        data = bytearray()
 
         for a, b in encrypted_blocks:
-            s = self.utils.mod_exp(a, D1, p)
-            s_inv = self.utils.mod_inverse(s, p)
+            s = CryptoUtils.mod_exp(a, D1, p)
+            s_inv = CryptoUtils.mod_inverse(s, p)
             m = (b * s_inv) % p
 
-            decrypted_block = m.to_bytes(block_size, 'big')
-            decrypted_data.extend(decrypted_block)
+            data += m.to_bytes(block_size, 'big')
 
-        decrypted_data = decrypted_data.rstrip(b'\x00')
+        return bytes(data)
 
-        with open(output_file, 'wb') as f:
-            f.write(decrypted_data)
+    def encrypt_file(self, public_key: Tuple[int, int, int], input_file: str, output_file: str,
+                     workers: int = 1, container: bool = False, hybrid: bool = False,
+                     progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Шифрование файла с помощью Эль-Гамаля (container=True - CipherContainer, hybrid=True - HybridContainer)"""
+        return BlockFileCipher.encrypt(input_file, output_file, CipherContainer.CIPHER_ELGAMAL, public_key[0], 2,
+                                       self.encrypt_shard, (public_key,), workers, container, hybrid, progress)
 
-        print(f"Файл расшифрован. Размер: {len(decrypted_data)} байт")
+    def decrypt_file(self, private_key: Tuple[int, int], input_file: str, output_file: str,
+                     workers: int = 1, progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Дешифрование файла с помощью Эль-Гамаля (формат определяется автоматически)"""
+        return BlockFileCipher.decrypt(input_file, output_file, 2, self.decrypt_shard, private_key, workers, progress)
+
+    def decrypt_range(self, private_key: Tuple[int, int], input_file: str, offset: int, length: int) -> bytes:
+        """Дешифрование фрагмента [offset, offset + length) контейнера без чтения остального файла"""
+        return CipherContainer.decrypt_range(input_file, offset, length, 2, self.decrypt_shard, private_key)
 
 
 class ShamirCrypto:
@@ -427,124 +2101,81 @@ class ShamirCrypto:
     def __init__(self):
         self.utils = CryptoUtils()
 
-    def generate_keys(self, mode: int = 1) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
-        """Генерация ключей для шифра Шамира"""
-        print("\n=== Генерация ключей Шамира ===")
-
-        if mode == 1:
-            p = int(input("Введите простое число p: "))
-            Ca = int(input("Введите открытый ключ абонента A (Ca): "))
-            Cb = int(input("Введите открытый ключ абонента B (Cb): "))
-
-            if math.gcd(Ca, p - 1) != 1:
-                raise ValueError("Ca должен быть взаимно прост с p-1")
-            if math.gcd(Cb, p - 1) != 1:
-                raise ValueError("Cb должен быть взаимно прост с p-1")
-
-            Da = self.utils.mod_inverse(Ca, p - 1)
-            Db = self.utils.mod_inverse(Cb, p - 1)
-
-        elif mode == 2:
-            p = self.utils.generate_large_prime()
-
-            while True:
-                Ca = random.randint(2, p - 2)
-                if math.gcd(Ca, p - 1) == 1:
-                    break
-
-            while True:
-                Cb = random.randint(2, p - 2)
-                if math.gcd(Cb, p - 1) == 1:
-                    break
-
-            Da = self.utils.mod_inverse(Ca, p - 1)
-            Db = self.utils.mod_inverse(Cb, p - 1)
+    def build_keys(self, p: int, Ca: int, Cb: int) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
+        """Ключи абонентов A и B из p и открытых показателей Ca, Cb"""
+        if math.gcd(Ca, p - 1) != 1:
+            raise ValueError("Ca должен быть взаимно прост с p-1")
+        if math.gcd(Cb, p - 1) != 1:
+            raise ValueError("Cb должен быть взаимно прост с p-1")
 
-            print(f"Сгенерированные параметры:")
-            print(f"p = {p}")
-            print(f"Ca = {Ca}")
-            print(f"Cb = {Cb}")
-            print(f"Da = {Da}")
-            print(f"Db = {Db}")
-
-        else:
-            raise ValueError("Неверный режим")
+        Da = self.utils.mod_inverse(Ca, p - 1)
+        Db = self.utils.mod_inverse(Cb, p - 1)
 
         keys_a = (p, Ca, Da)
         keys_b = (p, Cb, Db)
         return keys_a, keys_b
 
-    def encrypt_file(self, keys_a: Tuple[int, int, int], keys_b: Tuple[int, int, int],
-                     input_file: str, output_file: str):
-        """Шифрование файла с помощью шифра Шамира"""
-        p, Ca, Da = keys_a
-        p, Cb, Db = keys_b
-        block_size = self.utils.calculate_block_size(p)
-
-        print(f"Размер блока: {block_size} байт")
+    def generate_keys(self) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
+        """Генерация случайных ключей для шифра Шамира"""
+        p = self.utils.generate_large_prime()
 
-        with open(input_file, 'rb') as f:
-            data = f.read()
+        while True:
+            Ca = get_rng().randint(2, p - 2)
+            if math.gcd(Ca, p - 1) == 1:
+                break
 
-        encrypted_blocks = []
+        while True:
+            Cb = get_rng().randint(2, p - 2)
+            if math.gcd(Cb, p - 1) == 1:
+                break
 
-        for i in range(0, len(data), block_size):
-            block = data[i:i + block_size]
+        return self.build_keys(p, Ca, Cb)
 
-            if len(block) < block_size:
-                block = block.ljust(block_size, b'\x00')
+    @staticmethod
+    def encrypt_shard(blocks: List[bytes], keys_a: Tuple[int, int, int], keys_b: Tuple[int, int, int],
+                      byte_size: int, prefix: bool = True) -> bytes:
+        """Шифрование порции блоков (три прохода протокола Шамира)"""
+        p, Ca, Da = keys_a
+        p, Cb, Db = keys_b
+        records = bytearray()
 
+        for block in blocks:
             m = int.from_bytes(block, 'big')
             if m >= p:
                 m = m % p
 
-            x1 = self.utils.mod_exp(m, Ca, p)
-            x2 = self.utils.mod_exp(x1, Cb, p)
-            x3 = self.utils.mod_exp(x2, Da, p)
-
-            encrypted_blocks.append(x3)
+            x1 = CryptoUtils.mod_exp(m, Ca, p)
+            x2 = CryptoUtils.mod_exp(x1, Cb, p)
+            x3 = CryptoUtils.mod_exp(x2, Da, p)
 
-        with open(output_file, 'wb') as f:
-            f.write(block_size.to_bytes(4, 'big'))
-            f.write(len(encrypted_blocks).to_bytes(8, 'big'))
+            records += CryptoUtils.pack_record(x3, byte_size, prefix)
 
-            for block in encrypted_blocks:
-                block_bytes = block.to_bytes((p.bit_length() + 7) // 8, 'big')
-                f.write(len(block_bytes).to_bytes(2, 'big'))
-                f.write(block_bytes)
+        return bytes(records)
 
-        print(f"Файл зашифрован. Размер исходного файла: {len(data)} байт")
-        print(f"Количество блоков: {len(encrypted_blocks)}")
-
-    def decrypt_file(self, keys_a: Tuple[int, int, int], keys_b: Tuple[int, int, int],
-                     input_file: str, output_file: str):
-        """Дешифрование файла с помощью шифра Шамира"""
-        p, Ca, Da = keys_a
+    @staticmethod
+    def decrypt_shard(encrypted_blocks: List[int], keys_b: Tuple[int, int, int], block_size: int) -> bytes:
+        """Дешифрование порции блоков (последний проход абонента B)"""
         p, Cb, Db = keys_b
+        return b''.join(CryptoUtils.mod_exp(block, Db, p).to_bytes(block_size, 'big')
+                        for block in encrypted_blocks)
 
-        with open(input_file, 'rb') as f:
-            block_size = int.from_bytes(f.read(4), 'big')
-            num_blocks = int.from_bytes(f.read(8), 'big')
-
-            encrypted_blocks = []
-            for _ in range(num_blocks):
-                block_len = int.from_bytes(f.read(2), 'big')
-                block = int.from_bytes(f.read(block_len), 'big')
-                encrypted_blocks.append(block)
-
-        decrypted_data = bytearray()
-
-        for encrypted_block in encrypted_blocks:
-            m = self.utils.mod_exp(encrypted_block, Db, p)
-            decrypted_block = m.to_bytes(block_size, 'big')
-            decrypted_data.extend(decrypted_block)
-
-        decrypted_data = decrypted_data.rstrip(b'\x00')
+    def encrypt_file(self, keys_a: Tuple[int, int, int], keys_b: Tuple[int, int, int],
+                     input_file: str, output_file: str, workers: int = 1, container: bool = False,
+                     hybrid: bool = False, progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Шифрование файла с помощью шифра Шамира (container=True - CipherContainer, hybrid=True - HybridContainer)"""
+        return BlockFileCipher.encrypt(input_file, output_file, CipherContainer.CIPHER_SHAMIR, keys_a[0], 1,
+                                       self.encrypt_shard, (keys_a, keys_b), workers, container, hybrid, progress)
 
-        with open(output_file, 'wb') as f:
-            f.write(decrypted_data)
+    def decrypt_file(self, keys_a: Tuple[int, int, int], keys_b: Tuple[int, int, int],
+                     input_file: str, output_file: str, workers: int = 1,
+                     progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Дешифрование файла с помощью шифра Шамира (формат определяется автоматически)"""
+        return BlockFileCipher.decrypt(input_file, output_file, 1, self.decrypt_shard, keys_b, workers, progress)
 
-        print(f"Файл расшифрован. Размер: {len(decrypted_data)} байт")
+    def decrypt_range(self, keys_a: Tuple[int, int, int], keys_b: Tuple[int, int, int],
+                      input_file: str, offset: int, length: int) -> bytes:
+        """Дешифрование фрагмента [offset, offset + length) контейнера без чтения остального файла"""
+        return CipherContainer.decrypt_range(input_file, offset, length, 1, self.decrypt_shard, keys_b)
 
 
 class VernamCrypto:
@@ -553,95 +2184,144 @@ class VernamCrypto:
     def __init__(self):
         self.utils = CryptoUtils()
 
+    DH_KEYSTREAM_NONCE = b'vernam-dh'
+
+    @staticmethod
+    def keystream_from_dh(dh_key: int) -> HashKeystream:
+        """Ключевой поток из общего ключа Диффи-Хеллмана: SHAKE-256 в режиме счетчика
+
+        Поток вычисляется порциями по мере шифрования и допускает произвольное
+        смещение, поэтому ключ длиной в файл не хранится ни в памяти, ни на диске.
+        """
+        return HashKeystream(_seed_bytes(dh_key), VernamCrypto.DH_KEYSTREAM_NONCE)
+
     def generate_key_from_dh(self, dh_key: int, key_length: int) -> bytes:
-        """Генерация ключа на основе общего ключа Диффи-Хеллмана"""
-        random.seed(dh_key)
-        key = bytes(random.randint(0, 255) for _ in range(key_length))
-        random.seed()
-        return key
+        """Генерация ключа на основе общего ключа Диффи-Хеллмана (первые key_length байт потока)"""
+        return self.keystream_from_dh(dh_key).read(0, key_length)
 
     def generate_random_key(self, key_length: int) -> bytes:
         """Генерация случайного ключа заданной длины"""
-        return bytes(random.randint(0, 255) for _ in range(key_length))
+        return get_rng().randbytes(key_length)
 
-    def encrypt_file(self, input_file: str, output_file: str, key: bytes):
-        """Шифрование файла с помощью шифра Вернама"""
+    @staticmethod
+    def xor_bytes(data: bytes, key: bytes) -> bytes:
+        """XOR буфера с ключом той же длины одной операцией над целыми числами"""
+        size = len(data)
+        return (int.from_bytes(data, 'little') ^ int.from_bytes(key[:size], 'little')).to_bytes(size, 'little')
+
+    def _xor_file(self, input_file: str, output_file: str, key, key_length: Optional[int],
+                  progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Потоковый XOR файла с ключом (bytes, отображенный в память файл или бесконечный HashKeystream - key_length None)"""
         if not os.path.exists(input_file):
             raise FileNotFoundError(f"Файл {input_file} не найден")
 
+        start = time.perf_counter()
         file_size = os.path.getsize(input_file)
-        if len(key) < file_size:
-            raise ValueError(f"Длина ключа ({len(key)} байт) меньше размера файла ({file_size} байт)")
+        if key_length is not None and key_length < file_size:
+            raise ValueError(f"Длина ключа ({key_length} байт) меньше размера файла ({file_size} байт)")
 
-        print(f"Шифрование файла {input_file}...")
-        print(f"Размер файла: {file_size} байт")
-        print(f"Длина ключа: {len(key)} байт")
+        logger.info("XOR файла %s: размер %d байт, длина ключа %s байт", input_file, file_size,
+                    key_length if key_length is not None else "не ограничена")
 
         with open(input_file, 'rb') as f_in, open(output_file, 'wb') as f_out:
-            # Шифруем XOR
-            for i, byte in enumerate(f_in.read()):
-                encrypted_byte = byte ^ key[i]
-                f_out.write(bytes([encrypted_byte]))
+            if file_size > 0:
+                with mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    self.xor_stream(data, f_out, key, file_size, ProgressTracker(progress, file_size))
 
-        print(f"Файл успешно зашифрован: {output_file}")
+        return FileResult(input_file, output_file, file_size, file_size, 1, file_size, 'vernam',
+                          time.perf_counter() - start)
 
-    def decrypt_file(self, input_file: str, output_file: str, key: bytes):
+    @staticmethod
+    def xor_stream(f_in, f_out, key, length: int, tracker: Optional[ProgressTracker] = None):
+        """XOR length байт из f_in с ключом порциями VERNAM_CHUNK_SIZE (key - bytes, mmap или HashKeystream)"""
+        for i in range(0, length, VERNAM_CHUNK_SIZE):
+            j = min(i + VERNAM_CHUNK_SIZE, length)
+            data = f_in.read(j - i)
+            if len(data) != j - i:
+                raise ValueError("Файл короче заявленного размера")
+            f_out.write(VernamCrypto.xor_bytes(data, key[i:j]))
+            if tracker is not None:
+                tracker.advance(j - i)
+
+    def encrypt_file(self, input_file: str, output_file: str, key: bytes,
+                     progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Шифрование файла с помощью шифра Вернама"""
+        result = self._xor_file(input_file, output_file, key, len(key), progress)
+        logger.info("Файл успешно зашифрован: %s", output_file)
+        return result
+
+    def encrypt_file_with_key_file(self, input_file: str, output_file: str, key_file: str,
+                                   progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Шифрование файла ключом из файла без загрузки ключа в память"""
+        key_length = os.path.getsize(key_file)
+        with open(key_file, 'rb') as f_key:
+            if key_length == 0:
+                result = self._xor_file(input_file, output_file, b'', 0, progress)
+            else:
+                with mmap.mmap(f_key.fileno(), 0, access=mmap.ACCESS_READ) as key:
+                    result = self._xor_file(input_file, output_file, key, key_length, progress)
+        logger.info("Файл успешно обработан ключом из %s: %s", key_file, output_file)
+        return result
+
+    def decrypt_file(self, input_file: str, output_file: str, key: bytes,
+                     progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
         """Дешифрование файла с помощью шифра Вернама"""
-        self.encrypt_file(input_file, output_file, key)
-        print(f"Файл успешно расшифрован: {output_file}")
+        result = self._xor_file(input_file, output_file, key, len(key), progress)
+        logger.info("Файл успешно расшифрован: %s", output_file)
+        return result
+
+    def decrypt_file_with_key_file(self, input_file: str, output_file: str, key_file: str,
+                                   progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Дешифрование файла ключом из файла без загрузки ключа в память"""
+        return self.encrypt_file_with_key_file(input_file, output_file, key_file, progress)
+
+    def encrypt_file_with_dh_key(self, input_file: str, output_file: str, dh_key: int,
+                                 progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Шифрование файла потоком, выводимым из общего ключа Диффи-Хеллмана"""
+        result = self._xor_file(input_file, output_file, self.keystream_from_dh(dh_key), None, progress)
+        logger.info("Файл обработан ключевым потоком Диффи-Хеллмана: %s", output_file)
+        return result
+
+    def decrypt_file_with_dh_key(self, input_file: str, output_file: str, dh_key: int,
+                                 progress: Optional[Callable[[int, int], None]] = None) -> FileResult:
+        """Дешифрование файла потоком, выводимым из общего ключа Диффи-Хеллмана"""
+        return self.encrypt_file_with_dh_key(input_file, output_file, dh_key, progress)
+
+    def save_dh_key(self, dh_key: int, key_file: str):
+        """Сохранение общего ключа Диффи-Хеллмана (вместо ключа длиной в файл)"""
+        with open(key_file, 'w') as f:
+            f.write(f"{dh_key}\n")
+        logger.info("Общий ключ Диффи-Хеллмана сохранен в файл: %s", key_file)
+
+    def load_dh_key(self, key_file: str) -> int:
+        """Загрузка общего ключа Диффи-Хеллмана"""
+        with open(key_file, 'r') as f:
+            dh_key = int(f.read().strip())
+        logger.info("Общий ключ Диффи-Хеллмана загружен из файла: %s", key_file)
+        return dh_key
 
     def save_key_to_file(self, key: bytes, key_file: str):
         """Сохранение ключа в файл"""
         with open(key_file, 'wb') as f:
             f.write(key)
-        print(f"Ключ сохранен в файл: {key_file}")
+        logger.info("Ключ сохранен в файл: %s", key_file)
 
     def load_key_from_file(self, key_file: str) -> bytes:
         """Загрузка ключа из файла"""
         with open(key_file, 'rb') as f:
             key = f.read()
-        print(f"Ключ загружен из файла: {key_file}")
+        logger.info("Ключ загружен из файла: %s", key_file)
         return key
 
-    def vernam_with_dh_key_exchange(self):
-        """Полный процесс: обмен ключами Диффи-Хеллмана + шифрование Вернама"""
-        print("\n=== Шифр Вернама с обменом ключами Диффи-Хеллмана ===")
-
-        print("Генерация параметров Диффи-Хеллмана...")
-        p = self.utils.generate_large_prime(10 ** 8, 10 ** 9)
-        g = self.utils.find_primitive_root(p)
-
-        Xa = random.randint(2, p - 2)
-        Xb = random.randint(2, p - 2)
-
-        Ya = self.utils.mod_exp(g, Xa, p)
-        Yb = self.utils.mod_exp(g, Xb, p)
-
-        Kab_A = self.utils.mod_exp(Yb, Xa, p)
-        Kab_B = self.utils.mod_exp(Ya, Xb, p)
-
-        print(f"Параметры Диффи-Хеллмана:")
-        print(f"p = {p}")
-        print(f"g = {g}")
-        print(f"Общий секретный ключ: {Kab_A}")
-
-        if Kab_A != Kab_B:
-            raise ValueError("Ошибка: ключи Диффи-Хеллмана не совпадают!")
-
-        input_file = input("Введите путь к файлу для шифрования: ")
+    def encrypt_file_with_dh(self, input_file: str, output_file: str, key_file: str,
+                             progress: Optional[Callable[[int, int], None]] = None) -> Tuple[DHExchange, FileResult]:
+        """Обмен ключами Диффи-Хеллмана, шифрование файла потоком из общего секрета и сохранение общего ключа"""
         if not os.path.exists(input_file):
             raise FileNotFoundError(f"Файл {input_file} не найден")
 
-        file_size = os.path.getsize(input_file)
-
-        print(f"Генерация ключа Вернама длиной {file_size} байт...")
-        vernam_key = self.generate_key_from_dh(Kab_A, file_size)
-
-        output_file = input("Введите путь для сохранения зашифрованного файла: ")
-        self.encrypt_file(input_file, output_file, vernam_key)
-
-        key_file = input("Введите путь для сохранения ключа: ")
-        self.save_key_to_file(vernam_key, key_file)
+        dh = DiffieHellman()
+        exchange = dh.exchange(*self.utils.generate_group(10 ** 8, 10 ** 9))
 
-        print("✓ Процесс завершен успешно!")
-        return output_file, key_file
\ No newline at end of file
+        result = self.encrypt_file_with_dh_key(input_file, output_file, exchange.key, progress)
+        self.save_dh_key(exchange.key, key_file)
+        return exchange, result
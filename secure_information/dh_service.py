@@ -0,0 +1,289 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, List, Optional, NamedTuple
+from crypto_lib import CryptoUtils, init_worker, get_rng
+
+
+def _generate_ephemerals(p: int, g: int, count: int) -> List[Tuple[int, int]]:
+    """Генерация count пар (x, g^x mod p) в процессе пула"""
+    g_exp = CryptoUtils.fixed_base(g, p)
+    rng = get_rng()
+    pairs = []
+    for _ in range(count):
+        x = rng.randint(2, p - 2)
+        pairs.append((x, g_exp.pow(x)))
+    return pairs
+
+
+class EphemeralPool:
+    """Пул заранее вычисленных эфемерных ключей (x, g^x mod p), пополняемый в фоновых процессах"""
+
+    def __init__(self, p: int, g: int, size: int = 1024, batch: int = 64, workers: int = 1):
+        self.p = p
+        self.g = g
+        self.batch = batch
+        self.workers = max(1, workers)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._size = size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """Запуск фонового пополнения пула"""
+        if self._executor is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self._size)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                             initargs=(CryptoUtils.MOD_EXP_BACKEND, get_rng()))
+        self._tasks = [asyncio.create_task(self._refill()) for _ in range(self.workers)]
+
+    async def _refill(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pairs = await loop.run_in_executor(self._executor, _generate_ephemerals, self.p, self.g, self.batch)
+            for pair in pairs:
+                await self._queue.put(pair)
+
+    def ready(self) -> int:
+        """Количество готовых эфемерных ключей"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def get(self) -> Tuple[int, int]:
+        """Эфемерный ключ из пула (ожидает пополнения, если пул пуст)"""
+        if self._executor is None:
+            await self.start()
+        return await self._queue.get()
+
+    async def close(self):
+        """Остановка пополнения и пула процессов"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def __aenter__(self) -> 'EphemeralPool':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class QueueTransport:
+    """Транспорт внутри процесса: пара очередей asyncio"""
+
+    def __init__(self, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        self.inbox = inbox
+        self.outbox = outbox
+
+    @staticmethod
+    def pair() -> Tuple['QueueTransport', 'QueueTransport']:
+        """Два связанных конца канала"""
+        a_to_b, b_to_a = asyncio.Queue(), asyncio.Queue()
+        return QueueTransport(b_to_a, a_to_b), QueueTransport(a_to_b, b_to_a)
+
+    async def send(self, message: dict):
+        await self.outbox.put(message)
+
+    async def recv(self) -> dict:
+        return await self.inbox.get()
+
+    async def close(self):
+        pass
+
+
+class StreamTransport:
+    """Транспорт поверх потоков asyncio (Unix-сокет): по одному JSON-сообщению в строке"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect_unix(cls, path: str) -> 'StreamTransport':
+        """Подключение к локальному Unix-сокету"""
+        reader, writer = await asyncio.open_unix_connection(path)
+        return cls(reader, writer)
+
+    async def send(self, message: dict):
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        await self.writer.drain()
+
+    async def recv(self) -> dict:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Соединение закрыто собеседником")
+        return json.loads(line)
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class LoadTestResult(NamedTuple):
+    """Результат нагрузочного теста"""
+    sessions: int
+    failures: int
+    elapsed: float
+
+    @property
+    def handshakes_per_second(self) -> float:
+        return (self.sessions - self.failures) / self.elapsed if self.elapsed > 0 else float('inf')
+
+
+class DHService:
+    """Сервис обмена ключами Диффи-Хеллмана: инициатор и ответчик как сопрограммы asyncio
+
+    Протокол: инициатор отправляет {session, p, g, y}, ответчик отвечает
+    {session, y}; каждая сторона вычисляет общий ключ y_собеседника^x mod p.
+    """
+
+    def __init__(self, p: int, g: int, pool: Optional[EphemeralPool] = None):
+        self.utils = CryptoUtils()
+        self.p = p
+        self.g = g
+        self.pool = pool
+
+    @classmethod
+    def generate(cls, pool_size: int = 0, workers: int = 1) -> 'DHService':
+        """Сервис со сгенерированными параметрами p, g (pool_size > 0 - с пулом эфемерных ключей)"""
+        utils = CryptoUtils()
+        p, g = utils.generate_group()
+        pool = EphemeralPool(p, g, size=pool_size, workers=workers) if pool_size > 0 else None
+        return cls(p, g, pool)
+
+    async def _ephemeral(self) -> Tuple[int, int]:
+        if self.pool is not None:
+            return await self.pool.get()
+        x = get_rng().randint(2, self.p - 2)
+        return x, self.utils.fixed_base(self.g, self.p).pow(x)
+
+    def _check_public(self, y: int):
+        if not 2 <= y <= self.p - 2:
+            raise ValueError(f"Недопустимый открытый ключ собеседника: {y}")
+
+    async def initiate(self, transport, session_id: int = 0) -> int:
+        """Сторона A: отправка своего открытого ключа и вычисление общего ключа"""
+        x, y = await self._ephemeral()
+        await transport.send({'session': session_id, 'p': self.p, 'g': self.g, 'y': y})
+
+        reply = await transport.recv()
+        if reply.get('session') != session_id:
+            raise ValueError(f"Ответ для чужой сессии: {reply.get('session')}")
+        self._check_public(reply['y'])
+        return self.utils.mod_exp(reply['y'], x, self.p)
+
+    async def respond(self, transport) -> Tuple[int, int]:
+        """Сторона B: ответ на приветствие инициатора; возвращает (номер сессии, общий ключ)"""
+        hello = await transport.recv()
+        if hello.get('p') != self.p or hello.get('g') != self.g:
+            raise ValueError("Параметры (p, g) инициатора не совпадают с параметрами сервиса")
+        self._check_public(hello['y'])
+
+        x, y = await self._ephemeral()
+        await transport.send({'session': hello['session'], 'y': y})
+        return hello['session'], self.utils.mod_exp(hello['y'], x, self.p)
+
+    async def serve_unix(self, path: str, on_session=None) -> asyncio.AbstractServer:
+        """Ответчик на Unix-сокете: каждое подключение - одна сессия; on_session(session_id, key)"""
+        async def handle(reader, writer):
+            transport = StreamTransport(reader, writer)
+            try:
+                session_id, key = await self.respond(transport)
+                if on_session is not None:
+                    on_session(session_id, key)
+            except (ValueError, KeyError, ConnectionError):
+                pass
+            finally:
+                await transport.close()
+
+        if os.path.exists(path):
+            os.remove(path)
+        return await asyncio.start_unix_server(handle, path=path)
+
+    async def load_test(self, sessions: int = 1000, concurrency: int = 100,
+                        socket_path: Optional[str] = None) -> LoadTestResult:
+        """Нагрузочный тест: sessions обменов, не больше concurrency одновременно
+
+        socket_path=None - транспорт в памяти, иначе - Unix-сокет по этому пути.
+        Сессия считается успешной, если ключи обеих сторон совпали.
+        """
+        responder_keys = {}
+        server = None
+        if socket_path is not None:
+            server = await self.serve_unix(socket_path, responder_keys.__setitem__)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_session(session_id: int) -> bool:
+            async with semaphore:
+                if socket_path is None:
+                    side_a, side_b = QueueTransport.pair()
+                    key_a, (_, key_b) = await asyncio.gather(self.initiate(side_a, session_id),
+                                                             self.respond(side_b))
+                    return key_a == key_b
+
+                transport = await StreamTransport.connect_unix(socket_path)
+                try:
+                    key_a = await self.initiate(transport, session_id)
+                    # Ответчик сохраняет ключ перед закрытием соединения - ждем закрытия
+                    await transport.reader.read()
+                finally:
+                    await transport.close()
+                return responder_keys.pop(session_id, None) == key_a
+
+        start = time.perf_counter()
+        try:
+            results = await asyncio.gather(*(run_session(i) for i in range(sessions)), return_exceptions=True)
+        finally:
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+                os.remove(socket_path)
+        elapsed = time.perf_counter() - start
+
+        failures = sum(1 for result in results if result is not True)
+        return LoadTestResult(sessions, failures, elapsed)
+
+
+async def run_load_test(sessions: int, concurrency: int, pool_size: int, workers: int,
+                        socket_path: Optional[str] = None) -> LoadTestResult:
+    service = DHService.generate(pool_size, workers)
+    if service.pool is None:
+        return await service.load_test(sessions, concurrency, socket_path)
+
+    async with service.pool:
+        # Даем пулу заполниться, чтобы измерять скорость обменов, а не генерации
+        while service.pool.ready() < min(pool_size, sessions):
+            await asyncio.sleep(0.05)
+        return await service.load_test(sessions, concurrency, socket_path)
+
+
+def main():
+    print("=== Нагрузочный тест сервиса Диффи-Хеллмана ===")
+    sessions = int(input("Количество сессий (по умолчанию 1000): ") or "1000")
+    concurrency = int(input("Одновременных сессий (по умолчанию 100): ") or "100")
+    pool_size = int(input("Размер пула эфемерных ключей, 0 - без пула (по умолчанию 1024): ") or "1024")
+    workers = int(input("Количество процессов пула (по умолчанию 1): ") or "1")
+    transport = input("Транспорт: 1 - в памяти, 2 - Unix-сокет (по умолчанию 1): ").strip() or "1"
+    socket_path = "dh_service.sock" if transport == "2" else None
+
+    result = asyncio.run(run_load_test(sessions, concurrency, pool_size, workers, socket_path))
+
+    print(f"Сессий: {result.sessions}, ошибок: {result.failures}")
+    print(f"Время: {result.elapsed:.3f} с")
+    print(f"Обменов в секунду: {result.handshakes_per_second:.1f}")
+
+
+if __name__ == "__main__":
+    main()
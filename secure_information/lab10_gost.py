@@ -1,36 +1,47 @@
-import hashlib
 import struct
-import random
 import math
-from typing import Tuple, List, Optional
-from crypto_lib import CryptoUtils
+from typing import Tuple, List, Optional, Iterable
+from crypto_lib import (CryptoUtils, StreamHasher, HashSource, VerificationResult, NoncePoolRegistry, Nonce,
+                        verify_signature_batch, get_rng)
+from param_pool import DomainParameterPool
 
 
 class GOSTSignature:
 
     def __init__(self):
         self.utils = CryptoUtils()
-
-    def generate_common_params(self) -> Tuple[int, int, int]:
-        print("Генерация общих параметров ГОСТ Р 34.10-94...")
-
-        print("Генерация простого числа q (16 бит)...")
-        q_lower = 2 ** 15
-        q_upper = 2 ** 16 - 1
+        # Пулы одноразовых чисел по параметрам (p, q, a): nonce_pools.start(p, q, a)
+        self.nonce_pools = NoncePoolRegistry(self.make_nonce)
+
+    def generate_common_params(self, L: int = 31, N: int = 16,
+                               pool: Optional[DomainParameterPool] = None) -> Tuple[int, int, int]:
+        print(f"Генерация общих параметров ГОСТ Р 34.10-94 (L={L}, N={N})...")
+
+        if pool is not None:
+            p, q, a = pool.get(L, N)
+            print(f"Параметры взяты из пула {pool.filename}:")
+            print(f"p = {p} (бит: {p.bit_length()})")
+            print(f"q = {q} (бит: {q.bit_length()})")
+            print(f"a = {a}")
+            return p, q, a
+
+        print(f"Генерация простого числа q ({N} бит)...")
+        q_lower = 2 ** (N - 1)
+        q_upper = 2 ** N - 1
         q = self.utils.generate_prime(q_lower, q_upper)
         print(f"q = {q} (бит: {q.bit_length()})")
 
-        print("Генерация простого числа p (31 бит)...")
-        p_lower = 2 ** 30
-        p_upper = 2 ** 31 - 1
+        print(f"Генерация простого числа p ({L} бит)...")
+        p_lower = 2 ** (L - 1)
+        p_upper = 2 ** L - 1
 
         while True:
             b_min = p_lower // q
             b_max = p_upper // q
-            b = random.randint(b_min, b_max)
+            b = get_rng().randint(b_min, b_max)
             p_candidate = b * q + 1
 
-            if p_lower <= p_candidate <= p_upper and self.utils.test_ferma(p_candidate):
+            if p_lower <= p_candidate <= p_upper and self.utils.is_probable_prime(p_candidate):
                 p = p_candidate
                 break
 
@@ -40,7 +51,7 @@ class GOSTSignature:
 
         print("Генерация числа a...")
         while True:
-            g = random.randint(2, p - 2)
+            g = get_rng().randint(2, p - 2)
             a = self.utils.mod_exp(g, b, p)
             if a > 1:
                 check = self.utils.mod_exp(a, q, p)
@@ -57,7 +68,7 @@ class GOSTSignature:
 
         print("\nГенерация ключевой пары...")
 
-        x = random.randint(1, q - 1)
+        x = get_rng().randint(1, q - 1)
 
         y = self.utils.mod_exp(a, x, p)
 
@@ -66,15 +77,17 @@ class GOSTSignature:
 
         return x, y
 
-    def compute_hash(self, data: bytes, q: int) -> int:
+    @staticmethod
+    def reduce_hash(hash_bytes: bytes, q: int) -> int:
+        """Хеш как число из (0, q)"""
+        return int.from_bytes(hash_bytes, 'big') % (q - 1) + 1
 
-        hash_obj = hashlib.sha256()
-        hash_obj.update(data)
-        hash_bytes = hash_obj.digest()
+    def compute_hash(self, data: HashSource, q: int) -> int:
 
-        h = int.from_bytes(hash_bytes, 'big')
+        hash_obj = StreamHasher('sha256').hash(data)
+        hash_bytes = hash_obj.digest()
 
-        h = h % (q - 1) + 1
+        h = self.reduce_hash(hash_bytes, q)
 
         hash_hex = hash_obj.hexdigest()
         print(f"Хеш документа (SHA-256): {hash_hex}")
@@ -82,29 +95,35 @@ class GOSTSignature:
 
         return h
 
-    def sign(self, data: bytes, p: int, q: int, a: int, x: int) -> Tuple[int, int]:
-        print("\nПодписание документа...")
-
-        h = self.compute_hash(data, q)
+    def make_nonce(self, p: int, q: int, a: int) -> Nonce:
+        """Одноразовое число k с готовым r = (a^k mod p) mod q (обращение k в ГОСТ не нужно)"""
+        a_exp = self.utils.fixed_base(a, p, q)
 
         while True:
-            k = random.randint(1, q - 1)
-
-            r = self.utils.mod_exp(a, k, p) % q
-            if r == 0:
-                continue
+            k = get_rng().randint(1, q - 1)
+            r = a_exp.pow(k) % q
+            if r != 0:
+                return Nonce(k, r, None)
 
-            try:
-                k_inv = self.utils.mod_inverse(k, q)
-                s = (k * h + x * r) % q
+    def sign_value(self, h: int, p: int, q: int, a: int, x: int) -> Tuple[int, int, int]:
+        """Подпись числа h без вывода на экран: (r, s, k)"""
+        while True:
+            k, r, _ = self.nonce_pools.next(p, q, a)
+            s = (k * h + x * r) % q
+            if s != 0:
+                return r, s, k
+
+    def sign_digest(self, hash_bytes: bytes, p: int, q: int, a: int, x: int) -> Tuple[int, int]:
+        """Подпись готового хеша SHA-256 без вывода на экран"""
+        r, s, _ = self.sign_value(self.reduce_hash(hash_bytes, q), p, q, a, x)
+        return r, s
 
-                if s == 0:
-                    continue
+    def sign(self, data: HashSource, p: int, q: int, a: int, x: int) -> Tuple[int, int]:
+        print("\nПодписание документа...")
 
-                break
+        h = self.compute_hash(data, q)
 
-            except ValueError:
-                continue
+        r, s, k = self.sign_value(h, p, q, a, x)
 
         print(f"Случайное число k = {k}")
         print(f"r = (a^k mod p) mod q = ({a}^{k} mod {p}) mod {q} = {r}")
@@ -112,7 +131,7 @@ class GOSTSignature:
 
         return r, s
 
-    def verify(self, data: bytes, signature: Tuple[int, int], p: int, q: int, a: int, y: int) -> bool:
+    def verify(self, data: HashSource, signature: Tuple[int, int], p: int, q: int, a: int, y: int) -> bool:
 
         print("\nПроверка подписи...")
 
@@ -156,15 +175,28 @@ class GOSTSignature:
             print(f"Ошибка при вычислении обратного элемента: {e}")
             return False
 
+    def verify_batch(self, items: Iterable[Tuple[HashSource, Tuple[int, int]]],
+                     p: int, q: int, a: int, y: int) -> VerificationResult:
+        """Проверка многих подписей (документ, (r, s)) одного ключа без вывода на экран"""
+        hasher = StreamHasher('sha256')
+        return self.verify_digests(((hasher.digest(data), signature) for data, signature in items), p, q, a, y)
+
+    def verify_digests(self, items: Iterable[Tuple[bytes, Tuple[int, int]]],
+                       p: int, q: int, a: int, y: int) -> VerificationResult:
+        """Проверка многих подписей (хеш SHA-256, (r, s)) одного ключа без вывода на экран
+
+        ГОСТ: v = h^(-1), u1 = s*v, u2 = -r*v (mod q); проверка (a^u1 * y^u2 mod p) mod q == r.
+        """
+        return verify_signature_batch(((self.reduce_hash(hash_bytes, q), signature) for hash_bytes, signature in items),
+                                      p, q, a, y, lambda h, r, s: h,
+                                      lambda h, r, s, v: (s * v % q, -r * v % q))
+
     def sign_file(self, input_file: str, p: int, q: int, a: int, x: int,
                   signature_file: Optional[str] = None) -> str:
 
         print(f"Подписание файла: {input_file}")
 
-        with open(input_file, 'rb') as f:
-            data = f.read()
-
-        r, s = self.sign(data, p, q, a, x)
+        r, s = self.sign(input_file, p, q, a, x)
 
         if signature_file is None:
             signature_file = input_file + '.gost_sig'
@@ -179,12 +211,9 @@ class GOSTSignature:
 
         print(f"Проверка подписи файла: {input_file}")
 
-        with open(input_file, 'rb') as f:
-            data = f.read()
-
         r, s = self._load_signature(signature_file, p.bit_length())
 
-        return self.verify(data, (r, s), p, q, a, y)
+        return self.verify(input_file, (r, s), p, q, a, y)
 
     def _save_signature(self, filename: str, r: int, s: int, bit_length: int):
 
@@ -253,6 +282,7 @@ def main():
 
     common_params = None
     keys = None
+    param_pool = None
 
     while True:
         print("\n" + "=" * 60)
@@ -271,7 +301,11 @@ def main():
         if choice == '1':
             try:
                 print("\n--- Генерация общих параметров ---")
-                common_params = gost.generate_common_params()
+                store = input("Файл пула параметров (Enter - без пула): ").strip()
+                if store and (param_pool is None or param_pool.filename != store):
+                    param_pool = DomainParameterPool(store)
+
+                common_params = gost.generate_common_params(pool=param_pool if store else None)
                 p, q, a = common_params
                 print("✓ Общие параметры сгенерированы успешно!")
 
@@ -1,23 +1,34 @@
-import hashlib
 import struct
-import random
 import math
-from typing import Tuple, List, Optional
-from crypto_lib import CryptoUtils
+from typing import Tuple, List, Optional, Iterable
+from crypto_lib import (CryptoUtils, StreamHasher, HashSource, VerificationResult, NoncePoolRegistry, Nonce,
+                        verify_signature_batch, get_rng)
+from param_pool import DomainParameterPool
 
 
 class FIPS186Signature:
 
     def __init__(self):
         self.utils = CryptoUtils()
+        # Пулы одноразовых чисел по параметрам (p, q, g): nonce_pools.start(p, q, g)
+        self.nonce_pools = NoncePoolRegistry(self.make_nonce)
 
-    def generate_domain_parameters(self, L: int = 1024, N: int = 160) -> Tuple[int, int, int]:
+    def generate_domain_parameters(self, L: int = 1024, N: int = 160,
+                                   pool: Optional[DomainParameterPool] = None) -> Tuple[int, int, int]:
         print(f"Генерация доменных параметров DSA (L={L}, N={N})...")
 
         if L == 1024 and N == 160:
             print("Используются упрощенные размеры для лабораторной работы:")
             L, N = 31, 16
 
+        if pool is not None:
+            p, q, g = pool.get(L, N)
+            print(f"Параметры взяты из пула {pool.filename}:")
+            print(f"p = {p} (бит: {p.bit_length()})")
+            print(f"q = {q} (бит: {q.bit_length()})")
+            print(f"g = {g}")
+            return p, q, g
+
         print(f"Генерация простого числа q ({N} бит)...")
         q_lower = 2 ** (N - 1)
         q_upper = 2 ** N - 1
@@ -31,10 +42,10 @@ class FIPS186Signature:
         while True:
             k_min = p_lower // q
             k_max = p_upper // q
-            k = random.randint(k_min, k_max)
+            k = get_rng().randint(k_min, k_max)
             p_candidate = k * q + 1
 
-            if p_lower <= p_candidate <= p_upper and self.utils.test_ferma(p_candidate):
+            if p_lower <= p_candidate <= p_upper and self.utils.is_probable_prime(p_candidate):
                 p = p_candidate
                 break
 
@@ -45,7 +56,7 @@ class FIPS186Signature:
 
         print("Генерация генератора g...")
         while True:
-            h = random.randint(2, p - 2)
+            h = get_rng().randint(2, p - 2)
             g = self.utils.mod_exp(h, (p - 1) // q, p)
             if g > 1:
                 break
@@ -62,7 +73,7 @@ class FIPS186Signature:
 
         print("\nГенерация ключевой пары DSA...")
 
-        x = random.randint(1, q - 1)
+        x = get_rng().randint(1, q - 1)
 
         y = self.utils.mod_exp(g, x, p)
 
@@ -71,15 +82,17 @@ class FIPS186Signature:
 
         return x, y
 
-    def compute_hash(self, data: bytes, q: int) -> int:
+    @staticmethod
+    def reduce_hash(hash_bytes: bytes, q: int) -> int:
+        """Хеш как число из (0, q)"""
+        return int.from_bytes(hash_bytes, 'big') % (q - 1) + 1
 
-        hash_obj = hashlib.sha256()
-        hash_obj.update(data)
-        hash_bytes = hash_obj.digest()
+    def compute_hash(self, data: HashSource, q: int) -> int:
 
-        h = int.from_bytes(hash_bytes, 'big')
+        hash_obj = StreamHasher('sha256').hash(data)
+        hash_bytes = hash_obj.digest()
 
-        h = h % (q - 1) + 1
+        h = self.reduce_hash(hash_bytes, q)
 
         hash_hex = hash_obj.hexdigest()
         print(f"Хеш документа (SHA-256): {hash_hex}")
@@ -87,28 +100,35 @@ class FIPS186Signature:
 
         return h
 
-    def sign(self, data: bytes, p: int, q: int, g: int, x: int) -> Tuple[int, int]:
-        print("\nПодписание документа по DSA...")
-
-        h = self.compute_hash(data, q)
+    def make_nonce(self, p: int, q: int, g: int) -> Nonce:
+        """Одноразовое число k с готовыми r = (g^k mod p) mod q и k^(-1) mod q"""
+        g_exp = self.utils.fixed_base(g, p, q)
 
         while True:
-            k = random.randint(1, q - 1)
-            r = self.utils.mod_exp(g, k, p) % q
-            if r == 0:
-                continue
+            k = get_rng().randint(1, q - 1)
+            r = g_exp.pow(k) % q
+            if r != 0:
+                return Nonce(k, r, self.utils.mod_inverse(k, q))
 
-            try:
-                k_inv = self.utils.mod_inverse(k, q)
-                s = (k_inv * (h + x * r)) % q
+    def sign_value(self, h: int, p: int, q: int, g: int, x: int) -> Tuple[int, int, int, int]:
+        """Подпись числа h без вывода на экран: (r, s, k, k^(-1) mod q)"""
+        while True:
+            k, r, k_inv = self.nonce_pools.next(p, q, g)
+            s = (k_inv * (h + x * r)) % q
+            if s != 0:
+                return r, s, k, k_inv
+
+    def sign_digest(self, hash_bytes: bytes, p: int, q: int, g: int, x: int) -> Tuple[int, int]:
+        """Подпись готового хеша SHA-256 без вывода на экран"""
+        r, s, _, _ = self.sign_value(self.reduce_hash(hash_bytes, q), p, q, g, x)
+        return r, s
 
-                if s == 0:
-                    continue
+    def sign(self, data: HashSource, p: int, q: int, g: int, x: int) -> Tuple[int, int]:
+        print("\nПодписание документа по DSA...")
 
-                break
+        h = self.compute_hash(data, q)
 
-            except ValueError:
-                continue
+        r, s, k, k_inv = self.sign_value(h, p, q, g, x)
 
         print(f"Эфемерный ключ k = {k}")
         print(f"r = (g^k mod p) mod q = ({g}^{k} mod {p}) mod {q} = {r}")
@@ -116,7 +136,7 @@ class FIPS186Signature:
 
         return r, s
 
-    def verify(self, data: bytes, signature: Tuple[int, int], p: int, q: int, g: int, y: int) -> bool:
+    def verify(self, data: HashSource, signature: Tuple[int, int], p: int, q: int, g: int, y: int) -> bool:
 
         print("\nПроверка подписи DSA...")
 
@@ -161,15 +181,28 @@ class FIPS186Signature:
             print(f"Ошибка при вычислении обратного элемента: {e}")
             return False
 
+    def verify_batch(self, items: Iterable[Tuple[HashSource, Tuple[int, int]]],
+                     p: int, q: int, g: int, y: int) -> VerificationResult:
+        """Проверка многих подписей (документ, (r, s)) одного ключа без вывода на экран"""
+        hasher = StreamHasher('sha256')
+        return self.verify_digests(((hasher.digest(data), signature) for data, signature in items), p, q, g, y)
+
+    def verify_digests(self, items: Iterable[Tuple[bytes, Tuple[int, int]]],
+                       p: int, q: int, g: int, y: int) -> VerificationResult:
+        """Проверка многих подписей (хеш SHA-256, (r, s)) одного ключа без вывода на экран
+
+        DSA: w = s^(-1), u1 = h*w, u2 = r*w (mod q); проверка (g^u1 * y^u2 mod p) mod q == r.
+        """
+        return verify_signature_batch(((self.reduce_hash(hash_bytes, q), signature) for hash_bytes, signature in items),
+                                      p, q, g, y, lambda h, r, s: s,
+                                      lambda h, r, s, w: (h * w % q, r * w % q))
+
     def sign_file(self, input_file: str, p: int, q: int, g: int, x: int,
                   signature_file: Optional[str] = None) -> str:
 
         print(f"Подписание файла: {input_file}")
 
-        with open(input_file, 'rb') as f:
-            data = f.read()
-
-        r, s = self.sign(data, p, q, g, x)
+        r, s = self.sign(input_file, p, q, g, x)
 
         if signature_file is None:
             signature_file = input_file + '.dsa_sig'
@@ -184,13 +217,9 @@ class FIPS186Signature:
 
         print(f"Проверка подписи DSA файла: {input_file}")
 
-        # Чтение файла
-        with open(input_file, 'rb') as f:
-            data = f.read()
-
         r, s = self._load_signature(signature_file, p.bit_length())
 
-        return self.verify(data, (r, s), p, q, g, y)
+        return self.verify(input_file, (r, s), p, q, g, y)
 
     def _save_signature(self, filename: str, r: int, s: int, bit_length: int):
 
@@ -259,6 +288,7 @@ def main():
 
     domain_params = None
     keys = None
+    param_pool = None
 
     while True:
         print("\n" + "=" * 60)
@@ -283,7 +313,11 @@ def main():
                 L = int(L) if L else 1024
                 N = int(N) if N else 160
 
-                domain_params = dsa.generate_domain_parameters(L, N)
+                store = input("Файл пула параметров (Enter - без пула): ").strip()
+                if store and (param_pool is None or param_pool.filename != store):
+                    param_pool = DomainParameterPool(store)
+
+                domain_params = dsa.generate_domain_parameters(L, N, param_pool if store else None)
                 print("✓ Доменные параметры сгенерированы успешно!")
 
             except Exception as e:
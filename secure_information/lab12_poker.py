@@ -1,14 +1,15 @@
-import random
 import hashlib
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from typing import List, Tuple, Dict
 import math
+from crypto_lib import RSACrypto, RSAPrivateKey, BatchResult, get_rng
 
 
 class RSAMentalPoker:
     def __init__(self):
         self.prime_bit_size = 32
+        self.batch = RSACrypto()
 
     def generate_rsa_keys(self):
         """Генерация RSA ключей"""
@@ -24,16 +25,16 @@ class RSAMentalPoker:
 
         e = 65537
         while math.gcd(e, phi) != 1:
-            e = random.randint(2 ** 16, min(phi - 1, 2 ** 17))
+            e = get_rng().randint(2 ** 16, min(phi - 1, 2 ** 17))
 
         d = pow(e, -1, phi)
 
-        return (n, e), (n, d)
+        return (n, e), RSAPrivateKey.from_components(n, d, p, q)
 
     def generate_large_prime(self):
         """Генерация простого числа"""
         while True:
-            num = random.randint(2 ** (self.prime_bit_size - 1), 2 ** self.prime_bit_size)
+            num = get_rng().randint(2 ** (self.prime_bit_size - 1), 2 ** self.prime_bit_size)
             num |= 1
 
             if self.is_prime(num):
@@ -60,7 +61,7 @@ class RSAMentalPoker:
             s += 1
 
         for _ in range(k):
-            a = random.randint(2, n - 2)
+            a = get_rng().randint(2, n - 2)
             x = pow(a, d, n)
             if x == 1 or x == n - 1:
                 continue
@@ -81,9 +82,15 @@ class RSAMentalPoker:
 
     def rsa_decrypt(self, ciphertext, private_key):
         """Дешифрование RSA"""
-        n, d = private_key
-        result = pow(ciphertext, d, n)
-        return result
+        return RSACrypto.decrypt_block(ciphertext, private_key)
+
+    def rsa_encrypt_batch(self, messages: List[int], public_key) -> BatchResult:
+        """Пакетное шифрование RSA списка сообщений одним ключом"""
+        return self.batch.encrypt_batch(messages, public_key)
+
+    def rsa_decrypt_batch(self, ciphertexts: List[int], private_key) -> BatchResult:
+        """Пакетное дешифрование RSA списка шифртекстов одним ключом (КТО)"""
+        return self.batch.decrypt_batch(ciphertexts, private_key)
 
 
 class MentalPokerProtocol:
@@ -109,32 +116,17 @@ class MentalPokerProtocol:
 
     def commutative_encryption_round(self, deck, player_index):
         """Один раунд коммутативного шифрования"""
-        encrypted_deck = []
         player = self.players[player_index]
 
-        for card in deck:
-            try:
-                encrypted_card = self.rsa.rsa_encrypt(card, player['public_key'])
-                encrypted_deck.append(encrypted_card)
-            except Exception:
-                encrypted_deck.append(card)
+        encrypted_deck = self.rsa.rsa_encrypt_batch(deck, player['public_key']).values
 
-        random.shuffle(encrypted_deck)
+        get_rng().shuffle(encrypted_deck)
         return encrypted_deck
 
     def commutative_decryption_round(self, encrypted_deck, player_index):
         """Один раунд коммутативного дешифрования"""
-        decrypted_deck = []
         player = self.players[player_index]
-
-        for encrypted_card in encrypted_deck:
-            try:
-                decrypted_card = self.rsa.rsa_decrypt(encrypted_card, player['private_key'])
-                decrypted_deck.append(decrypted_card)
-            except:
-                decrypted_deck.append(encrypted_card)
-
-        return decrypted_deck
+        return self.rsa.rsa_decrypt_batch(encrypted_deck, player['private_key']).values
 
     def normalize_card_number(self, card_num):
         """Приведение номера карты к диапазону 1-52"""
@@ -171,26 +163,19 @@ class MentalPokerProtocol:
         community_cards_encrypted = encrypted_deck[current_index:current_index + 5]
 
         # 4. Фаза дешифрования карт игроков
+        # Все карты снимаются одним пакетом на каждого игрока
+        dealt_count = 2 * self.num_players
+        temp_cards = encrypted_deck[:dealt_count] + community_cards_encrypted
+        for j in range(self.num_players):
+            temp_cards = self.commutative_decryption_round(temp_cards, j)
+
         for i, player in enumerate(self.players):
-            decrypted_hand = []
-            for encrypted_card in player['encrypted_hand']:
-                temp_card = encrypted_card
-                for j in range(self.num_players):
-                    temp_card = self.rsa.rsa_decrypt(temp_card, self.players[j]['private_key'])
-                # Нормализуем номер карты
-                normalized_card = self.normalize_card_number(temp_card)
-                decrypted_hand.append(normalized_card)
-            player['hand'] = decrypted_hand
+            # Нормализуем номер карты
+            player['hand'] = [self.normalize_card_number(card) for card in temp_cards[2 * i:2 * i + 2]]
             self.encryption_log.append(f"🔓 {player['name']} получил карты")
 
         # 5. Фаза дешифрования общих карт
-        decrypted_community = []
-        for encrypted_card in community_cards_encrypted:
-            temp_card = encrypted_card
-            for player in self.players:
-                temp_card = self.rsa.rsa_decrypt(temp_card, player['private_key'])
-            normalized_card = self.normalize_card_number(temp_card)
-            decrypted_community.append(normalized_card)
+        decrypted_community = [self.normalize_card_number(card) for card in temp_cards[dealt_count:]]
 
         self.encryption_log.append("📋 Общие карты раскрыты")
 
@@ -650,7 +635,7 @@ class MentalPokerGUI:
 
         for player in self.players:
             n, e = player['public_key']
-            n, d = player['private_key']
+            n, d = player['private_key'].n, player['private_key'].d
 
             keys_info += f"{player['name']}:\n"
             keys_info += f"  Открытый ключ (n): {n}\n"
@@ -1,8 +1,8 @@
-import secrets
 import hashlib
 import sys
 import math
 from typing import Tuple
+from crypto_lib import PrimeGenerator, get_rng
 
 PRIME_BITS = 256
 RND_BITS = 512
@@ -20,7 +20,7 @@ def is_probable_prime(n: int, rounds: int = 16) -> bool:
         d //= 2
         s += 1
     for _ in range(rounds):
-        a = secrets.randbelow(n - 3) + 2
+        a = get_rng().randint(2, n - 2)
         x = pow(a, d, n)
         if x == 1 or x == n-1:
             continue
@@ -34,7 +34,7 @@ def is_probable_prime(n: int, rounds: int = 16) -> bool:
 
 def generate_prime(bits: int) -> int:
     while True:
-        p = secrets.randbits(bits) | (1 << (bits - 1)) | 1
+        p = get_rng().getrandbits(bits) | (1 << (bits - 1)) | 1
         if is_probable_prime(p):
             return p
 
@@ -55,12 +55,15 @@ def modinv(a: int, m: int) -> int:
 
 
 class Server:
-    def __init__(self, prime_bits=PRIME_BITS):
+    def __init__(self, prime_bits=PRIME_BITS, workers=1):
         print("[server] Генерация RSA-ключей...")
-        self.P = generate_prime(prime_bits)
-        self.Q = generate_prime(prime_bits)
-        while self.Q == self.P:
+        if workers > 1:
+            self.P, self.Q = PrimeGenerator.generate_parallel(prime_bits, 2, workers)
+        else:
+            self.P = generate_prime(prime_bits)
             self.Q = generate_prime(prime_bits)
+            while abs(self.Q - self.P) < PrimeGenerator.min_gap(prime_bits):
+                self.Q = generate_prime(prime_bits)
         self.N = self.P * self.Q
         self.phi = (self.P - 1) * (self.Q - 1)
 
@@ -132,7 +135,7 @@ def decode_n(n: int) -> dict:
 def client_vote_flow(server: Server, client_id: str, vote_choice: str):
     print(f"\n[client] Голосование за '{vote_choice}'...")
 
-    rnd = secrets.randbits(RND_BITS)
+    rnd = get_rng().getrandbits(RND_BITS)
 
     v_field = encode_vote(vote_choice, extra_info="Election2025")
     n = (rnd << 512) | v_field
@@ -140,7 +143,7 @@ def client_vote_flow(server: Server, client_id: str, vote_choice: str):
     h = sha3_int(n)
 
     while True:
-        r = secrets.randbelow(server.N - 2) + 2
+        r = get_rng().randint(2, server.N - 1)
         if math.gcd(r, server.N) == 1:
             break
     h_bar = (h * pow(r, server.e, server.N)) % server.N
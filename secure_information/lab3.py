@@ -1,5 +1,6 @@
 import random
 import math
+from crypto_lib import BabyStepGiantStep, DiscreteLog
 
 
 # ======= Быстрое возведение в степень по модулю ======= #
@@ -102,40 +103,30 @@ def get_ayp(mode: int):
 def discrete_log_bsgs(a: int, y: int, p: int, max_solutions=10):
     if y == 1:
         return [0]
-    if a % p == 0:
+    if math.gcd(a, p) != 1:
         return []
 
-    m = int(p ** 0.5) + 1
-
-    baby_steps = {}
-    current = 1
-    for j in range(m):
-        baby_steps[current] = j
-        current = (current * a) % p
-
-    a_inv_m = mod_exp(a, p - 1 - m, p)
+    # Таблица шагов младенца - компактная array('Q') из crypto_lib
+    x0 = BabyStepGiantStep(a, p).solve(y)
+    if x0 is None:
+        return []
 
     order = p - 1
+    return [x0 + k * order for k in range(max_solutions)]
 
-    solutions = []
-    current = y
 
-    for i in range(m):
-        if current in baby_steps:
-            j = baby_steps[current]
-            x0 = i * m + j
-
-            if mod_exp(a, x0, p) == y:
-                k = 0
-                while len(solutions) < max_solutions:
-                    solution = x0 + k * order
-                    solutions.append(solution)
-                    k += 1
-                break
+# ======= Дискретный логарифм: Полиг-Хеллман, ро-метод Полларда, BSGS ======= #
+def discrete_log(a: int, y: int, p: int, max_solutions=10):
+    if math.gcd(a, p) != 1:
+        return []
 
-        current = (current * a_inv_m) % p
+    # Метод выбирается по разложению p - 1: малые подгруппы - BSGS, большие - ро-метод
+    solver = DiscreteLog(a, p)
+    x0 = solver.solve(y)
+    if x0 is None:
+        return []
 
-    return solutions
+    return [x0 + k * solver.order for k in range(max_solutions)]
 
 
 # ======= Схема Диффи-Хеллмана ======= #
@@ -249,7 +240,7 @@ def main():
     print("1 - Возведение в степень по модулю")
     print("2 - Тест Ферма (проверка на простоту)")
     print("3 - Расширенный алгоритм Евклида")
-    print("4 - Шаг младенца — шаг великана (дискретный логарифм)")
+    print("4 - Дискретный логарифм (Полиг-Хеллман, ро-метод Полларда, шаг младенца — шаг великана)")
     print("5 - Схема Диффи-Хеллмана (общий ключ)")
     choice = int(input("Ваш выбор: "))
 
@@ -295,7 +286,7 @@ def main():
     elif choice == 4:
         p = int(input("Введите модуль p: "))
         print(f"Решается уравнение: {a}^x ≡ {b} (mod {p})")
-        x = discrete_log_bsgs(a, b, p)
+        x = discrete_log(a, b, p)
         if x:
             print(f"x = {x}")
         else:
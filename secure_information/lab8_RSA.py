@@ -1,29 +1,44 @@
-import hashlib
+import os
 import struct
 import math
-from typing import Tuple, List
-from crypto_lib import CryptoUtils
+from typing import Tuple, List, Union
+from crypto_lib import CryptoUtils, StreamHasher, HashSource, RSACrypto, RSAPrivateKey, PrimeGenerator
 
 
 class RSASignature:
 
+    # DigestInfo (DER) для EMSA-PKCS1-v1_5: идентификатор алгоритма перед значением хеша
+    DIGEST_INFO_PREFIXES = {
+        'md5': bytes.fromhex('3020300c06082a864886f70d020505000410'),
+        'sha1': bytes.fromhex('3021300906052b0e03021a05000414'),
+        'sha256': bytes.fromhex('3031300d060960864801650304020105000420'),
+        'sha384': bytes.fromhex('3041300d060960864801650304020205000430'),
+        'sha512': bytes.fromhex('3051300d060960864801650304020305000440'),
+    }
+    MODES = ('digest', 'bytes')
+    DIGEST_MODE_SUFFIX = '+pkcs1'
+
     def __init__(self):
         self.utils = CryptoUtils()
 
-    def generate_keys(self, bit_length: int = 1024):
+    def generate_keys(self, bit_length: int = 1024, workers: int = 1):
         print("\n=== Генерация ключей для RSA подписи ===")
 
         # простые чисел
         lower_bound = 2 ** (bit_length // 2 - 1)
         upper_bound = 2 ** (bit_length // 2)
 
-        print("Генерация простых чисел p и q...")
-        p = self.utils.generate_large_prime(lower_bound, upper_bound)
-        q = self.utils.generate_large_prime(lower_bound, upper_bound)
-
-        while q == p:
+        if workers > 1:
+            print(f"Параллельная генерация простых чисел p и q ({workers} процессов)...")
+            p, q = self.utils.generate_primes_parallel(bit_length // 2, 2, workers)
+        else:
+            print("Генерация простых чисел p и q...")
+            p = self.utils.generate_large_prime(lower_bound, upper_bound)
             q = self.utils.generate_large_prime(lower_bound, upper_bound)
 
+            while abs(q - p) < PrimeGenerator.min_gap(bit_length // 2):
+                q = self.utils.generate_large_prime(lower_bound, upper_bound)
+
         n = p * q
         phi = (p - 1) * (q - 1)
 
@@ -42,28 +57,21 @@ class RSASignature:
         print(f"d (секретная экспонента) = {d}")
 
         public_key = (n, e)
-        private_key = (n, d)
+        private_key = RSAPrivateKey.from_components(n, d, p, q)
 
         return public_key, private_key
 
-    def calculate_hash(self, data: bytes, hash_algorithm: str = 'sha256') -> bytes:
-        """хеш данных"""
-        if hash_algorithm.lower() == 'sha256':
-            return hashlib.sha256(data).digest()
-        elif hash_algorithm.lower() == 'sha512':
-            return hashlib.sha512(data).digest()
-        elif hash_algorithm.lower() == 'sha384':
-            return hashlib.sha384(data).digest()
-        elif hash_algorithm.lower() == 'sha1':
-            return hashlib.sha1(data).digest()
-        elif hash_algorithm.lower() == 'md5':
-            return hashlib.md5(data).digest()
-        else:
+    HASH_ALGORITHMS = ('sha256', 'sha512', 'sha384', 'sha1', 'md5')
+
+    def calculate_hash(self, data: HashSource, hash_algorithm: str = 'sha256') -> bytes:
+        """хеш данных (bytes, путь к файлу, файловый объект или итератор порций) без чтения целиком"""
+        if hash_algorithm.lower() not in self.HASH_ALGORITHMS:
             raise ValueError(f"Неподдерживаемый алгоритм хеширования: {hash_algorithm}")
+        return StreamHasher(hash_algorithm.lower()).digest(data)
 
     def sign_hash_byte_by_byte(self, hash_bytes: bytes, private_key: Tuple[int, int]) -> List[int]:
         """подпись хеша побайтово"""
-        n, d = private_key
+        n, d = private_key[0], private_key[1]
         signature = []
 
         for byte in hash_bytes:
@@ -88,26 +96,59 @@ class RSASignature:
 
         return True
 
-    def sign_file(self, input_file: str, private_key: Tuple[int, int],
-                  signature_file: str = None, hash_algorithm: str = 'sha256') -> str:
+    def encode_digest(self, hash_bytes: bytes, hash_algorithm: str, n: int) -> int:
+        """EMSA-PKCS1-v1_5: 00 01 FF..FF 00 || DigestInfo - детерминированное число меньше n"""
+        k = (n.bit_length() + 7) // 8
+        digest_info = self.DIGEST_INFO_PREFIXES[hash_algorithm.lower()] + hash_bytes
+        if k < len(digest_info) + 11:
+            raise ValueError(f"Модуль ({n.bit_length()} бит) слишком мал для подписи хеша {hash_algorithm} "
+                             f"целиком, используйте побайтовый режим")
+        return int.from_bytes(b'\x00\x01' + b'\xff' * (k - len(digest_info) - 3) + b'\x00' + digest_info, 'big')
+
+    def sign_digest(self, hash_bytes: bytes, private_key: Union[RSAPrivateKey, Tuple[int, int]],
+                    hash_algorithm: str = 'sha256') -> int:
+        """подпись всего хеша одним возведением в степень (по КТО, если известны p и q)"""
+        m = self.encode_digest(hash_bytes, hash_algorithm, private_key[0])
+        if isinstance(private_key, RSAPrivateKey):
+            return RSACrypto.decrypt_block(m, private_key)
+        n, d = private_key
+        return self.utils.mod_exp(m, d, n)
+
+    def verify_digest(self, hash_bytes: bytes, signature: int, public_key: Tuple[int, int],
+                      hash_algorithm: str = 'sha256') -> bool:
+        """Проверка подписи всего хеша: одно возведение в открытую степень"""
+        n, e = public_key
+        if not 0 < signature < n:
+            return False
+        try:
+            expected = self.encode_digest(hash_bytes, hash_algorithm, n)
+        except ValueError:
+            return False
+        return self.utils.mod_exp(signature, e, n) == expected
+
+    def sign_file(self, input_file: str, private_key: Union[RSAPrivateKey, Tuple[int, int]],
+                  signature_file: str = None, hash_algorithm: str = 'sha256', mode: str = 'digest') -> str:
         """создание подписи"""
         print(f"\n=== Создание подписи для файла {input_file} ===")
 
-        with open(input_file, 'rb') as f:
-            data = f.read()
+        print(f"Размер файла: {os.path.getsize(input_file)} байт")
 
-        print(f"Размер файла: {len(data)} байт")
-
-        file_hash = self.calculate_hash(data, hash_algorithm)
+        file_hash = self.calculate_hash(input_file, hash_algorithm)
         print(f"Хеш ({hash_algorithm}): {file_hash.hex()}")
 
-        signature = self.sign_hash_byte_by_byte(file_hash, private_key)
-        print(f"Создана подпись длиной {len(signature)} элементов")
+        if mode not in self.MODES:
+            raise ValueError(f"Неизвестный режим подписи: {mode}")
+        if mode == 'digest':
+            signature = [self.sign_digest(file_hash, private_key, hash_algorithm)]
+            print("Создана подпись всего хеша (EMSA-PKCS1-v1_5)")
+        else:
+            signature = self.sign_hash_byte_by_byte(file_hash, private_key)
+            print(f"Создана подпись длиной {len(signature)} элементов")
 
         if signature_file is None:
             signature_file = input_file + '.sig'
 
-        self.save_signature(signature_file, signature, hash_algorithm)
+        self.save_signature(signature_file, signature, hash_algorithm, mode)
         print(f"Подпись сохранена в файл: {signature_file}")
 
         return signature_file
@@ -116,19 +157,19 @@ class RSASignature:
                     public_key: Tuple[int, int]) -> bool:
         print(f"\n=== Проверка подписи для файла {input_file} ===")
 
-        with open(input_file, 'rb') as f:
-            data = f.read()
+        print(f"Размер файла: {os.path.getsize(input_file)} байт")
 
-        print(f"Размер файла: {len(data)} байт")
-
-        signature, hash_algorithm = self.load_signature(signature_file)
+        signature, hash_algorithm, mode = self.load_signature(signature_file)
         print(f"Загружена подпись длиной {len(signature)} элементов")
         print(f"Алгоритм хеширования: {hash_algorithm}")
 
-        file_hash = self.calculate_hash(data, hash_algorithm)
+        file_hash = self.calculate_hash(input_file, hash_algorithm)
         print(f"Хеш ({hash_algorithm}): {file_hash.hex()}")
 
-        is_valid = self.verify_hash_byte_by_byte(file_hash, signature, public_key)
+        if mode == 'digest':
+            is_valid = len(signature) == 1 and self.verify_digest(file_hash, signature[0], public_key, hash_algorithm)
+        else:
+            is_valid = self.verify_hash_byte_by_byte(file_hash, signature, public_key)
 
         if is_valid:
             print("✓ Подпись ВЕРНА!")
@@ -138,7 +179,10 @@ class RSASignature:
         return is_valid
 
     def save_signature(self, signature_file: str, signature: List[int],
-                       hash_algorithm: str):
+                       hash_algorithm: str, mode: str = 'bytes'):
+        # Подпись всего хеша помечается суффиксом в поле алгоритма; побайтовый формат не меняется
+        if mode == 'digest':
+            hash_algorithm += self.DIGEST_MODE_SUFFIX
         with open(signature_file, 'wb') as f:
             alg_bytes = hash_algorithm.ljust(32).encode('utf-8')[:32]
             f.write(alg_bytes)
@@ -154,10 +198,14 @@ class RSASignature:
                 f.write(struct.pack('>I', len(sig_bytes)))
                 f.write(sig_bytes)
 
-    def load_signature(self, signature_file: str) -> Tuple[List[int], str]:
+    def load_signature(self, signature_file: str) -> Tuple[List[int], str, str]:
         with open(signature_file, 'rb') as f:
             alg_bytes = f.read(32)
             hash_algorithm = alg_bytes.decode('utf-8').strip()
+            mode = 'bytes'
+            if hash_algorithm.endswith(self.DIGEST_MODE_SUFFIX):
+                hash_algorithm = hash_algorithm[:-len(self.DIGEST_MODE_SUFFIX)]
+                mode = 'digest'
 
             num_elements = struct.unpack('>I', f.read(4))[0]
 
@@ -169,7 +217,7 @@ class RSASignature:
                 sig_element = int.from_bytes(elem_bytes, 'big')
                 signature.append(sig_element)
 
-        return signature, hash_algorithm
+        return signature, hash_algorithm, mode
 
     def save_public_key(self, public_key: Tuple[int, int], key_file: str):
         n, e = public_key
@@ -177,10 +225,12 @@ class RSASignature:
             f.write(f"{n}\n{e}\n")
         print(f"Открытый ключ сохранен в: {key_file}")
 
-    def save_private_key(self, private_key: Tuple[int, int], key_file: str):
-        n, d = private_key
+    def save_private_key(self, private_key: Union[RSAPrivateKey, Tuple[int, int]], key_file: str):
+        n, d = private_key[0], private_key[1]
         with open(key_file, 'w') as f:
             f.write(f"{n}\n{d}\n")
+            if isinstance(private_key, RSAPrivateKey):
+                f.write(f"{private_key.p}\n{private_key.q}\n")
         print(f"Закрытый ключ сохранен в: {key_file}")
 
     def load_public_key(self, key_file: str) -> Tuple[int, int]:
@@ -190,11 +240,14 @@ class RSASignature:
         print(f"Открытый ключ загружен из: {key_file}")
         return (n, e)
 
-    def load_private_key(self, key_file: str) -> Tuple[int, int]:
+    def load_private_key(self, key_file: str) -> Union[RSAPrivateKey, Tuple[int, int]]:
         with open(key_file, 'r') as f:
-            n = int(f.readline().strip())
-            d = int(f.readline().strip())
+            values = [int(line) for line in f if line.strip()]
         print(f"Закрытый ключ загружен из: {key_file}")
+        if len(values) >= 4:
+            n, d, p, q = values[:4]
+            return RSAPrivateKey.from_components(n, d, p, q)
+        n, d = values[:2]
         return (n, d)
 
 
@@ -218,7 +271,8 @@ def main():
             # Генерация ключей
             try:
                 bit_length = int(input("Длина ключа в битах (по умолчанию 1024): ") or "1024")
-                public_key, private_key = rsa_sig.generate_keys(bit_length)
+                workers = int(input("Количество процессов для поиска простых (по умолчанию 1): ") or "1")
+                public_key, private_key = rsa_sig.generate_keys(bit_length, workers)
                 print("✓ Ключи успешно сгенерированы!")
             except Exception as e:
                 print(f"✗ Ошибка при генерации ключей: {e}")
@@ -234,8 +288,9 @@ def main():
                 hash_alg = input(
                     "Алгоритм хеширования (sha256/sha512/sha384/sha1/md5, по умолчанию sha256): ") or "sha256"
                 sig_file = input("Введите путь для файла подписи (Enter для автоматического): ") or None
+                mode = input("Режим подписи (digest - весь хеш, bytes - побайтово, по умолчанию digest): ") or "digest"
 
-                signature_file = rsa_sig.sign_file(input_file, private_key, sig_file, hash_alg)
+                signature_file = rsa_sig.sign_file(input_file, private_key, sig_file, hash_alg, mode)
                 print(f"✓ Файл успешно подписан! Подпись сохранена в: {signature_file}")
 
             except Exception as e:
@@ -1,15 +1,26 @@
-import hashlib
 import struct
-import random
 import math
-from typing import Tuple, List, Optional
-from crypto_lib import CryptoUtils
+from typing import Tuple, List, Optional, Union, Iterable, Dict
+from crypto_lib import CryptoUtils, FixedBaseExp, StreamHasher, HashSource, NoncePoolRegistry, Nonce, get_rng
+
+
+class ElGamalSigningKey:
+    """Подготовленный закрытый ключ: p, x, примитивный корень g и таблица степеней g"""
+
+    def __init__(self, p: int, x: int, g: int):
+        self.p = p
+        self.x = x
+        self.g = g
+        self.g_exp = FixedBaseExp(g, p, order=p - 1)
 
 
 class ElGamalSignature:
 
     def __init__(self):
         self.utils = CryptoUtils()
+        self._prepared_keys: Dict[Tuple[int, int], ElGamalSigningKey] = {}
+        # Пулы одноразовых чисел по подготовленному ключу: nonce_pools.start(prepare_key(private_key))
+        self.nonce_pools = NoncePoolRegistry(self.make_nonce)
 
     def generate_keys(self, key_size: int = 1024) -> Tuple[Tuple[int, int, int], Tuple[int, int]]:
         print("Генерация ключей Эль-Гамаля...")
@@ -17,16 +28,16 @@ class ElGamalSignature:
         lower_bound = 32500
         upper_bound = 65000
 
-        print(f"Поиск простого числа в диапазоне [{lower_bound}, {upper_bound}]...")
-        p = self.utils.generate_prime(lower_bound, upper_bound)
+        print(f"Поиск безопасного простого числа p = 2q + 1 в диапазоне [{lower_bound}, {upper_bound}]...")
+        p = self.utils.generate_safe_prime(lower_bound, upper_bound)
 
         print(f"Найдено простое число p = {p}")
 
         print("Поиск примитивного корня g...")
-        g = self.utils.find_primitive_root(p)
+        g = self.utils.find_primitive_root(p, (2, (p - 1) // 2))
         print(f"Найден примитивный корень g = {g}")
 
-        x = random.randint(2, p - 2)
+        x = get_rng().randint(2, p - 2)
 
         y = self.utils.mod_exp(g, x, p)
 
@@ -45,37 +56,58 @@ class ElGamalSignature:
 
         return public_key, private_key
 
-    def compute_hash(self, data: bytes) -> List[int]:
+    def compute_hash(self, data: HashSource) -> List[int]:
 
-        hash_obj = hashlib.sha256()
-        hash_obj.update(data)
-        hash_bytes = hash_obj.digest()
+        hash_bytes = StreamHasher('sha256').digest(data)
 
         return list(hash_bytes)
 
-    def sign_byte(self, m: int, private_key: Tuple[int, int]) -> Tuple[int, int]:
+    def prepare_key(self, private_key: Union[Tuple[int, int], ElGamalSigningKey],
+                    g: Optional[int] = None) -> ElGamalSigningKey:
+        if isinstance(private_key, ElGamalSigningKey):
+            return private_key
 
         p, x = private_key
+        prepared = self._prepared_keys.get((p, x))
+        if prepared is None or (g is not None and prepared.g != g):
+            if g is None:
+                g = self.utils.find_primitive_root(p)
+            prepared = ElGamalSigningKey(p, x, g)
+            self._prepared_keys[(p, x)] = prepared
+        return prepared
+
+    def make_nonce(self, key: ElGamalSigningKey) -> Nonce:
+        """Одноразовое число k, взаимно простое с p-1, с готовыми r = g^k mod p и k^(-1) mod (p-1)"""
+        p = key.p
 
         while True:
-            k = random.randint(2, p - 2)
+            k = get_rng().randint(2, p - 2)
             if math.gcd(k, p - 1) == 1:
-                break
+                return Nonce(k, key.g_exp.pow(k), pow(k, -1, p - 1))
 
-        r = self.utils.mod_exp(self.utils.find_primitive_root(p), k, p)
+    def sign_byte(self, m: int, private_key: Union[Tuple[int, int], ElGamalSigningKey]) -> Tuple[int, int]:
 
-        try:
-            k_inv = self.utils.mod_inverse(k, p - 1)
+        key = self.prepare_key(private_key)
+        p, x = key.p, key.x
+
+        while True:
+            _, r, k_inv = self.nonce_pools.next(key)
             s = (k_inv * (m - x * r)) % (p - 1)
 
-            if s < 0:
-                s += (p - 1)
+            if s != 0:
+                return r, s
+
+    def sign_digest(self, digest: Union[bytes, List[int]],
+                    private_key: Union[Tuple[int, int], ElGamalSigningKey]) -> List[Tuple[int, int]]:
 
-        except ValueError as e:
-            print(f"Ошибка при вычислении обратного элемента: {e}")
-            return self.sign_byte(m, private_key)
+        key = self.prepare_key(private_key)
+        return [self.sign_byte(byte_val, key) for byte_val in digest]
 
-        return r, s
+    def sign_documents(self, documents: Iterable[bytes],
+                       private_key: Union[Tuple[int, int], ElGamalSigningKey]) -> List[List[Tuple[int, int]]]:
+
+        key = self.prepare_key(private_key)
+        return [self.sign_digest(self.compute_hash(data), key) for data in documents]
 
     def verify_byte(self, m: int, signature: Tuple[int, int], public_key: Tuple[int, int, int]) -> bool:
 
@@ -95,32 +127,33 @@ class ElGamalSignature:
         except:
             return False
 
-    def sign_file(self, input_file: str, private_key: Tuple[int, int],
+    def verify_digest(self, digest: Union[bytes, List[int]], signatures: List[Tuple[int, int]],
+                      public_key: Tuple[int, int, int]) -> bool:
+        """Проверка подписей всех байтов хеша без вывода на экран"""
+        return len(signatures) == len(digest) and all(
+            self.verify_byte(byte_val, signature, public_key) for byte_val, signature in zip(digest, signatures))
+
+    def sign_file(self, input_file: str, private_key: Union[Tuple[int, int], ElGamalSigningKey],
                   signature_file: Optional[str] = None) -> str:
 
         print(f"Подписание файла: {input_file}")
 
         try:
-            with open(input_file, 'rb') as f:
-                data = f.read()
-
-            hash_bytes = self.compute_hash(data)
+            hash_bytes = self.compute_hash(input_file)
             hash_hex = ''.join(f'{b:02x}' for b in hash_bytes)
             print(f"Хеш файла (SHA-256): {hash_hex}")
             print(f"Длина хеша: {len(hash_bytes)} байт")
 
-            signatures = []
             print("Подписание байтов хеша...")
-            for i, byte_val in enumerate(hash_bytes):
-                r, s = self.sign_byte(byte_val, private_key)
-                signatures.append((r, s))
-                if i < 5:
-                    print(f"  Байт {i}: значение={byte_val}, подпись=({r}, {s})")
+            key = self.prepare_key(private_key)
+            signatures = self.sign_digest(hash_bytes, key)
+            for i, (byte_val, (r, s)) in enumerate(zip(hash_bytes[:5], signatures)):
+                print(f"  Байт {i}: значение={byte_val}, подпись=({r}, {s})")
 
             if signature_file is None:
                 signature_file = input_file + '.sig'
 
-            self._save_signature(signature_file, signatures, private_key[0])
+            self._save_signature(signature_file, signatures, key.p)
 
             print(f"Файл успешно подписан. Подпись сохранена в: {signature_file}")
             return signature_file
@@ -135,10 +168,7 @@ class ElGamalSignature:
         print(f"Проверка подписи файла: {input_file}")
 
         try:
-            with open(input_file, 'rb') as f:
-                data = f.read()
-
-            hash_bytes = self.compute_hash(data)
+            hash_bytes = self.compute_hash(input_file)
             hash_hex = ''.join(f'{b:02x}' for b in hash_bytes)
             print(f"Хеш файла (SHA-256): {hash_hex}")
 
@@ -272,12 +302,13 @@ def main():
                 pub_file = input("Файл открытого ключа (по умолчанию public.key): ") or "public.key"
 
                 public_key, private_key = elgamal.load_keys(pub_file, priv_file)
+                signing_key = elgamal.prepare_key(private_key, public_key[1])
 
                 sig_file = input("Файл для сохранения подписи (по умолчанию <filename>.sig): ").strip()
                 if not sig_file:
                     sig_file = None
 
-                elgamal.sign_file(input_file, private_key, sig_file)
+                elgamal.sign_file(input_file, signing_key, sig_file)
 
             except Exception as e:
                 print(f"✗ Ошибка при подписании файла: {e}")
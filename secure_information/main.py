@@ -1,5 +1,6 @@
 import os
-from crypto_lib import CryptoUtils, RSACrypto, DiffieHellman, ElGamalCrypto, ShamirCrypto, VernamCrypto
+import logging
+from crypto_lib import CryptoUtils, RSACrypto, DiffieHellman, ElGamalCrypto, ShamirCrypto, VernamCrypto, FileResult
 
 
 class CryptoSystem:
@@ -25,6 +26,26 @@ class CryptoSystem:
         print(f"Создан тестовый файл: {filename}")
         return filename
 
+    @staticmethod
+    def _print_file_result(result: FileResult):
+        """Вывод итогов операции над файлом"""
+        print(f"Формат: {result.file_format}, размер блока: {result.block_size} байт, блоков: {result.num_blocks}")
+        print(f"Размер: {result.input_size} -> {result.output_size} байт за {result.elapsed:.3f} с")
+
+    @staticmethod
+    def _print_progress(done: int, total: int):
+        """Индикатор прогресса в одной строке"""
+        percent = 100 * done // total if total else 100
+        print(f"\rВыполнено: {percent}%", end="\n" if done >= total else "", flush=True)
+
+    def _print_rsa_keys(self, public_key, private_key):
+        n, c = public_key
+        phi = (private_key.p - 1) * (private_key.q - 1)
+        print(f"\nВычисленные параметры:")
+        print(f"n = p * q = {private_key.p} * {private_key.q} = {n}")
+        print(f"φ(n) = (p-1)*(q-1) = {phi}")
+        print(f"c = d^(-1) mod φ(n) = {c}")
+
     def test_encryption_systems(self):
         """Тестирование систем шифрования"""
         print("\n" + "=" * 60)
@@ -36,7 +57,7 @@ class CryptoSystem:
         print("\n1. ТЕСТ ШИФРА ЭЛЬ-ГАМАЛЯ")
         print("-" * 40)
 
-        public_key, private_key = self.elgamal.generate_keys(2)
+        public_key, private_key = self.elgamal.generate_keys()
         self.elgamal.encrypt_file(public_key, test_file, "encrypted_elgamal.bin")
         self.elgamal.decrypt_file(private_key, "encrypted_elgamal.bin", "decrypted_elgamal.txt")
 
@@ -54,7 +75,7 @@ class CryptoSystem:
         print("\n2. ТЕСТ ШИФРА ШАМИРА")
         print("-" * 40)
 
-        keys_a, keys_b = self.shamir.generate_keys(2)
+        keys_a, keys_b = self.shamir.generate_keys()
         self.shamir.encrypt_file(keys_a, keys_b, test_file, "encrypted_shamir.bin")
         self.shamir.decrypt_file(keys_a, keys_b, "encrypted_shamir.bin", "decrypted_shamir.txt")
 
@@ -72,7 +93,7 @@ class CryptoSystem:
         print("\n3. ТЕСТ RSA ШИФРОВАНИЯ")
         print("-" * 40)
 
-        public_key, private_key = self.rsa.generate_keys(2)
+        public_key, private_key = self.rsa.generate_keys()
         self.rsa.encrypt_file(public_key, test_file, "encrypted_rsa.bin")
         self.rsa.decrypt_file(private_key, "encrypted_rsa.bin", "decrypted_rsa.txt")
 
@@ -136,7 +157,23 @@ class CryptoSystem:
         mode = int(input("Ваш выбор: "))
 
         if action == 1:
-            public_key, private_key = self.rsa.generate_keys(mode)
+            print("\n=== Генерация ключей RSA ===")
+            if mode == 1:
+                p = int(input("Введите простое число p: "))
+                q = int(input("Введите простое число q: "))
+                d = int(input("Введите секретный ключ d: "))
+                public_key, private_key = self.rsa.build_keys(p, q, d)
+            elif mode == 2:
+                print("Генерация простых чисел p и q...")
+                public_key, private_key = self.rsa.generate_keys()
+                print(f"Сгенерированные простые числа:")
+                print(f"p = {private_key.p}")
+                print(f"q = {private_key.q}")
+                print(f"d = {private_key.d}")
+            else:
+                print("Неверный режим")
+                return
+            self._print_rsa_keys(public_key, private_key)
 
             input_file = input("Введите путь к файлу для шифрования: ")
             output_file = input("Введите путь для сохранения зашифрованного файла: ")
@@ -146,7 +183,8 @@ class CryptoSystem:
                 return
 
             print("Шифрование...")
-            self.rsa.encrypt_file(public_key, input_file, output_file)
+            result = self.rsa.encrypt_file(public_key, input_file, output_file, progress=self._print_progress)
+            self._print_file_result(result)
 
             print(f"✓ Файл успешно зашифрован и сохранен как {output_file}")
             print(f"Секретный ключ для дешифрования: d = {private_key[1]}")
@@ -172,7 +210,8 @@ class CryptoSystem:
                 return
 
             print("Дешифрование...")
-            self.rsa.decrypt_file(private_key, input_file, output_file)
+            result = self.rsa.decrypt_file(private_key, input_file, output_file, progress=self._print_progress)
+            self._print_file_result(result)
 
             print(f"✓ Файл успешно расшифрован и сохранен как {output_file}")
 
@@ -202,7 +241,23 @@ class CryptoSystem:
         mode = int(input("Ваш выбор: "))
 
         if action == 1:
-            public_key, private_key = self.elgamal.generate_keys(mode)
+            print("\n=== Генерация ключей Эль-Гамаля ===")
+            if mode == 1:
+                p = int(input("Введите простое число p: "))
+                g = int(input("Введите генератор g: "))
+                C1 = int(input("Введите открытый ключ C1: "))
+                public_key, private_key = (p, g, C1), None
+            elif mode == 2:
+                print("Генерация простого числа p и поиск генератора g...")
+                public_key, private_key = self.elgamal.generate_keys()
+                print(f"Сгенерированные параметры:")
+                print(f"p = {public_key[0]}")
+                print(f"g = {public_key[1]}")
+                print(f"C1 = {public_key[2]}")
+                print(f"D1 = {private_key[1]}")
+            else:
+                print("Неверный режим")
+                return
 
             input_file = input("Введите путь к файлу для шифрования: ")
             output_file = input("Введите путь для сохранения зашифрованного файла: ")
@@ -212,10 +267,12 @@ class CryptoSystem:
                 return
 
             print("Шифрование...")
-            self.elgamal.encrypt_file(public_key, input_file, output_file)
+            result = self.elgamal.encrypt_file(public_key, input_file, output_file, progress=self._print_progress)
+            self._print_file_result(result)
 
             print(f"✓ Файл успешно зашифрован и сохранен как {output_file}")
-            print(f"Секретный ключ для дешифрования: D1 = {private_key[1]}")
+            if private_key is not None:
+                print(f"Секретный ключ для дешифрования: D1 = {private_key[1]}")
 
         elif action == 2:
             if mode == 1:
@@ -235,7 +292,8 @@ class CryptoSystem:
                 return
 
             print("Дешифрование...")
-            self.elgamal.decrypt_file(private_key, input_file, output_file)
+            result = self.elgamal.decrypt_file(private_key, input_file, output_file, progress=self._print_progress)
+            self._print_file_result(result)
 
             print(f"✓ Файл успешно расшифрован и сохранен как {output_file}")
 
@@ -265,7 +323,23 @@ class CryptoSystem:
         mode = int(input("Ваш выбор: "))
 
         if action == 1:
-            keys_a, keys_b = self.shamir.generate_keys(mode)
+            print("\n=== Генерация ключей Шамира ===")
+            if mode == 1:
+                p = int(input("Введите простое число p: "))
+                Ca = int(input("Введите открытый ключ абонента A (Ca): "))
+                Cb = int(input("Введите открытый ключ абонента B (Cb): "))
+                keys_a, keys_b = self.shamir.build_keys(p, Ca, Cb)
+            elif mode == 2:
+                keys_a, keys_b = self.shamir.generate_keys()
+                print(f"Сгенерированные параметры:")
+                print(f"p = {keys_a[0]}")
+                print(f"Ca = {keys_a[1]}")
+                print(f"Cb = {keys_b[1]}")
+                print(f"Da = {keys_a[2]}")
+                print(f"Db = {keys_b[2]}")
+            else:
+                print("Неверный режим")
+                return
 
             input_file = input("Введите путь к файлу для шифрования: ")
             output_file = input("Введите путь для сохранения зашифрованного файла: ")
@@ -275,7 +349,8 @@ class CryptoSystem:
                 return
 
             print("Шифрование...")
-            self.shamir.encrypt_file(keys_a, keys_b, input_file, output_file)
+            result = self.shamir.encrypt_file(keys_a, keys_b, input_file, output_file, progress=self._print_progress)
+            self._print_file_result(result)
 
             print(f"✓ Файл успешно зашифрован и сохранен как {output_file}")
             print(f"Секретные ключи для дешифрования:")
@@ -304,7 +379,8 @@ class CryptoSystem:
                 return
 
             print("Дешифрование...")
-            self.shamir.decrypt_file(keys_a, keys_b, input_file, output_file)
+            result = self.shamir.decrypt_file(keys_a, keys_b, input_file, output_file, progress=self._print_progress)
+            self._print_file_result(result)
 
             print(f"✓ Файл успешно расшифрован и сохранен как {output_file}")
 
@@ -327,6 +403,7 @@ class CryptoSystem:
         print("1 - Шифрование файла")
         print("2 - Дешифрование файла")
         print("3 - Полный процесс с обменом ключами Диффи-Хеллмана")
+        print("4 - Дешифрование файла общим ключом Диффи-Хеллмана")
         action = int(input("Ваш выбор: "))
 
         try:
@@ -336,6 +413,8 @@ class CryptoSystem:
                 self._vernam_decrypt()
             elif action == 3:
                 self._vernam_with_dh()
+            elif action == 4:
+                self._vernam_decrypt_with_dh()
             else:
                 print("Неверный выбор действия!")
         except Exception as e:
@@ -387,9 +466,8 @@ class CryptoSystem:
             print("Ошибка: файл с ключом не существует!")
             return
 
-        # Загрузка ключа и дешифрование
-        key = self.vernam.load_key_from_file(key_file)
-        self.vernam.decrypt_file(input_file, output_file, key)
+        # Дешифрование ключом из файла (ключ отображается в память, а не читается целиком)
+        self.vernam.decrypt_file_with_key_file(input_file, output_file, key_file)
 
         # Попытка показать содержимое текстового файла
         try:
@@ -402,15 +480,82 @@ class CryptoSystem:
 
     def _vernam_with_dh(self):
         """Полный процесс с Диффи-Хеллманом"""
+        print("\n=== Шифр Вернама с обменом ключами Диффи-Хеллмана ===")
         try:
-            output_file, key_file = self.vernam.vernam_with_dh_key_exchange()
+            input_file = input("Введите путь к файлу для шифрования: ")
+            output_file = input("Введите путь для сохранения зашифрованного файла: ")
+            key_file = input("Введите путь для сохранения общего ключа: ")
+
+            print("Обмен ключами Диффи-Хеллмана и шифрование...")
+            exchange, result = self.vernam.encrypt_file_with_dh(input_file, output_file, key_file)
+            print(f"Параметры Диффи-Хеллмана:")
+            print(f"p = {exchange.p}")
+            print(f"g = {exchange.g}")
+            print(f"Общий секретный ключ: {exchange.key}")
+            self._print_file_result(result)
+            print("✓ Процесс завершен успешно!")
+
             print(f"\nРезультаты:")
             print(f"Зашифрованный файл: {output_file}")
-            print(f"Ключ: {key_file}")
-            print("\nДля дешифрования используйте опцию 2 в меню Вернама")
+            print(f"Общий ключ: {key_file}")
+            print("\nДля дешифрования используйте опцию 4 в меню Вернама")
         except Exception as e:
             print(f"Ошибка в процессе: {e}")
 
+    def _vernam_decrypt_with_dh(self):
+        """Дешифрование файла ключевым потоком из общего ключа Диффи-Хеллмана"""
+        input_file = input("Введите путь к зашифрованному файлу: ")
+        output_file = input("Введите путь для сохранения расшифрованного файла: ")
+        key_file = input("Введите путь к файлу с общим ключом: ")
+
+        if not os.path.exists(input_file):
+            print("Ошибка: зашифрованный файл не существует!")
+            return
+        if not os.path.exists(key_file):
+            print("Ошибка: файл с ключом не существует!")
+            return
+
+        dh_key = self.vernam.load_dh_key(key_file)
+        result = self.vernam.decrypt_file_with_dh_key(input_file, output_file, dh_key)
+        self._print_file_result(result)
+        print(f"✓ Файл успешно расшифрован: {output_file}")
+
+    def diffie_hellman(self):
+        """Схема Диффи-Хеллмана для обмена ключами"""
+        print("\n=== Схема Диффи-Хеллмана ===")
+
+        print("\nВыберите способ задания параметров:")
+        print("1 - Ввести все параметры вручную")
+        print("2 - Сгенерировать все параметры автоматически")
+        print("3 - Ввести p и g, сгенерировать секретные ключи")
+
+        mode = int(input("Ваш выбор: "))
+
+        if mode == 1:
+            p = int(input("Введите простое число p: "))
+            g = int(input("Введите генератор g: "))
+            Xa = int(input("Введите секретный ключ абонента A (Xa): "))
+            Xb = int(input("Введите секретный ключ абонента B (Xb): "))
+            exchange = self.dh.exchange(p, g, Xa, Xb)
+        elif mode == 2:
+            print("Генерация простого числа p и поиск генератора g...")
+            exchange = self.dh.exchange(*self.dh.generate_params())
+        elif mode == 3:
+            p = int(input("Введите простое число p: "))
+            g = int(input("Введите генератор g: "))
+            exchange = self.dh.exchange(p, g)
+        else:
+            print("Неверный режим")
+            return None
+
+        p, g = exchange.p, exchange.g
+        print(f"\nПараметры: p = {p}, g = {g}, Xa = {exchange.Xa}, Xb = {exchange.Xb}")
+        print(f"\nОткрытые ключи:")
+        print(f"Ya = g^Xa mod p = {g}^{exchange.Xa} mod {p} = {exchange.Ya}")
+        print(f"Yb = g^Xb mod p = {g}^{exchange.Xb} mod {p} = {exchange.Yb}")
+        print(f"\nОбщий секретный ключ: Kab = {exchange.key}")
+        print("✓ Ключи совпадают! Обмен успешен.")
+        return exchange.key
 
     def main(self):
         """Основное меню программы"""
@@ -456,7 +601,7 @@ class CryptoSystem:
                 print(f"НОД({a}, {b}) = {g}")
                 print(f"Коэффициенты Безу: {a}*({x}) + {b}*({y}) = {g}")
             elif choice == 4:
-                self.dh.key_exchange()
+                self.diffie_hellman()
             elif choice == 5:
                 self.elgamal_crypto_system()
             elif choice == 6:
@@ -474,5 +619,6 @@ class CryptoSystem:
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     crypto_system = CryptoSystem()
     crypto_system.main()
\ No newline at end of file
@@ -0,0 +1,162 @@
+import json
+import os
+import logging
+import threading
+from typing import Dict, List, Tuple, Optional
+from crypto_lib import CryptoUtils
+
+logger = logging.getLogger(__name__)
+
+
+class DomainParameterPool:
+    """Пул заранее сгенерированных доменных параметров (p, q, g) с хранением на диске"""
+
+    def __init__(self, filename: str = "domain_params.json", target_size: int = 3):
+        self.utils = CryptoUtils()
+        self.filename = filename
+        self.target_size = target_size
+
+        self._lock = threading.Lock()
+        self._workers: Dict[str, threading.Thread] = {}
+        self._groups: Dict[str, List[Tuple[int, int, int]]] = self._load()
+
+    @staticmethod
+    def _key(L: int, N: int) -> str:
+        """Ключ хранилища для параметров длины (L, N)"""
+        return f"{L}:{N}"
+
+    def validate(self, group: Tuple[int, int, int], L: int, N: int) -> bool:
+        """Проверка группы: p и q простые нужной длины, q | p-1, g порядка q"""
+        p, q, g = group
+        if p.bit_length() != L or q.bit_length() != N:
+            return False
+        if (p - 1) % q != 0 or not 1 < g < p:
+            return False
+        if pow(g, q, p) != 1:
+            return False
+        return self.utils.is_probable_prime(q) and self.utils.is_probable_prime(p)
+
+    def _load(self) -> Dict[str, List[Tuple[int, int, int]]]:
+        """Загрузка пула из файла с повторной проверкой каждой группы"""
+        if not os.path.exists(self.filename):
+            return {}
+
+        try:
+            with open(self.filename, 'r') as f:
+                stored = json.load(f)
+        except OSError as e:
+            logger.warning("Пул %s не прочитан: %s", self.filename, e)
+            return {}
+        except ValueError as e:
+            self._move_aside(f"не разобран JSON: {e}")
+            return {}
+
+        if not isinstance(stored, dict):
+            self._move_aside("ожидался объект JSON")
+            return {}
+
+        groups: Dict[str, List[Tuple[int, int, int]]] = {}
+        for key, entries in stored.items():
+            try:
+                L, N = (int(v) for v in key.split(':'))
+            except ValueError:
+                logger.warning("Пул %s: пропущен некорректный ключ %r", self.filename, key)
+                continue
+            if not isinstance(entries, list):
+                logger.warning("Пул %s: пропущены группы для %s (ожидался список)", self.filename, key)
+                continue
+
+            valid = []
+            for entry in entries:
+                try:
+                    group = tuple(int(v) for v in entry)
+                    if len(group) == 3 and self.validate(group, L, N):
+                        valid.append(group)
+                        continue
+                except (ValueError, TypeError):
+                    pass
+                logger.warning("Пул %s: пропущена некорректная группа для %s", self.filename, key)
+            groups[self._key(L, N)] = valid
+        return groups
+
+    def _move_aside(self, reason: str):
+        """Перенос поврежденного файла пула в .bak, чтобы следующая запись его не затерла"""
+        backup = self.filename + '.bak'
+        try:
+            os.replace(self.filename, backup)
+        except OSError as e:
+            logger.warning("Пул %s поврежден (%s) и не перенесен: %s", self.filename, reason, e)
+            return
+        logger.warning("Пул %s поврежден (%s), файл перенесен в %s", self.filename, reason, backup)
+
+    def _save(self):
+        """Атомарная запись пула в файл"""
+        with self._lock:
+            stored = {key: [list(group) for group in groups] for key, groups in self._groups.items()}
+
+            tmp_file = self.filename + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(stored, f)
+            os.replace(tmp_file, self.filename)
+
+    def size(self, L: int, N: int) -> int:
+        """Количество готовых групп для (L, N)"""
+        with self._lock:
+            return len(self._groups.get(self._key(L, N), []))
+
+    def add(self, group: Tuple[int, int, int], L: int, N: int):
+        """Добавление проверенной группы в пул"""
+        if not self.validate(group, L, N):
+            raise ValueError(f"Группа не прошла проверку для L={L}, N={N}")
+
+        with self._lock:
+            self._groups.setdefault(self._key(L, N), []).append(tuple(group))
+        self._save()
+
+    def _fill(self, L: int, N: int, count: int):
+        while self.size(L, N) < count:
+            self.add(self.utils.generate_dsa_group(L, N), L, N)
+
+    def prefill(self, L: int, N: int, count: Optional[int] = None,
+                background: bool = True) -> Optional[threading.Thread]:
+        """Догенерация пула для (L, N) до count групп (по умолчанию в фоновом потоке)"""
+        count = count or self.target_size
+        if not background:
+            self._fill(L, N, count)
+            return None
+
+        key = self._key(L, N)
+        with self._lock:
+            worker = self._workers.get(key)
+            if worker is not None and worker.is_alive():
+                return worker
+            worker = threading.Thread(target=self._fill, args=(L, N, count), daemon=True)
+            self._workers[key] = worker
+        worker.start()
+        return worker
+
+    def get(self, L: int, N: int) -> Tuple[int, int, int]:
+        """Постоянная группа для (L, N): первая из пула или сгенерированная и сохраненная"""
+        with self._lock:
+            groups = self._groups.get(self._key(L, N))
+            if groups:
+                return groups[0]
+
+        group = self.utils.generate_dsa_group(L, N)
+        self.add(group, L, N)
+        self.prefill(L, N)
+        return group
+
+    def take(self, L: int, N: int) -> Tuple[int, int, int]:
+        """Извлечение новой группы из пула с фоновым пополнением (первая группа остается для get)"""
+        with self._lock:
+            groups = self._groups.get(self._key(L, N), [])
+            group = groups.pop() if len(groups) > 1 else None
+
+        if group is None:
+            group = self.utils.generate_dsa_group(L, N)
+        else:
+            self._save()
+
+        self.prefill(L, N)
+        return group
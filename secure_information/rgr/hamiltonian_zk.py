@@ -1,8 +1,12 @@
-import random
+import sys
+import os
 import hashlib
 import json
 from typing import List, Tuple, Set, Dict
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from crypto_lib import get_rng
+
 
 class HamiltonianCycleZK:
     """
@@ -129,7 +133,7 @@ class HamiltonianCycleZK:
         """
         vertices = list(self.vertices)
         shuffled = vertices.copy()
-        random.shuffle(shuffled)
+        get_rng().shuffle(shuffled)
         return {original: permuted for original, permuted in zip(vertices, shuffled)}
 
     def permute_graph(self, permutation: Dict[int, int]) -> Dict[int, List[int]]:
@@ -210,7 +214,7 @@ class HamiltonianCycleZK:
         Returns:
             Случайный вызов: 0 или 1
         """
-        return random.randint(0, 1)
+        return get_rng().randint(0, 1)
 
     def prover_response(self, challenge: int, permuted_cycle: List[int],
                         permutation: Dict[int, int]) -> any:
@@ -361,8 +365,8 @@ def generate_sample_graph(filename: str, n: int = 6):
     max_extra = n // 2
     attempts = 0
     while extra_edges < max_extra and attempts < 100:
-        u = random.randint(1, n)
-        v = random.randint(1, n)
+        u = get_rng().randint(1, n)
+        v = get_rng().randint(1, n)
         if u != v and (u, v) not in edges and (v, u) not in edges:
             edges.append((u, v))
             extra_edges += 1
@@ -1,8 +1,11 @@
-import random
+import sys
 import hashlib
 from typing import List, Tuple, Dict, Optional
 import os
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from crypto_lib import get_rng
+
 
 class ZeroKnowledgeHamiltonian:
     """
@@ -194,7 +197,7 @@ class ZeroKnowledgeHamiltonian:
         """
         # Создаем случайную перестановку вершин
         permutation = list(range(self.n))
-        random.shuffle(permutation)
+        get_rng().shuffle(permutation)
 
         # Создаем обратную перестановку
         inverse_permutation = [0] * self.n
@@ -229,7 +232,7 @@ class ZeroKnowledgeHamiltonian:
             for j in range(self.n):
                 if matrix[i][j] == 1:
                     # Для единиц добавляем случайное число
-                    random_num = random.randint(1000, 10000)
+                    random_num = get_rng().randint(1000, 10000)
                     value = matrix[i][j] + random_num
                 else:
                     # Для нулей оставляем как есть (но можно тоже добавлять шум)
@@ -463,7 +466,7 @@ def demo_protocol():
     print("-" * 40)
 
     # Боб случайным образом выбирает вопрос (1 или 2)
-    question = random.randint(1, 2)
+    question = get_rng().randint(1, 2)
     if question == 1:
         print("Боб задает вопрос 1: 'Каков гамильтонов цикл для графа H?'")
     else:
@@ -527,7 +530,7 @@ def demo_protocol():
         F = protocol.encrypt_matrix(H)
 
         # Боб задает случайный вопрос
-        question = random.randint(1, 2)
+        question = get_rng().randint(1, 2)
 
         # Алиса отвечает
         if question == 1:
@@ -639,7 +642,7 @@ def interactive_mode():
         F = protocol.encrypt_matrix(H)
 
         # Шаг 2: Боб задает вопрос
-        question = random.randint(1, 2)
+        question = get_rng().randint(1, 2)
         if question == 1:
             print("2. Боб спрашивает: 'Каков гамильтонов цикл для графа H?'")
         else:
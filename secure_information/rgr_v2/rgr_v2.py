@@ -1,9 +1,12 @@
 import sys
+import os
 import argparse
-import random
 import math
 from typing import List, Tuple, Optional
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from crypto_lib import get_rng
+
 
 # ---
 # RSA
@@ -26,7 +29,7 @@ def is_probable_prime(n: int, k: int = 12) -> bool:
         s += 1
 
     for _ in range(k):
-        a = random.randrange(2, n - 1)
+        a = get_rng().randrange(2, n - 1)
         x = pow(a, d, n)  # a^d mod n
         if x == 1 or x == n - 1: continue
 
@@ -46,7 +49,7 @@ def gen_prime(bits: int) -> int:
     """
     while True:
         # | (1<<(bits-1)) | 1: четное число нужной длины
-        p = random.getrandbits(bits) | (1 << (bits - 1)) | 1
+        p = get_rng().getrandbits(bits) | (1 << (bits - 1)) | 1
         if is_probable_prime(p): return p
 
 
@@ -156,7 +159,7 @@ def permute_graph(adj: List[List[int]]) -> Tuple[List[List[int]], List[int]]:
     """
     n = len(adj)
     perm = list(range(n))
-    random.shuffle(perm)
+    get_rng().shuffle(perm)
     H = [[adj[perm[i]][perm[j]] for j in range(n)] for i in range(n)]
     return H, perm
 
@@ -171,7 +174,7 @@ def commit_matrix(H: List[List[int]], e: int, N: int) -> Tuple[List[List[int]],
     F, s_mat, r_mat = [[0] * n for _ in range(n)], [[0] * n for _ in range(n)], [[0] * n for _ in range(n)]
     for i in range(n):
         for j in range(n):
-            r = random.randrange(1, max(2, N - 1))  # r ∈ [1, N-2]
+            r = get_rng().randrange(1, max(2, N - 1))  # r ∈ [1, N-2]
             s = H[i][j] + 2 * r  # Парное кодирование 0=>even, 1=>odd
             F[i][j] = pow(s, e, N)
             s_mat[i][j] = s
@@ -255,7 +258,7 @@ def run_protocol_once(adj_G: List[List[int]], cycle_G: List[int], e: int, d: int
     """
     H, perm = permute_graph(adj_G)
     F, s_mat, r_mat = commit_matrix(H, e, N)
-    challenge = random.choice([1, 2])
+    challenge = get_rng().choice([1, 2])
 
     if challenge == 1:
         # Раскрытие цикла: ребра + s для них
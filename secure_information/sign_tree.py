@@ -0,0 +1,380 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, NamedTuple, Union
+
+from crypto_lib import CryptoUtils, StreamHasher
+from lab8_RSA import RSASignature
+from lab9_gamal import ElGamalSignature
+from lab10_gost import GOSTSignature
+from lab11_fips import FIPS186Signature
+
+MANIFEST_NAME = "MANIFEST.sig.json"
+MANIFEST_VERSION = 1
+HASH_ALGORITHM = "sha256"
+SIGN_SHARD_SIZE = 64
+
+
+def quiet(func, *args, **kwargs):
+    """Вызов функции с подавлением вывода"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def is_int_list(value, length: Optional[int] = None) -> bool:
+    """Значение из манифеста - список целых чисел (длины length, если задана)"""
+    return (isinstance(value, list) and (length is None or len(value) == length) and
+            all(isinstance(item, int) and not isinstance(item, bool) for item in value))
+
+
+class SignatureScheme(ABC):
+    """Схема подписи для пакетного режима: ключи из файлов, подпись и проверка готовых хешей
+
+    Ключи - кортежи чисел, подписи - списки, чтобы передаваться в процессы
+    пула и записываться в манифест JSON. Подпись из манифеста может иметь
+    любую форму: verify считает подпись неверной формы недействительной, а не падает.
+    """
+
+    name = ""
+    needs = ("private_key",)
+    verify_needs = ("public_key",)
+
+    @abstractmethod
+    def load_signing_key(self, args) -> tuple:
+        pass
+
+    @abstractmethod
+    def load_verifying_key(self, args) -> tuple:
+        pass
+
+    @abstractmethod
+    def sign(self, digest: bytes, key: tuple) -> list:
+        pass
+
+    @abstractmethod
+    def verify(self, entries: List[Tuple[bytes, object]], key: tuple) -> List[bool]:
+        """Проверка пар (хеш, подпись): True для верных"""
+
+
+class RSAScheme(SignatureScheme):
+    name = "rsa"
+
+    def __init__(self):
+        self.impl = RSASignature()
+
+    def load_signing_key(self, args) -> tuple:
+        return quiet(self.impl.load_private_key, args.private_key)
+
+    def load_verifying_key(self, args) -> tuple:
+        return quiet(self.impl.load_public_key, args.public_key)
+
+    def sign(self, digest: bytes, key: tuple) -> list:
+        return [self.impl.sign_digest(digest, key, HASH_ALGORITHM)]
+
+    def verify(self, entries: List[Tuple[bytes, object]], key: tuple) -> List[bool]:
+        return [is_int_list(signature, 1) and self.impl.verify_digest(digest, signature[0], key, HASH_ALGORITHM)
+                for digest, signature in entries]
+
+
+class ElGamalScheme(SignatureScheme):
+    name = "elgamal"
+    needs = ("private_key", "public_key")
+
+    def __init__(self):
+        self.impl = ElGamalSignature()
+
+    def load_signing_key(self, args) -> tuple:
+        (p, g, _), (_, x) = quiet(self.impl.load_keys, args.public_key, args.private_key)
+        return p, x, g
+
+    def load_verifying_key(self, args) -> tuple:
+        with open(args.public_key) as f:
+            return tuple(int(line) for line in f if line.strip())[:3]
+
+    def sign(self, digest: bytes, key: tuple) -> list:
+        p, x, g = key
+        return [list(pair) for pair in self.impl.sign_digest(digest, self.impl.prepare_key((p, x), g))]
+
+    def verify(self, entries: List[Tuple[bytes, object]], key: tuple) -> List[bool]:
+        return [isinstance(signature, list) and all(is_int_list(pair, 2) for pair in signature) and
+                self.impl.verify_digest(digest, [tuple(pair) for pair in signature], key)
+                for digest, signature in entries]
+
+
+class DiscreteLogScheme(SignatureScheme):
+    """ГОСТ и DSA: общие параметры (p, q, g) из файла, ключи x и y из отдельных файлов"""
+
+    needs = ("params", "private_key", "public_key")
+    verify_needs = ("params", "public_key")
+
+    @abstractmethod
+    def load_params(self, filename: str) -> Tuple[int, int, int]:
+        pass
+
+    def load_signing_key(self, args) -> tuple:
+        p, q, g = self.load_params(args.params)
+        x, _ = quiet(self.impl.load_keys, args.private_key, args.public_key)
+        return p, q, g, x
+
+    def load_verifying_key(self, args) -> tuple:
+        p, q, g = self.load_params(args.params)
+        with open(args.public_key) as f:
+            return p, q, g, int(f.read().strip())
+
+    def sign(self, digest: bytes, key: tuple) -> list:
+        return list(self.impl.sign_digest(digest, *key))
+
+    def verify(self, entries: List[Tuple[bytes, object]], key: tuple) -> List[bool]:
+        # Подписи неверной формы отсекаются сразу, остальные проверяются одним пакетом
+        indexed = [(i, digest, tuple(signature)) for i, (digest, signature) in enumerate(entries)
+                   if is_int_list(signature, 2)]
+        results = [False] * len(entries)
+        report = self.impl.verify_digests([(digest, signature) for _, digest, signature in indexed], *key)
+        failed = set(report.failed)
+        for position, (i, _, _) in enumerate(indexed):
+            results[i] = position not in failed
+        return results
+
+
+class GOSTScheme(DiscreteLogScheme):
+    name = "gost"
+
+    def __init__(self):
+        self.impl = GOSTSignature()
+
+    def load_params(self, filename: str) -> Tuple[int, int, int]:
+        return quiet(self.impl.load_common_params, filename)
+
+
+class DSAScheme(DiscreteLogScheme):
+    name = "dsa"
+
+    def __init__(self):
+        self.impl = FIPS186Signature()
+
+    def load_params(self, filename: str) -> Tuple[int, int, int]:
+        return quiet(self.impl.load_domain_params, filename)
+
+
+SCHEMES = {scheme.name: scheme for scheme in (RSAScheme, ElGamalScheme, GOSTScheme, DSAScheme)}
+
+_schemes: Dict[str, SignatureScheme] = {}
+
+
+def get_scheme(name: str) -> SignatureScheme:
+    """Экземпляр схемы (один на процесс: подготовленные ключи переиспользуются)"""
+    scheme = _schemes.get(name)
+    if scheme is None:
+        scheme = SCHEMES[name]()
+        _schemes[name] = scheme
+    return scheme
+
+
+def _sign_shard(digests: List[bytes], scheme: str, key: tuple) -> List[list]:
+    """Подпись порции хешей в процессе пула"""
+    return [get_scheme(scheme).sign(digest, key) for digest in digests]
+
+
+def _verify_shard(entries: List[Tuple[bytes, object]], scheme: str, key: tuple) -> List[bool]:
+    """Проверка порции пар (хеш, подпись) в процессе пула"""
+    return get_scheme(scheme).verify(entries, key)
+
+
+class TreeResult(NamedTuple):
+    """Результат подписи или проверки каталога"""
+    manifest: str
+    files: int
+    failed: List[Tuple[str, str]]
+    unsigned: List[str]
+    elapsed: float
+
+    @property
+    def valid(self) -> bool:
+        return not self.failed and not self.unsigned
+
+
+def walk_files(root: str, skip: Optional[str] = None) -> List[str]:
+    """Относительные пути (через /) всех файлов каталога в устойчивом порядке"""
+    skip = os.path.abspath(skip) if skip else None
+    paths = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs.sort()
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            if os.path.abspath(path) != skip:
+                paths.append(os.path.relpath(path, root).replace(os.sep, "/"))
+    return paths
+
+
+def hash_files(root: str, paths: List[str], threads: Optional[int] = None) -> List[Union[bytes, str]]:
+    """Хеши файлов в пуле потоков (hashlib отпускает GIL)
+
+    Вместо хеша файла, который не удалось прочитать, возвращается причина:
+    missing - файла нет, unreadable - прочие ошибки ввода-вывода (нет прав,
+    каталог вместо файла и т. п.).
+    """
+    hasher = StreamHasher(HASH_ALGORITHM, prefetch=0)
+
+    def digest(path: str) -> Union[bytes, str]:
+        try:
+            return hasher.digest(os.path.join(root, path))
+        except FileNotFoundError:
+            return "missing"
+        except OSError:
+            return "unreadable"
+
+    with ThreadPoolExecutor(max_workers=threads or os.cpu_count()) as pool:
+        return list(pool.map(digest, paths))
+
+
+def sign_tree(scheme: str, key: tuple, root: str, manifest: Optional[str] = None,
+              threads: Optional[int] = None, workers: int = 1) -> TreeResult:
+    """Подпись всех файлов каталога: хеши в потоках, подписи в пуле процессов, манифест JSON
+
+    Файлы, удаленные или ставшие недоступными после обхода каталога, в
+    манифест не попадают и перечисляются в failed с причиной missing или
+    unreadable.
+    """
+    start = time.perf_counter()
+    manifest = manifest or os.path.join(root, MANIFEST_NAME)
+    listed = walk_files(root, manifest)
+    paths, digests, failed = [], [], []
+    for path, digest in zip(listed, hash_files(root, listed, threads)):
+        if isinstance(digest, str):
+            failed.append((path, digest))
+        else:
+            paths.append(path)
+            digests.append(digest)
+
+    signatures = []
+    shards = CryptoUtils.iter_shards(digests, SIGN_SHARD_SIZE)
+    for shard_signatures in CryptoUtils.map_shards(_sign_shard, shards, (scheme, key), workers):
+        signatures.extend(shard_signatures)
+
+    document = {
+        "version": MANIFEST_VERSION,
+        "scheme": scheme,
+        "hash": HASH_ALGORITHM,
+        "files": [{"path": path, "digest": digest.hex(), "signature": signature}
+                  for path, digest, signature in zip(paths, digests, signatures)],
+    }
+    # Запись через временный файл: прерванный запуск не оставляет обрезанный манифест
+    temp = manifest + ".tmp"
+    with open(temp, "w") as f:
+        json.dump(document, f, indent=1)
+    os.replace(temp, manifest)
+    return TreeResult(manifest, len(paths), failed, [], time.perf_counter() - start)
+
+
+def load_manifest(manifest: str) -> Dict:
+    with open(manifest) as f:
+        document = json.load(f)
+    if not isinstance(document, dict):
+        raise ValueError("Манифест должен быть объектом JSON")
+    if document.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Неподдерживаемая версия манифеста: {document.get('version')}")
+    if document.get("scheme") not in SCHEMES:
+        raise ValueError(f"Неизвестная схема подписи в манифесте: {document.get('scheme')}")
+    if document.get("hash") != HASH_ALGORITHM:
+        raise ValueError(f"Неподдерживаемый алгоритм хеширования: {document.get('hash')}")
+    files = document.get("files")
+    if not isinstance(files, list) or not all(isinstance(entry, dict) and isinstance(entry.get("path"), str)
+                                              for entry in files):
+        raise ValueError("Некорректный список файлов в манифесте")
+    return document
+
+
+def verify_tree(manifest: str, key: tuple, root: Optional[str] = None,
+                threads: Optional[int] = None, workers: int = 1) -> TreeResult:
+    """Проверка манифеста: хеши файлов в потоках, подписи в пуле процессов
+
+    failed - пары (путь, причина): missing, unreadable, modified или signature;
+    unsigned - файлы каталога, которых нет в манифесте.
+    """
+    start = time.perf_counter()
+    document = load_manifest(manifest)
+    scheme = document["scheme"]
+    root = root or os.path.dirname(os.path.abspath(manifest))
+    entries = document["files"]
+    paths = [entry["path"] for entry in entries]
+    digests = hash_files(root, paths, threads)
+
+    failed = []
+    checked = []
+    for entry, digest in zip(entries, digests):
+        if isinstance(digest, str):
+            failed.append((entry["path"], digest))
+        elif digest.hex() != entry.get("digest"):
+            failed.append((entry["path"], "modified"))
+        else:
+            checked.append((entry["path"], digest, entry.get("signature")))
+
+    results = []
+    shards = CryptoUtils.iter_shards([(digest, signature) for _, digest, signature in checked], SIGN_SHARD_SIZE)
+    for shard_results in CryptoUtils.map_shards(_verify_shard, shards, (scheme, key), workers):
+        results.extend(shard_results)
+    failed.extend((path, "signature") for (path, _, _), ok in zip(checked, results) if not ok)
+
+    signed = set(paths)
+    unsigned = [path for path in walk_files(root, manifest) if path not in signed]
+    return TreeResult(manifest, len(entries), sorted(failed), unsigned, time.perf_counter() - start)
+
+
+def require(parser: argparse.ArgumentParser, args, names: Tuple[str, ...]):
+    missing = ["--" + name.replace("_", "-") for name in names if getattr(args, name) is None]
+    if missing:
+        parser.error(f"для схемы {args.scheme} нужны параметры: {', '.join(missing)}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Пакетная подпись и проверка файлов каталога (RSA, Эль-Гамаль, ГОСТ, DSA)")
+    parser.add_argument("command", choices=["sign", "verify"], help="sign - подписать каталог, verify - проверить манифест")
+    parser.add_argument("path", help="каталог (sign) или файл манифеста (verify)")
+    parser.add_argument("--scheme", choices=sorted(SCHEMES), help="схема подписи (для verify берется из манифеста)")
+    parser.add_argument("--private-key", help="файл закрытого ключа")
+    parser.add_argument("--public-key", help="файл открытого ключа")
+    parser.add_argument("--params", help="файл общих параметров p, q, g (ГОСТ, DSA)")
+    parser.add_argument("--manifest", help=f"файл манифеста для sign (по умолчанию <каталог>/{MANIFEST_NAME})")
+    parser.add_argument("--root", help="каталог с файлами для verify (по умолчанию каталог манифеста)")
+    parser.add_argument("--threads", type=int, default=None, help="потоков для хеширования")
+    parser.add_argument("--workers", type=int, default=1, help="процессов для подписи и проверки")
+    args = parser.parse_args(argv)
+
+    if args.command == "sign":
+        if args.scheme is None:
+            parser.error("для sign нужен параметр --scheme")
+        scheme = get_scheme(args.scheme)
+        require(parser, args, scheme.needs)
+        result = sign_tree(args.scheme, scheme.load_signing_key(args), args.path, args.manifest,
+                           args.threads, args.workers)
+        for path, reason in result.failed:
+            print(f"✗ {path}: {reason}")
+        print(f"Подписано файлов: {result.files} за {result.elapsed:.2f} с")
+        print(f"Манифест: {result.manifest}")
+        return 0 if result.valid else 1
+
+    manifest_scheme = load_manifest(args.path)["scheme"]
+    if args.scheme is not None and args.scheme != manifest_scheme:
+        parser.error(f"манифест подписан схемой {manifest_scheme}, а не {args.scheme}")
+    args.scheme = manifest_scheme
+    scheme = get_scheme(args.scheme)
+    require(parser, args, scheme.verify_needs)
+    result = verify_tree(args.path, scheme.load_verifying_key(args), args.root, args.threads, args.workers)
+
+    for path, reason in result.failed:
+        print(f"✗ {path}: {reason}")
+    for path in result.unsigned:
+        print(f"? {path}: нет в манифесте")
+    print(f"Проверено файлов: {result.files} за {result.elapsed:.2f} с, ошибок: {len(result.failed)}, "
+          f"неподписанных: {len(result.unsigned)}")
+    return 0 if result.valid else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import math
+
+from crypto_lib import PrimeGenerator, deterministic_rng
+
+
+def fermat_factor(n: int, steps: int) -> bool:
+    """Раскладывается ли n = p*q методом Ферма за steps шагов"""
+    a = math.isqrt(n - 1) + 1
+    for _ in range(steps):
+        b2 = a * a - n
+        b = math.isqrt(b2)
+        if b * b == b2:
+            return True
+        a += 1
+    return False
+
+
+def test_generate_parallel_gap():
+    bits = 512
+    for seed in range(3):
+        with deterministic_rng(seed):
+            p, q = PrimeGenerator.generate_parallel(bits, 2, workers=2)
+        assert p != q
+        assert p.bit_length() == q.bit_length() == bits
+        assert PrimeGenerator.is_probable_prime(p) and PrimeGenerator.is_probable_prime(q)
+        assert abs(p - q) >= PrimeGenerator.min_gap(bits)
+        assert not fermat_factor(p * q, 1000)